@@ -0,0 +1,196 @@
+import os
+import json
+import random
+import shutil
+from typing import Any, Dict, List
+
+# Synthetic corpora for the benchmarks: N wiki PDFs, M code files spread over several projects and a
+# ticket database with K tickets. Everything is derived from the seed, so two runs with the same
+# parameters benchmark byte-identical inputs.
+
+CORPUS_VERSION = 2
+
+TOPICS = [
+    "Campaign Budget Pacing", "Ad Disapproval", "Conversion Tracking", "Invalid Click Activity",
+    "Bid Strategy Learning", "Audience Targeting", "Reporting Discrepancy", "Billing Adjustment",
+    "Keyword Quality Score", "Creative Rendering", "Frequency Capping", "Geo Targeting",
+    "Attribution Window", "Pixel Firing", "Account Suspension", "Impression Share",
+]
+WORDS = (
+    "customer complaint ticket escalation resolution advertiser campaign budget spend delivery impression "
+    "click conversion pixel tag auction bid ranking quality score policy review approval rejection creative "
+    "landing page audience segment targeting location schedule report dashboard metric discrepancy invoice "
+    "credit refund account verification log selection request latency timeout retry cache index diagnosis "
+    "root cause mitigation workaround procedure guideline standard acknowledgement investigation summary"
+).split()
+
+
+def _sentence(rng: random.Random, topic_words: List[str], length: int) -> str:
+    words = [rng.choice(topic_words) if rng.random() < 0.2 else rng.choice(WORDS) for _ in range(length)]
+    return " ".join(words).capitalize() + "."
+
+
+# --- PDFs ---
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: str, pages: List[List[str]]) -> None:
+    """
+    Writes a minimal PDF (one Helvetica text block per page) that PyPDF2 can extract text from.
+    """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        stream = "BT /F1 10 Tf 12 TL 50 760 Td " + " ".join(f"({_pdf_escape(line)}) Tj T*" for line in lines) + " ET"
+        stream = stream.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id)
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def generate_wikis(wiki_dir: str, count: int, pages: int, rng: random.Random) -> List[str]:
+    os.makedirs(wiki_dir, exist_ok=True)
+    names = []
+    for i in range(count):
+        topic = TOPICS[i % len(TOPICS)]
+        topic_words = topic.lower().split()
+        name = f"{topic.replace(' ', '-')}-Guide-{i:04d}.pdf"
+        document = []
+        for page in range(pages):
+            lines = [f"{topic} - section {page + 1}"]
+            lines += [_sentence(rng, topic_words, rng.randint(8, 14)) for _ in range(45)]
+            document.append(lines)
+        write_pdf(os.path.join(wiki_dir, name), document)
+        names.append(name)
+    return names
+
+
+# --- Code ---
+
+def _csharp_controller(name: str, actions: int, rng: random.Random) -> str:
+    lines = ["using System;", "using System.Threading.Tasks;", "using Microsoft.AspNetCore.Mvc;", "",
+             f"namespace Bench.{name}", "{", f"    public class {name}Controller : Controller", "    {",
+             "        private readonly IComplaintService _service;", "",
+             f"        public {name}Controller(IComplaintService service)", "        {",
+             "            _service = service;", "        }"]
+    for i in range(actions):
+        action = f"{rng.choice(['Review', 'Resolve', 'Escalate', 'Report', 'List'])}{i}"
+        lines += ["", f"        public async Task<IActionResult> {action}(int ticketId)", "        {",
+                  "            var ticket = await _service.GetTicketAsync(ticketId);",
+                  "            if (ticket == null)", "            {", "                return NotFound();", "            }"]
+        for _ in range(rng.randint(2, 8)):
+            lines.append(f"            ticket.Notes.Add(\"{_sentence(rng, WORDS, 6)}\");")
+        lines += [f"            return View(\"{action}\", ticket);", "        }"]
+    lines += ["    }", "}", ""]
+    return "\n".join(lines)
+
+
+def _javascript_module(name: str, functions: int, rng: random.Random) -> str:
+    lines = ["'use strict';", ""]
+    for i in range(functions):
+        lines += [f"function {name}{i}(ticket) {{", "    const notes = [];"]
+        for _ in range(rng.randint(2, 8)):
+            lines.append(f"    notes.push('{_sentence(rng, WORDS, 5)}');")
+        lines += ["    if (ticket.status === 'open') {", "        return notes.join('\\n');", "    }", "    return null;", "}", ""]
+    return "\n".join(lines)
+
+
+def _razor_view(name: str, rng: random.Random) -> str:
+    lines = ["@model Bench.TicketViewModel", "@{", f"    ViewData[\"Title\"] = \"{name}\";", "}", "",
+             f"<h2>{name}</h2>", "<ul>"]
+    lines += [f"    <li>{_sentence(rng, WORDS, 7)}</li>" for _ in range(rng.randint(10, 30))]
+    lines += ["</ul>", ""]
+    return "\n".join(lines)
+
+
+def generate_code(code_dir: str, count: int, files_per_project: int, rng: random.Random) -> Dict[str, List[str]]:
+    """
+    Writes `count` files (60% C# controllers, 20% JavaScript, 20% Razor views) into Project000, Project001, ...
+    """
+    projects: Dict[str, List[str]] = {}
+    for i in range(count):
+        project = f"Project{i // files_per_project:03d}"
+        kind = i % 5
+        if kind < 3:
+            relative = os.path.join(project, "Controllers", f"Area{i:05d}Controller.cs")
+            text = _csharp_controller(f"Area{i:05d}", rng.randint(3, 12), rng)
+        elif kind == 3:
+            relative = os.path.join(project, "wwwroot", "js", f"module{i:05d}.js")
+            text = _javascript_module(f"handle{i:05d}_", rng.randint(3, 12), rng)
+        else:
+            relative = os.path.join(project, "Views", f"Area{i - 2:05d}", "Index.cshtml")
+            text = _razor_view(f"Area{i - 2:05d}", rng)
+        path = os.path.join(code_dir, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8", newline="\n") as f:
+            f.write(text)
+        projects.setdefault(project, []).append(relative.replace(os.sep, "/"))
+    return projects
+
+
+# --- Tickets ---
+
+def generate_tickets(db_path: str, count: int, seed: int) -> None:
+    # The server's own generator, with the corpus topics so ticket topics match the wiki titles
+    from generate_db import generate_tickets as generate_ticket_db
+    generate_ticket_db(db_path, count, seed=seed, topics=TOPICS, reset=True)
+
+
+# --- Corpus ---
+
+def generate_corpus(root: str, pdfs: int = 20, pages: int = 10, code_files: int = 200, tickets: int = 10000,
+                    files_per_project: int = 50, seed: int = 42) -> Dict[str, Any]:
+    """
+    Generates (or reuses, when the parameters match) a synthetic corpus under `root`.
+
+    Returns:
+        The corpus manifest: its parameters plus the directories, wiki names and code files to draw inputs from.
+    """
+    params = {"version": CORPUS_VERSION, "pdfs": pdfs, "pages": pages, "code_files": code_files,
+              "tickets": tickets, "files_per_project": files_per_project, "seed": seed}
+    manifest_path = os.path.join(root, "corpus.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("params") == params:
+            return manifest
+
+    rng = random.Random(seed)
+    os.makedirs(root, exist_ok=True)
+    wiki_dir = os.path.join(root, "Wikis")
+    code_dir = os.path.join(root, "CodeBase")
+    db_path = os.path.join(root, "ticket_topics.db")
+    for directory in (wiki_dir, code_dir):
+        if os.path.isdir(directory):
+            shutil.rmtree(directory)
+
+    manifest = {
+        "params": params,
+        "wiki_dir": wiki_dir,
+        "code_dir": code_dir,
+        "db_path": db_path,
+        "topics": TOPICS,
+        "wikis": generate_wikis(wiki_dir, pdfs, pages, rng),
+        "projects": generate_code(code_dir, code_files, files_per_project, rng),
+    }
+    generate_tickets(db_path, tickets, seed)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
@@ -0,0 +1,378 @@
+"""
+Benchmarks the AdsDiagnosticsServer tools and prompts against a synthetic corpus.
+
+Every case is run in-process (through FastMCP's call_tool/get_prompt, i.e. argument validation and
+result serialization included) and/or over the stdio transport against a `server.py` subprocess.
+Inputs are drawn from a seeded RNG, so runs with the same parameters are comparable.
+
+Usage:
+    python benchmarks/run_benchmarks.py --pdfs 20 --code-files 200 --tickets 10000 --save-baseline local
+    python benchmarks/run_benchmarks.py --compare local
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import platform
+import resource
+import argparse
+import subprocess
+from typing import Any, Callable, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+BASELINE_DIR = os.path.join(BENCH_DIR, "baselines")
+sys.path.insert(0, REPO_ROOT)
+
+from corpus import generate_corpus
+
+
+# --- Cases ---
+
+def _problem(rng: random.Random, corpus: Dict[str, Any]) -> str:
+    return f"Advertiser reports {rng.choice(corpus['topics']).lower()} issues since yesterday"
+
+
+def _ticket_id(rng: random.Random, corpus: Dict[str, Any]) -> int:
+    # ~5% of the lookups miss, like tickets that were never classified
+    return rng.randint(1, max(1, int(corpus["params"]["tickets"] * 1.05)))
+
+
+def _code_file(rng: random.Random, corpus: Dict[str, Any]) -> str:
+    project = rng.choice(sorted(corpus["projects"]))
+    return os.path.join(corpus["code_dir"], rng.choice(corpus["projects"][project]))
+
+
+def _wiki_pages(rng: random.Random, corpus: Dict[str, Any]) -> Dict[str, Any]:
+    start = rng.randint(1, corpus["params"]["pages"])
+    return {"pdf_filename": rng.choice(corpus["wikis"]), "start_page": start,
+            "end_page": min(start + 1, corpus["params"]["pages"])}
+
+
+# (name, "tool" | "prompt", target, argument factory)
+CASES = [
+    ("extract_text_from_wiki_pdf[pages]", "tool", "extract_text_from_wiki_pdf", _wiki_pages),
+    ("extract_text_from_wiki_pdf[document]", "tool", "extract_text_from_wiki_pdf",
+     lambda rng, c: {"pdf_filename": rng.choice(c["wikis"])}),
+    ("search_wikis", "tool", "search_wikis",
+     lambda rng, c: {"topic": rng.choice(c["topics"]), "max_results": 5}),
+    ("list_code_files_in_project_directory", "tool", "list_code_files_in_project_directory",
+     lambda rng, c: {"project_subfolder": rng.choice(sorted(c["projects"])), "file_extension": ".cs,.js"}),
+    ("read_code_file_content[file]", "tool", "read_code_file_content",
+     lambda rng, c: {"file_path": _code_file(rng, c)}),
+    ("read_code_file_content[range]", "tool", "read_code_file_content",
+     lambda rng, c: {"file_path": _code_file(rng, c), "start_line": 10, "end_line": 40}),
+    ("get_topic", "tool", "get_topic", lambda rng, c: {"ticket_id": _ticket_id(rng, c)}),
+    ("generate_wiki_diagnostic_prompt", "prompt", "generate_wiki_diagnostic_prompt",
+     lambda rng, c: {"ticket_id": str(_ticket_id(rng, c))}),
+    ("generate_code_analysis_prompt", "prompt", "generate_code_analysis_prompt",
+     lambda rng, c: {"ticket_id": str(_ticket_id(rng, c)), "problem_description": _problem(rng, c),
+                     "project_subfolder": rng.choice(sorted(c["projects"]))}),
+    ("generate_data_investigation_prompt", "prompt", "generate_data_investigation_prompt",
+     lambda rng, c: {"ticket_id": str(_ticket_id(rng, c)), "problem_description": _problem(rng, c)}),
+    ("ads_comprehensive_diagnostic_prompt", "prompt", "ads_comprehensive_diagnostic_prompt",
+     lambda rng, c: {"ticket_id": str(_ticket_id(rng, c))}),
+]
+
+
+def build_inputs(corpus: Dict[str, Any], calls: int, seed: int, only: List[str] = None) -> List[Dict[str, Any]]:
+    """
+    Draws the argument sequence of every selected case up front, so both modes replay identical inputs.
+    """
+    selected = []
+    for name, kind, target, make_args in CASES:
+        if only and not any(pattern in name for pattern in only):
+            continue
+        rng = random.Random(f"{seed}:{name}")
+        selected.append({"name": name, "kind": kind, "target": target,
+                         "inputs": [make_args(rng, corpus) for _ in range(calls)]})
+    return selected
+
+
+# --- Measurement ---
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def summarize(first: float, latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        "calls": len(latencies),
+        "errors": errors,
+        "first_ms": round(first * 1000, 3),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50_ms": round(_percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(_percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(_percentile(ordered, 0.99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+        "throughput_per_s": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def _is_error(contents: Any) -> bool:
+    for content in contents or ():
+        text = getattr(content, "text", "") or ""
+        if text.startswith("{") and '"error"' in text:
+            try:
+                return "error" in json.loads(text)
+            except ValueError:
+                return False
+    return False
+
+
+async def run_cases(cases: List[Dict[str, Any]], call: Callable, warmup: int) -> Dict[str, Any]:
+    """
+    Runs every case: the first call is reported separately (cold caches), then `warmup` unmeasured calls,
+    then the measured ones.
+    """
+    results = {}
+    for case in cases:
+        inputs = case["inputs"]
+        errors = 0
+        started = time.perf_counter()
+        errors += await call(case, inputs[0])
+        first = time.perf_counter() - started
+        for args in inputs[1:warmup + 1]:
+            await call(case, args)
+
+        latencies = []
+        measured_started = time.perf_counter()
+        for args in inputs[warmup + 1:]:
+            started = time.perf_counter()
+            errors += await call(case, args)
+            latencies.append(time.perf_counter() - started)
+        results[case["name"]] = summarize(first, latencies, errors, time.perf_counter() - measured_started)
+        print(f"  {case['name']:<42} p50 {results[case['name']]['p50_ms']:>9.3f} ms   "
+              f"p99 {results[case['name']]['p99_ms']:>9.3f} ms   {results[case['name']]['throughput_per_s']:>9.1f}/s",
+              file=sys.stderr)
+    return results
+
+
+def _peak_rss_mb(who: int) -> float:
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1) # bytes on macOS, KiB on Linux
+
+
+async def run_in_process(cases: List[Dict[str, Any]], warmup: int) -> Dict[str, Any]:
+    import server # Imported here, after corpus_environment() pointed the server at the corpus
+
+    async def call(case, args) -> int:
+        try:
+            if case["kind"] == "tool":
+                return int(_is_error(await server.mcp.call_tool(case["target"], args)))
+            await server.mcp.get_prompt(case["target"], args)
+            return 0
+        except Exception:
+            return 1
+
+    results = await run_cases(cases, call, warmup)
+    return {"cases": results, "peak_rss_mb": _peak_rss_mb(resource.RUSAGE_SELF)}
+
+
+async def run_stdio(cases: List[Dict[str, Any]], warmup: int, env: Dict[str, str]) -> Dict[str, Any]:
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+
+    params = StdioServerParameters(command=sys.executable, args=[os.path.join(REPO_ROOT, "server.py")],
+                                   env={**os.environ, **env}, cwd=REPO_ROOT)
+    async with stdio_client(params, errlog=open(os.devnull, "w")) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+
+            async def call(case, args) -> int:
+                try:
+                    if case["kind"] == "tool":
+                        result = await session.call_tool(case["target"], args)
+                        return int(result.isError or _is_error(result.content))
+                    await session.get_prompt(case["target"], args)
+                    return 0
+                except Exception:
+                    return 1
+
+            results = await run_cases(cases, call, warmup)
+    # The server process has been reaped by now, so its high-water mark is in the children's usage
+    return {"cases": results, "peak_rss_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN)}
+
+
+async def measure_startup(env: Dict[str, str], runs: int) -> Dict[str, Any]:
+    """
+    Spawns fresh stdio servers and times, from the client side, the initialize handshake and the first
+    tool response (a get_topic call); the server's own breakdown comes from the metrics://startup resource.
+    """
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+
+    params = StdioServerParameters(command=sys.executable, args=[os.path.join(REPO_ROOT, "server.py")],
+                                   env={**os.environ, **env}, cwd=REPO_ROOT)
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        async with stdio_client(params, errlog=open(os.devnull, "w")) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                initialized = time.perf_counter()
+                await session.call_tool("get_topic", {"ticket_id": 1})
+                responded = time.perf_counter()
+                profile = json.loads((await session.read_resource("metrics://startup")).contents[0].text)
+        samples.append({"initialize_ms": (initialized - started) * 1000, "first_tool_response_ms": (responded - started) * 1000,
+                        "server": profile})
+    middle = sorted(samples, key=lambda sample: sample["first_tool_response_ms"])[len(samples) // 2]
+    return {"runs": runs, "initialize_ms": round(middle["initialize_ms"], 1),
+            "first_tool_response_ms": round(middle["first_tool_response_ms"], 1), "server": middle["server"]}
+
+
+# --- Baselines ---
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def save_baseline(name: str, report: Dict[str, Any]) -> str:
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    path = os.path.join(BASELINE_DIR, f"{name}.json")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+    return path
+
+
+def compare(baseline: Dict[str, Any], report: Dict[str, Any], threshold: float, min_delta_ms: float) -> List[str]:
+    """
+    Prints the per-case differences against a baseline and returns the regressions.
+
+    A latency metric regresses when it grew by more than `threshold` (relative) and `min_delta_ms`
+    (absolute, to ignore noise on sub-millisecond calls); throughput when it dropped by more than `threshold`.
+    """
+    if baseline.get("corpus") != report.get("corpus"):
+        print("warning: the baseline was recorded on a different corpus; differences are not comparable", file=sys.stderr)
+    regressions = []
+    for mode, current in report["modes"].items():
+        previous = baseline.get("modes", {}).get(mode)
+        if previous is None:
+            continue
+        print(f"\n[{mode}] vs baseline {baseline.get('meta', {}).get('revision', '')}")
+        print(f"  {'case':<42} {'metric':<17} {'baseline':>11} {'current':>11} {'change':>8}")
+        rows = [(name, metric, previous["cases"].get(name, {}).get(metric), stats[metric])
+                for name, stats in current["cases"].items()
+                for metric in ("p50_ms", "p95_ms", "p99_ms", "throughput_per_s")]
+        rows.append(("(process)", "peak_rss_mb", previous.get("peak_rss_mb"), current["peak_rss_mb"]))
+        if "startup" in current and "startup" in previous:
+            rows.append(("(startup)", "first_tool_response_ms", previous["startup"]["first_tool_response_ms"],
+                         current["startup"]["first_tool_response_ms"]))
+        for name, metric, old, new in rows:
+            if old is None:
+                continue
+            change = (new - old) / old if old else 0.0
+            if metric == "throughput_per_s":
+                regressed = change < -threshold
+            elif metric in ("peak_rss_mb", "first_tool_response_ms"):
+                regressed = change > threshold
+            else:
+                regressed = change > threshold and new - old > min_delta_ms
+            flag = "  REGRESSION" if regressed else ""
+            print(f"  {name:<42} {metric:<17} {old:>11} {new:>11} {change:>+7.1%}{flag}")
+            if regressed:
+                regressions.append(f"{mode}: {name} {metric} {old} -> {new} ({change:+.1%})")
+    return regressions
+
+
+# --- Main ---
+
+def corpus_environment(corpus: Dict[str, Any], cache_dir: str) -> Dict[str, str]:
+    return {
+        "MCP_WIKI_DIR": corpus["wiki_dir"],
+        "MCP_CODEBASE_DIR": corpus["code_dir"],
+        "TICKET_DB_PATH": corpus["db_path"],
+        "MCP_CACHE_DIR": cache_dir,
+        "RESOURCE_WATCH_INTERVAL": "0",
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the AdsDiagnosticsServer tools on a synthetic corpus.")
+    parser.add_argument("--pdfs", type=int, default=20, help="Number of wiki PDFs (N).")
+    parser.add_argument("--pages", type=int, default=10, help="Pages per wiki PDF.")
+    parser.add_argument("--code-files", type=int, default=200, help="Number of code files (M).")
+    parser.add_argument("--tickets", type=int, default=10000, help="Number of tickets (K).")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--iterations", type=int, default=200, help="Measured calls per case.")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured calls per case after the first one.")
+    parser.add_argument("--mode", choices=["in-process", "stdio", "both"], default="both")
+    parser.add_argument("--startup-runs", type=int, default=3,
+                        help="Fresh stdio servers spawned to time startup and the first tool response (0 to skip).")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="Run the servers with the warm-state snapshot enabled (MCP_WARM_SNAPSHOT).")
+    parser.add_argument("--cases", nargs="*", help="Only run the cases whose name contains one of these strings.")
+    parser.add_argument("--corpus-dir", default=os.path.join(REPO_ROOT, ".cache", "bench_corpus"),
+                        help="Where the corpus is generated (reused while the parameters match).")
+    parser.add_argument("--warm-cache", action="store_true",
+                        help="Keep the server's on-disk caches from earlier runs instead of starting cold.")
+    parser.add_argument("--output", help="Also write the report to this JSON file.")
+    parser.add_argument("--save-baseline", metavar="NAME", help="Save the report as benchmarks/baselines/NAME.json.")
+    parser.add_argument("--compare", metavar="NAME", help="Diff the report against benchmarks/baselines/NAME.json.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Relative change counted as a regression.")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="Ignore latency regressions smaller than this.")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    corpus = generate_corpus(args.corpus_dir, pdfs=args.pdfs, pages=args.pages, code_files=args.code_files,
+                             tickets=args.tickets, seed=args.seed)
+    print(f"Corpus ready in {time.perf_counter() - started:.1f}s: {args.corpus_dir}", file=sys.stderr)
+    cases = build_inputs(corpus, args.iterations + args.warmup + 1, args.seed, args.cases)
+
+    report = {
+        "meta": {"revision": _git_revision(), "python": platform.python_version(), "platform": platform.platform(),
+                 "cpus": os.cpu_count(), "iterations": args.iterations, "warmup": args.warmup,
+                 "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "corpus": corpus["params"],
+        "modes": {},
+    }
+    modes = ["stdio", "in-process"] if args.mode == "both" else [args.mode]
+    for mode in modes: # stdio first: the in-process run loads the server into this process for good
+        cache_dir = os.path.join(args.corpus_dir, f"cache-{mode}")
+        if not args.warm_cache and os.path.isdir(cache_dir):
+            shutil.rmtree(cache_dir)
+        env = corpus_environment(corpus, cache_dir)
+        if args.snapshot:
+            env["MCP_WARM_SNAPSHOT"] = os.path.join(cache_dir, "warm_state.snapshot")
+        print(f"[{mode}]", file=sys.stderr)
+        if mode == "stdio":
+            if args.startup_runs:
+                startup = asyncio.run(measure_startup(env, args.startup_runs))
+                print(f"  startup: initialize {startup['initialize_ms']} ms, first tool response "
+                      f"{startup['first_tool_response_ms']} ms (median of {args.startup_runs})", file=sys.stderr)
+            report["modes"][mode] = asyncio.run(run_stdio(cases, args.warmup, env))
+            if args.startup_runs:
+                report["modes"][mode]["startup"] = startup
+        else:
+            os.environ.update(env)
+            report["modes"][mode] = asyncio.run(run_in_process(cases, args.warmup))
+        print(f"  peak RSS {report['modes'][mode]['peak_rss_mb']} MB", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if args.save_baseline:
+        print(f"Baseline saved: {save_baseline(args.save_baseline, report)}", file=sys.stderr)
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f"{args.compare}.json"), "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s):", *regressions, sep="\n  ")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,347 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import threading
+import logging
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote
+
+from http_client import BackendClient
+from wiki_cache import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+DOWNLOAD_DIR = os.environ.get("CLOUD_LOG_DIR", os.path.join(CACHE_DIR, "cloud_logs"))
+
+
+def request_file_stem(customer_request_id: str) -> str:
+    """
+    File name stem for a customer request's log and claim files: a readable, sanitized prefix plus a
+    hash of the raw ID, so IDs that sanitize alike (e.g. "req/1" and "req_1") never share a file.
+    """
+    safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in customer_request_id)[:64]
+    return f"{safe_name}-{hashlib.sha256(customer_request_id.encode('utf-8')).hexdigest()[:16]}"
+
+
+class CloudLogJob:
+    """
+    State of one cloud-log download. Counters are updated in place as chunks land,
+    so a status poll is just a dictionary lookup plus `to_dict()`.
+    """
+
+    def __init__(self, job_id: str, customer_request_id: str, target_path: str):
+        self.job_id = job_id
+        self.customer_request_id = customer_request_id
+        self.target_path = target_path
+        self.status = "queued"
+        self.total_bytes: Optional[int] = None
+        self.bytes_done = 0
+        self.bytes_this_run = 0 # Excludes bytes resumed from an earlier attempt, for the rate
+        self.resumed_bytes = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = ((self.finished_at or time.time()) - self.started_at) if self.started_at else 0.0
+        return {
+            "job_id": self.job_id,
+            "customer_request_id": self.customer_request_id,
+            "status": self.status,
+            "bytes_done": self.bytes_done,
+            "total_bytes": self.total_bytes,
+            "progress": round(self.bytes_done / self.total_bytes, 4) if self.total_bytes else None,
+            "resumed_bytes": self.resumed_bytes,
+            "bytes_per_sec": round(self.bytes_this_run / elapsed, 1) if elapsed > 0 else 0.0,
+            "elapsed_seconds": round(elapsed, 3),
+            "file_path": self.target_path if self.status == "completed" else None,
+            "error": self.error,
+        }
+
+
+class CloudLogJobManager:
+    """
+    Runs cloud-log downloads in the background on a bounded pool of asyncio workers.
+
+    Each file is fetched as fixed-size HTTP Range chunks, several at a time, written at their
+    offsets into a `.part` file. Finished chunk indices are recorded in a `.part.json` sidecar,
+    so a failed or interrupted download resumes where it left off instead of starting over.
+    """
+
+    def __init__(self, download_dir: str = DOWNLOAD_DIR, max_jobs: int = 2, parallel_chunks: int = 4,
+                 chunk_size: int = 4 * 1024 * 1024, finished_ttl: float = 3600.0):
+        self.download_dir = download_dir
+        self.jobs_dir = os.path.join(download_dir, "jobs") # Job snapshots, so any server worker can answer a status poll
+        self.max_jobs = max_jobs
+        self.parallel_chunks = parallel_chunks
+        self.chunk_size = chunk_size
+        self.finished_ttl = finished_ttl # Finished jobs are dropped from memory after this; status() then reads their snapshot
+        self.jobs: Dict[str, CloudLogJob] = {}
+        self._active_by_request: Dict[str, str] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_workers(self, backend: BackendClient) -> None:
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._workers = [asyncio.ensure_future(self._worker(backend)) for _ in range(self.max_jobs)]
+
+    async def _worker(self, backend: BackendClient) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._download(backend, job)
+                job.status = "completed"
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+                logger.warning("Cloud log download %s failed: %s", job.job_id, e)
+            finally:
+                job.finished_at = time.time()
+                self._active_by_request.pop(job.customer_request_id, None)
+                await asyncio.to_thread(self._persist, job)
+                self._release_claim(job)
+                self._queue.task_done()
+
+    def _persist(self, job: CloudLogJob) -> None:
+        try:
+            os.makedirs(self.jobs_dir, exist_ok=True)
+            path = os.path.join(self.jobs_dir, f"{job.job_id}.json")
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(job.to_dict(), f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.debug("Could not persist cloud log job %s: %s", job.job_id, e)
+
+    # --- cross-process claims ---
+
+    def _claim_path(self, customer_request_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{request_file_stem(customer_request_id)}.claim")
+
+    def _claim(self, customer_request_id: str, job_id: str) -> Optional[str]:
+        """
+        Claims a customer request for this process by exclusively creating its claim file under jobs_dir,
+        so two server workers never download the same `.log.part` at once. A claim whose process is gone,
+        or whose job already finished, is stale and taken over.
+
+        Returns:
+            None when the claim was taken, or the job ID of the live download that already holds it.
+        """
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        path = self._claim_path(customer_request_id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"job_id": job_id, "pid": os.getpid()}, f)
+        try:
+            for _ in range(3):
+                try:
+                    os.link(tmp_path, path) # Atomic and exclusive (like O_EXCL), and the claim is complete once visible
+                    return None
+                except FileExistsError:
+                    pass
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        raw = f.read()
+                    owner = json.loads(raw)
+                    if self._claim_is_live(owner):
+                        return owner["job_id"]
+                except OSError:
+                    continue # Released in the meantime
+                except (ValueError, KeyError):
+                    pass # Not a claim this code wrote
+                self._remove_claim(path, raw) # Its owner exited without releasing it
+        finally:
+            os.remove(tmp_path)
+        raise RuntimeError(f"Could not claim the cloud log download of '{customer_request_id}'.")
+
+    def _claim_is_live(self, owner: Dict[str, Any]) -> bool:
+        try:
+            os.kill(owner["pid"], 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass # Alive, but owned by another user
+        snapshot = self.status(owner["job_id"])
+        return snapshot is None or snapshot.get("status") in ("queued", "running")
+
+    @staticmethod
+    def _remove_claim(path: str, expected: str) -> None:
+        # Only remove the claim we inspected, not one another worker took in the meantime
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                if f.read() != expected:
+                    return
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _release_claim(self, job: CloudLogJob) -> None:
+        path = self._claim_path(job.customer_request_id)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                raw = f.read()
+            if json.loads(raw).get("job_id") == job.job_id:
+                self._remove_claim(path, raw)
+        except (OSError, ValueError):
+            pass
+
+    # --- download ---
+
+    def _load_progress(self, sidecar_path: str, total_bytes: int, etag: Optional[str]) -> set:
+        try:
+            with open(sidecar_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state["total_bytes"] == total_bytes and state["chunk_size"] == self.chunk_size and state.get("etag") == etag:
+                return set(state["done"])
+        except (OSError, ValueError, KeyError):
+            pass
+        return set()
+
+    def _save_progress(self, sidecar_path: str, total_bytes: int, etag: Optional[str], done: List[int]) -> None:
+        tmp_path = sidecar_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"total_bytes": total_bytes, "chunk_size": self.chunk_size, "etag": etag, "done": done}, f)
+        os.replace(tmp_path, sidecar_path)
+
+    def _open_part(self, part_path: str, sidecar_path: str, total_bytes: int, etag: Optional[str]) -> set:
+        # Returns the chunks already downloaded, or sizes a fresh `.part` file when there is nothing to resume
+        done = self._load_progress(sidecar_path, total_bytes, etag) if os.path.exists(part_path) else set()
+        if not done:
+            with open(part_path, 'wb') as f:
+                f.truncate(total_bytes)
+        return done
+
+    def _checkpoint(self, job: CloudLogJob, sidecar_path: str, total_bytes: int, etag: Optional[str], done: List[int]) -> None:
+        self._save_progress(sidecar_path, total_bytes, etag, done)
+        self._persist(job)
+
+    @staticmethod
+    def _finish_part(part_path: str, sidecar_path: str, target_path: str) -> None:
+        os.replace(part_path, target_path)
+        if os.path.exists(sidecar_path):
+            os.remove(sidecar_path)
+
+    async def _download(self, backend: BackendClient, job: CloudLogJob) -> None:
+        # The file I/O runs on worker threads (asyncio.to_thread), so a slow disk doesn't stall the event loop
+        job.status = "running"
+        job.started_at = time.time()
+        await asyncio.to_thread(self._persist, job)
+        path = f"/cloud-logs/{quote(job.customer_request_id, safe='')}"
+
+        head = await backend.request("HEAD", path)
+        content_length = head.headers.get("Content-Length")
+        if content_length is None or not content_length.isdigit():
+            # Without the size there is nothing to split into Range chunks; don't save an empty file as "completed"
+            raise RuntimeError("The log service did not report the size of the log (no Content-Length on HEAD).")
+        total_bytes = int(content_length)
+        etag = head.headers.get("ETag")
+        job.total_bytes = total_bytes
+
+        part_path = job.target_path + ".part"
+        sidecar_path = part_path + ".json"
+        done = await asyncio.to_thread(self._open_part, part_path, sidecar_path, total_bytes, etag)
+
+        n_chunks = (total_bytes + self.chunk_size - 1) // self.chunk_size
+        job.resumed_bytes = sum(min(self.chunk_size, total_bytes - i * self.chunk_size) for i in done)
+        job.bytes_done = job.resumed_bytes
+
+        fd = os.open(part_path, os.O_WRONLY)
+        checkpoint_lock = asyncio.Lock() # One sidecar/snapshot write at a time, each newer than the last
+        try:
+            pending = iter([i for i in range(n_chunks) if i not in done])
+
+            async def fetch_chunks() -> None:
+                for index in pending:
+                    start = index * self.chunk_size
+                    end = min(start + self.chunk_size, total_bytes) - 1
+                    response = await backend.request("GET", path, headers={"Range": f"bytes={start}-{end}"})
+                    if response.status_code != 206 and not (start == 0 and end == total_bytes - 1):
+                        raise RuntimeError(f"Server ignored the Range request (HTTP {response.status_code}).")
+                    data = response.content
+                    if len(data) != end - start + 1:
+                        raise RuntimeError(f"Short read for bytes {start}-{end}: got {len(data)} bytes.")
+                    await asyncio.to_thread(os.pwrite, fd, data, start)
+                    done.add(index)
+                    job.bytes_done += len(data)
+                    job.bytes_this_run += len(data)
+                    async with checkpoint_lock:
+                        await asyncio.to_thread(self._checkpoint, job, sidecar_path, total_bytes, etag, sorted(done))
+
+            # A fixed number of fetchers share one iterator of pending chunks
+            await asyncio.gather(*(fetch_chunks() for _ in range(min(self.parallel_chunks, max(n_chunks, 1)))))
+        finally:
+            os.close(fd)
+
+        await asyncio.to_thread(self._finish_part, part_path, sidecar_path, job.target_path)
+
+    # --- public API ---
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.finished_ttl
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.finished_at and job.finished_at < cutoff]:
+            del self.jobs[job_id]
+
+    def _prepare(self, customer_request_id: str, job_id: str) -> Optional[Dict[str, Any]]:
+        # The file work of start(), run on a worker thread
+        owner = self._claim(customer_request_id, job_id)
+        if owner is not None:
+            snapshot = self.status(owner) or {}
+            return {"job_id": owner, "status": snapshot.get("status", "queued")}
+        os.makedirs(self.download_dir, exist_ok=True)
+        return None
+
+    async def start(self, backend: BackendClient, customer_request_id: str) -> Dict[str, Any]:
+        """
+        Queues a download for a customer request, or returns the job already running for it in this or
+        another server worker (see _claim).
+
+        The claim and snapshot file writes run on a worker thread, and the download itself on the worker pool.
+
+        Returns:
+            The job's 'job_id' and 'status'.
+        """
+        self._prune()
+        active = self._active_by_request.get(customer_request_id)
+        if active is not None:
+            return {"job_id": active, "status": self.jobs[active].status}
+
+        job_id = uuid.uuid4().hex[:12]
+        existing = await asyncio.to_thread(self._prepare, customer_request_id, job_id)
+        if existing is not None:
+            return existing
+
+        self._ensure_workers(backend)
+        target_path = os.path.join(self.download_dir, f"{request_file_stem(customer_request_id)}.log")
+        job = CloudLogJob(job_id, customer_request_id, target_path)
+        self.jobs[job.job_id] = job
+        self._active_by_request[customer_request_id] = job.job_id
+        await asyncio.to_thread(self._persist, job) # Before queueing, so this "queued" snapshot never lands after "running"
+        self._queue.put_nowait(job)
+        return {"job_id": job.job_id, "status": job.status}
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the live state of a job started by this process, or else the last snapshot
+        persisted by whichever server worker runs it.
+        """
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if not all(c.isalnum() for c in job_id):
+            return None
+        try:
+            with open(os.path.join(self.jobs_dir, f"{job_id}.json"), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+
+# Shared instance used by the server tools
+cloud_log_jobs = CloudLogJobManager()
@@ -0,0 +1,578 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict, Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from wiki_cache import CACHE_DIR
+from code_index import CodeFileIndex, code_file_index
+from csharp_symbols import parse_csharp
+
+
+ENGINE_VERSION = 2 # Bump when rules change so cached results are recomputed
+
+LANGUAGE_ALIASES = {"csharp": "csharp", "cs": "csharp", "c#": "csharp", "javascript": "javascript", "js": "javascript"}
+EXTENSIONS = {".cs": "csharp", ".js": "javascript"}
+
+CS_TOKEN_RE = re.compile(r"""
+    (?P<newline>\n)
+  | (?P<space>[ \t\r\f\v\ufeff]+)
+  | (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<string>\$?@"(?:[^"]|"")*"|@\$"(?:[^"]|"")*"|\$?"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])+')
+  | (?P<number>\d[\w.]*)
+  | (?P<ident>@?[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<op>&&|\|\||\?\?=?|\?\.|=>|==|!=|<=|>=|\+\+|--|[-+*/%&|^!=<>]=?)
+  | (?P<punct>[{}()\[\];,.:?~])
+  | (?P<other>.)
+""", re.S | re.X)
+JS_TOKEN_RE = re.compile(r"""
+    (?P<newline>\n)
+  | (?P<space>[ \t\r\f\v\ufeff]+)
+  | (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`)
+  | (?P<number>\d[\w.]*|\.\d\w*)
+  | (?P<ident>[A-Za-z_$][A-Za-z0-9_$]*)
+  | (?P<op>===|!==|\*\*=?|\.\.\.|&&=?|\|\|=?|\?\?=?|\?\.|=>|==|!=|<=|>=|\+\+|--|[-+*/%&|^!=<>]=?)
+  | (?P<punct>[{}()\[\];,.:?~])
+  | (?P<other>.)
+""", re.S | re.X)
+JS_REGEX_RE = re.compile(r"/(?![*/])(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n\[])+/[a-z]*")
+JS_REGEX_AFTER_WORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw", "yield", "await"}
+
+DECISION_KEYWORDS = {"if", "for", "foreach", "while", "case", "catch", "when"}
+DECISION_OPS = {"&&", "||", "??"}
+CONTROL_KEYWORDS = {"if", "for", "foreach", "while", "switch", "catch", "with", "using", "lock", "fixed"}
+ACCESSOR_KEYWORDS = {"get", "set", "init", "add", "remove"} # Property/event accessors, e.g. { get; private set; }
+CLOSERS = {")": "(", "]": "[", "}": "{"}
+
+LONG_FUNCTION_LINES = 80
+COMPLEX_FUNCTION = 10
+SECRET_RE = re.compile(r"(password|pwd|accountkey|sharedaccesskey|apikey|api_key|secret)\s*=", re.IGNORECASE)
+
+
+def normalize_language(language: str) -> Optional[str]:
+    return LANGUAGE_ALIASES.get((language or "").strip().lower())
+
+
+def tokenize(source: str, language: str) -> List[Tuple[str, str, int]]:
+    """
+    Splits C# or JavaScript source into (kind, value, line) tokens, dropping whitespace and comments.
+    JavaScript regex literals are recognised from the preceding token, so braces inside them don't count.
+    """
+    pattern = JS_TOKEN_RE if language == "javascript" else CS_TOKEN_RE
+    tokens: List[Tuple[str, str, int]] = []
+    pos, line, n = 0, 1, len(source)
+    while pos < n:
+        if language == "javascript" and source[pos] == "/":
+            prev = tokens[-1] if tokens else None
+            if prev is None or prev[0] in ("op", "punct") and prev[1] not in (")", "]", "}") or \
+                    prev[0] == "ident" and prev[1] in JS_REGEX_AFTER_WORDS:
+                m = JS_REGEX_RE.match(source, pos)
+                if m:
+                    tokens.append(("regex", m.group(), line))
+                    pos = m.end()
+                    continue
+        m = pattern.match(source, pos)
+        kind, value = m.lastgroup, m.group()
+        pos = m.end()
+        if kind == "newline":
+            line += 1
+            continue
+        if kind not in ("space", "comment"):
+            tokens.append((kind, value, line))
+        line += value.count("\n")
+    return tokens
+
+
+def _is_ternary(tokens: List[Tuple[str, str, int]], i: int) -> bool:
+    # A '?' is a conditional operator (not a nullable type) if a ':' follows before the statement ends
+    depth = 0
+    for kind, value, _ in tokens[i + 1:i + 200]:
+        if value in ("(", "[", "{"):
+            depth += 1
+        elif value in (")", "]", "}"):
+            if depth == 0:
+                return False
+            depth -= 1
+        elif value == ";" and depth == 0:
+            return False
+        elif value == ":" and depth == 0:
+            return True
+    return False
+
+
+def _check_structure(tokens: List[Tuple[str, str, int]]) -> Dict[str, Any]:
+    stack: List[Tuple[str, int]] = []
+    errors = []
+    max_depth = 0
+    for kind, value, line in tokens:
+        if kind not in ("punct",):
+            continue
+        if value in ("(", "[", "{"):
+            stack.append((value, line))
+            if value == "{":
+                max_depth = max(max_depth, sum(1 for v, _ in stack if v == "{"))
+        elif value in CLOSERS:
+            if stack and stack[-1][0] == CLOSERS[value]:
+                stack.pop()
+            elif stack:
+                opener, opened_at = stack[-1]
+                errors.append({"line": line, "message": f"Unexpected '{value}', '{opener}' opened at line {opened_at} is still open."})
+                if any(v == CLOSERS[value] for v, _ in stack):
+                    while stack and stack[-1][0] != CLOSERS[value]:
+                        stack.pop()
+                    stack.pop()
+            else:
+                errors.append({"line": line, "message": f"Unmatched '{value}'."})
+    for opener, opened_at in stack:
+        errors.append({"line": opened_at, "message": f"'{opener}' is never closed."})
+    return {"balanced": not errors, "max_brace_depth": max_depth, "errors": errors[:20]}
+
+
+def _csharp_functions(source: str, tokens: List[Tuple[str, str, int]]) -> List[Dict[str, Any]]:
+    functions = []
+    for symbol in parse_csharp(source):
+        # Properties only count when they have a multi-line accessor body
+        if symbol["kind"] in ("method", "constructor", "action") or \
+                symbol["kind"] == "property" and symbol["end_line"] > symbol["start_line"]:
+            functions.append({"name": ".".join(filter(None, [symbol.get("container"), symbol["name"]])),
+                              "kind": symbol["kind"], "start_line": symbol["start_line"], "end_line": symbol["end_line"],
+                              "complexity": 1})
+    # Attribute each decision point to the innermost member containing its line
+    by_size = sorted(functions, key=lambda f: f["end_line"] - f["start_line"])
+    for i, (kind, value, line) in enumerate(tokens):
+        if kind == "ident" and value in DECISION_KEYWORDS or kind == "op" and value in DECISION_OPS or \
+                value == "?" and kind == "punct" and _is_ternary(tokens, i):
+            for function in by_size:
+                if function["start_line"] <= line <= function["end_line"]:
+                    function["complexity"] += 1
+                    break
+    return functions
+
+
+def _matching_open(tokens: List[Tuple[str, str, int]], close_index: int) -> int:
+    depth = 0
+    for j in range(close_index, -1, -1):
+        if tokens[j][1] == ")":
+            depth += 1
+        elif tokens[j][1] == "(":
+            depth -= 1
+            if depth == 0:
+                return j
+    return -1
+
+
+def _assigned_name(tokens: List[Tuple[str, str, int]], j: int) -> Optional[str]:
+    # `name = function(...)`, `obj.name = (...) =>`, `name: function(...)`
+    if j >= 1 and tokens[j][1] in ("=", ":") and tokens[j - 1][0] == "ident":
+        return tokens[j - 1][1]
+    return None
+
+
+def _javascript_functions(tokens: List[Tuple[str, str, int]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Finds functions, methods and block-bodied arrow functions, with their complexity, and the
+    variables declared inside functions that are never used again.
+    """
+    functions: List[Dict[str, Any]] = []
+    stack: List[Optional[Dict[str, Any]]] = []
+    declared: List[Tuple[str, str, int]] = []
+    for i, (kind, value, line) in enumerate(tokens):
+        if value == "{" and kind == "punct":
+            function = None
+            prev = tokens[i - 1] if i else None
+            if prev is not None and prev[1] == ")":
+                j = _matching_open(tokens, i - 1)
+                before = tokens[j - 1] if j >= 1 else None
+                if before is not None and before[0] == "ident":
+                    if before[1] == "function":
+                        function = {"name": _assigned_name(tokens, j - 2) or "<anonymous>", "start_line": before[2]}
+                    elif j >= 2 and tokens[j - 2][1] == "function":
+                        function = {"name": before[1], "start_line": tokens[j - 2][2]}
+                    elif before[1] not in CONTROL_KEYWORDS:
+                        function = {"name": before[1], "start_line": before[2]} # Class / object method shorthand
+            elif prev is not None and prev[1] == "=>" and i >= 2:
+                k = _matching_open(tokens, i - 2) if tokens[i - 2][1] == ")" else i - 2
+                function = {"name": _assigned_name(tokens, k - 1) or "<arrow>", "start_line": tokens[k][2]}
+            if function is not None:
+                function.update({"kind": "function", "end_line": line, "complexity": 1})
+                functions.append(function)
+            stack.append(function)
+        elif value == "}" and kind == "punct":
+            if stack:
+                function = stack.pop()
+                if function is not None:
+                    function["end_line"] = line
+        else:
+            innermost = next((f for f in reversed(stack) if f is not None), None)
+            if innermost is None:
+                continue
+            if kind == "ident" and value in DECISION_KEYWORDS or kind == "op" and value in DECISION_OPS or \
+                    kind == "punct" and value == "?":
+                innermost["complexity"] += 1
+            if kind == "ident" and value in ("var", "let", "const") and i + 1 < len(tokens) and tokens[i + 1][0] == "ident":
+                declared.append(("variable", tokens[i + 1][1], tokens[i + 1][2]))
+            elif kind == "ident" and value == "function" and i + 1 < len(tokens) and tokens[i + 1][0] == "ident":
+                declared.append(("function", tokens[i + 1][1], tokens[i + 1][2]))
+    counts = Counter(value for kind, value, _ in tokens if kind == "ident")
+    unused = [{"name": name, "kind": kind, "line": line} for kind, name, line in declared if counts[name] == 1]
+    return functions, unused
+
+
+def _csharp_unused(tokens: List[Tuple[str, str, int]], functions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Private fields, private methods and locals whose name never appears again in the file.
+    """
+    counts = Counter(value.lstrip("@") for kind, value, _ in tokens if kind == "ident")
+    ranges = [(f["start_line"], f["end_line"]) for f in functions]
+    unused = []
+    statement: List[Tuple[str, str, int]] = []
+    depth = 0
+    for kind, value, line in tokens:
+        if value in ("{", "}", ";") and kind == "punct":
+            values = [v for _, v, _ in statement]
+            in_member = any(start <= statement[0][2] <= end for start, end in ranges) if statement else False
+            if value == ";" and statement and depth >= 1 and "(" not in values[:_index(values, "=")] and values[0] != "using":
+                # A field declaration: modifiers Type name [= value];
+                head = statement[:_index(values, "=")]
+                name = head[-1] if head and head[-1][0] == "ident" and head[-1][1] not in ACCESSOR_KEYWORDS else None
+                private = not any(v in ("public", "protected", "internal") for v in values)
+                if name and not in_member and private and "const" not in values and counts[name[1].lstrip("@")] == 1:
+                    unused.append({"name": name[1], "kind": "field", "line": name[2]})
+            if statement and in_member and len(statement) >= 3 and statement[2][1] == "=" and \
+                    statement[0][1] == "var" and statement[1][0] == "ident" and counts[statement[1][1]] == 1:
+                unused.append({"name": statement[1][1], "kind": "local", "line": statement[1][2]})
+            depth += 1 if value == "{" else -1 if value == "}" else 0
+            statement = []
+        else:
+            statement.append((kind, value, line))
+    for function in functions:
+        short_name = function["name"].split(".")[-1]
+        if function["kind"] == "method" and counts[short_name] == 1:
+            header = [v for k, v, l in tokens if l == function["start_line"]]
+            if "private" in header or not any(v in ("public", "protected", "internal", "override") for v in header):
+                unused.append({"name": function["name"], "kind": "method", "line": function["start_line"]})
+    return unused
+
+
+def _index(values: List[str], needle: str) -> int:
+    return values.index(needle) if needle in values else len(values)
+
+
+def _csharp_rules(tokens: List[Tuple[str, str, int]]) -> List[Dict[str, Any]]:
+    issues = []
+
+    def add(rule: str, severity: str, line: int, message: str) -> None:
+        issues.append({"rule": rule, "severity": severity, "line": line, "message": message})
+
+    for i, (kind, value, line) in enumerate(tokens):
+        nxt = tokens[i + 1][1] if i + 1 < len(tokens) else None
+        prev = tokens[i - 1][1] if i else None
+        if kind == "ident":
+            if value == "async" and nxt == "void":
+                add("CS001", "warning", line, "async void method: exceptions can't be awaited or caught by the caller; return Task instead.")
+            elif value == "catch":
+                j = i + 1
+                if nxt == "(":
+                    j = next((k for k in range(i + 1, len(tokens)) if tokens[k][1] == ")"), i) + 1
+                if j + 1 < len(tokens) and tokens[j][1] == "{" and tokens[j + 1][1] == "}":
+                    add("CS002", "warning", line, "Empty catch block swallows exceptions.")
+            elif value in ("Result", "Wait") and prev == "." and (value == "Result" and nxt != "(" or value == "Wait" and nxt == "("):
+                add("CS003", "warning", line, f"Blocking on a task with .{value} can deadlock; use await.")
+            elif value == "GetResult" and prev == "." and i >= 4 and tokens[i - 4][1] == "GetAwaiter":
+                add("CS003", "warning", line, "Blocking on a task with GetAwaiter().GetResult(); use await.")
+            elif value == "throw" and i + 2 < len(tokens) and tokens[i + 1][0] == "ident" and tokens[i + 2][1] == ";" \
+                    and tokens[i + 1][1] not in ("new", "null"):
+                add("CS004", "warning", line, f"'throw {tokens[i + 1][1]};' resets the stack trace; use 'throw;'.")
+            elif value == "new" and nxt == "HttpClient" and i + 2 < len(tokens) and tokens[i + 2][1] == "(":
+                add("CS006", "warning", line, "new HttpClient() per use can exhaust sockets; use IHttpClientFactory or a shared instance.")
+            elif value in ("GC", "Thread") and nxt == "." and i + 2 < len(tokens) and tokens[i + 2][1] in ("Collect", "Sleep"):
+                add("CS009", "info", line, f"{value}.{tokens[i + 2][1]}() is rarely right in application code.")
+        elif kind == "string" and SECRET_RE.search(value):
+            add("CS005", "warning", line, "String literal looks like it embeds a credential or connection secret.")
+
+    return issues
+
+
+def _javascript_rules(tokens: List[Tuple[str, str, int]]) -> List[Dict[str, Any]]:
+    issues = []
+
+    def add(rule: str, severity: str, line: int, message: str) -> None:
+        issues.append({"rule": rule, "severity": severity, "line": line, "message": message})
+
+    for i, (kind, value, line) in enumerate(tokens):
+        nxt = tokens[i + 1][1] if i + 1 < len(tokens) else None
+        prev = tokens[i - 1][1] if i else None
+        if kind == "op" and value in ("==", "!="):
+            add("JS002", "info", line, f"Loose equality '{value}' coerces types; use '{value}='.")
+        elif kind != "ident":
+            continue
+        elif value == "var" and prev != ".":
+            add("JS001", "info", line, "'var' is function-scoped; prefer let/const.")
+        elif value == "eval" and nxt == "(" or value == "new" and nxt == "Function":
+            add("JS003", "warning", line, "Dynamic code evaluation (eval / new Function).")
+        elif value == "console" and nxt == "." and i + 2 < len(tokens) and tokens[i + 2][1] in ("log", "debug"):
+            add("JS004", "info", line, f"console.{tokens[i + 2][1]} left in code.")
+        elif value == "write" and prev == "." and i >= 2 and tokens[i - 2][1] == "document":
+            add("JS005", "warning", line, "document.write blocks parsing and can inject markup.")
+        elif value == "catch":
+            j = i + 1
+            if nxt == "(":
+                j = next((k for k in range(i + 1, len(tokens)) if tokens[k][1] == ")"), i) + 1
+            if j + 1 < len(tokens) and tokens[j][1] == "{" and tokens[j + 1][1] == "}":
+                add("JS006", "warning", line, "Empty catch block swallows exceptions.")
+        elif value == "debugger":
+            add("JS007", "warning", line, "debugger statement left in code.")
+        elif value in ("innerHTML", "outerHTML") and prev == "." and nxt in ("=", "+="):
+            add("JS008", "warning", line, f"Assigning {value} can inject unescaped markup (XSS); prefer textContent.")
+    return issues
+
+
+def analyze_source(source: str, language: str) -> Dict[str, Any]:
+    """
+    Runs the full analysis (structure, functions and complexity, rules, unused symbols) on one source text.
+
+    Args:
+        source: The code to analyze.
+        language: "csharp" or "javascript".
+
+    Returns:
+        A dictionary with 'structure', 'functions', 'complexity', 'issues', 'unused_symbols' and 'summary'.
+    """
+    tokens = tokenize(source, language)
+    structure = _check_structure(tokens)
+    if language == "csharp":
+        functions = _csharp_functions(source, tokens)
+        ctor_ranges = [(f["start_line"], f["end_line"]) for f in functions if f["kind"] == "constructor"]
+        issues = _csharp_rules(tokens) + _static_writes_in_constructors(tokens, ctor_ranges)
+        unused = _csharp_unused(tokens, functions)
+    else:
+        functions, unused = _javascript_functions(tokens)
+        issues = _javascript_rules(tokens)
+
+    for function in functions:
+        length = function["end_line"] - function["start_line"] + 1
+        if function["complexity"] > COMPLEX_FUNCTION:
+            issues.append({"rule": "GEN001", "severity": "warning", "line": function["start_line"],
+                           "message": f"'{function['name']}' has cyclomatic complexity {function['complexity']} (> {COMPLEX_FUNCTION})."})
+        if length > LONG_FUNCTION_LINES:
+            issues.append({"rule": "GEN002", "severity": "info", "line": function["start_line"],
+                           "message": f"'{function['name']}' is {length} lines long (> {LONG_FUNCTION_LINES})."})
+    for error in structure["errors"]:
+        issues.append({"rule": "GEN000", "severity": "error", **error})
+    issues.sort(key=lambda issue: (issue["line"], issue["rule"]))
+
+    complexities = [f["complexity"] for f in functions]
+    return {
+        "language": language,
+        "lines": source.count("\n") + (0 if source.endswith("\n") or not source else 1),
+        "structure": structure,
+        "functions": functions,
+        "complexity": {
+            "total": sum(complexities),
+            "max": max(complexities, default=0),
+            "average": round(sum(complexities) / len(complexities), 2) if complexities else 0.0,
+        },
+        "issues": issues,
+        "unused_symbols": unused,
+        "summary": dict(Counter(issue["severity"] for issue in issues)),
+    }
+
+
+def _static_writes_in_constructors(tokens: List[Tuple[str, str, int]], ctor_ranges: List[Tuple[int, int]]) -> List[Dict[str, Any]]:
+    """
+    Static fields assigned from an instance constructor are shared by every instance (and request).
+    """
+    static_fields = set()
+    for i, (kind, value, _) in enumerate(tokens):
+        if kind == "ident" and value == "static":
+            j = i + 1
+            while j < len(tokens) and tokens[j][1] not in (";", "=", "(", "{", "}"):
+                j += 1
+            if j < len(tokens) and tokens[j][1] in (";", "=") and tokens[j - 1][0] == "ident":
+                static_fields.add(tokens[j - 1][1])
+    issues = []
+    for i, (kind, value, line) in enumerate(tokens):
+        if kind == "ident" and value in static_fields and i + 1 < len(tokens) and tokens[i + 1][1] == "=" and \
+                (i == 0 or tokens[i - 1][1] != ".") and any(start < line <= end for start, end in ctor_ranges):
+            issues.append({"rule": "CS007", "severity": "warning", "line": line,
+                           "message": f"Static field '{value}' is assigned in an instance constructor; every instance overwrites it."})
+    return issues
+
+
+def _analyze_file(file_path: str, language: str) -> Tuple[str, str, Dict[str, Any]]:
+    """
+    Worker entry point: hashes and analyzes one file.
+    """
+    with open(file_path, 'r', encoding='utf-8-sig', errors='replace') as f:
+        source = f.read()
+    return file_path, content_hash(source, language), analyze_source(source, language)
+
+
+def content_hash(source: str, language: str) -> str:
+    return hashlib.sha256(f"{ENGINE_VERSION}:{language}:".encode("utf-8") + source.encode("utf-8")).hexdigest()
+
+
+class CodeAnalyzer:
+    """
+    Static analysis with results cached by content hash.
+
+    Results live in an in-memory LRU in front of `<cache_dir>/code_analysis/<sha256>.json`, so
+    re-analyzing unchanged code (a snippet pasted twice, or an untouched file in a project run)
+    costs one hash. Whole-project runs fan the cache misses out over a process pool.
+    """
+
+    def __init__(self, file_index: CodeFileIndex = code_file_index, cache_dir: str = CACHE_DIR, max_memory_entries: int = 256):
+        self.file_index = file_index
+        self.results_dir = os.path.join(cache_dir, "code_analysis")
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._file_hashes: Dict[str, Tuple[int, int, str]] = {} # rel path -> (size, mtime_ns, hash)
+        self._lock = threading.RLock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return result
+        try:
+            with open(os.path.join(self.results_dir, f"{key}.json"), 'r', encoding='utf-8') as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self.stats["disk_hits"] += 1
+        self._remember(key, result)
+        return result
+
+    def _remember(self, key: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            self._memory[key] = result
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _store(self, key: str, result: Dict[str, Any]) -> None:
+        self._remember(key, result)
+        os.makedirs(self.results_dir, exist_ok=True)
+        path = os.path.join(self.results_dir, f"{key}.json")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        os.replace(tmp_path, path)
+
+    def analyze(self, source: str, language: str) -> Dict[str, Any]:
+        """
+        Analyzes a source text, returning the cached result when the same text was analyzed before.
+
+        Raises:
+            ValueError: If the language is not supported.
+        """
+        lang = normalize_language(language)
+        if lang is None:
+            raise ValueError(f"Unsupported language '{language}'. Supported: csharp, javascript.")
+        key = content_hash(source, lang)
+        result = self._lookup(key)
+        if result is None:
+            with self._lock:
+                self.stats["misses"] += 1
+            result = analyze_source(source, lang)
+            self._store(key, result)
+        return {**result, "content_hash": key}
+
+    def analyze_project(self, subfolder: str = "", include_vendor: bool = False, workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Analyzes every C# and JavaScript file under a CodeBase subfolder, in parallel.
+
+        Files whose size/mtime match the last run are looked up by their remembered hash; the
+        remaining cache misses are analyzed across a process pool.
+
+        Args:
+            subfolder: Folder relative to CodeBase ("" for everything).
+            include_vendor: Also analyze vendored/minified files (e.g. wwwroot/lib, *.min.js).
+            workers: Number of worker processes (default: number of CPUs).
+
+        Returns:
+            A dictionary with per-file summaries, issue counts by rule, the most complex functions and timing.
+        """
+        started = time.perf_counter()
+        entries = self.file_index.list_files(subfolder, extensions=list(EXTENSIONS), include_vendor=include_vendor)
+        results: Dict[str, Dict[str, Any]] = {}
+        pending = []
+        for entry in entries:
+            rel_path = entry["relative_path"]
+            language = EXTENSIONS[os.path.splitext(rel_path)[1].lower()]
+            with self._lock:
+                known = self._file_hashes.get(rel_path)
+            result = None
+            if known and known[0] == entry["size"] and known[1] == entry["mtime_ns"]:
+                result = self._lookup(known[2])
+            if result is None:
+                try:
+                    with open(entry["path"], 'r', encoding='utf-8-sig', errors='replace') as f:
+                        key = content_hash(f.read(), language)
+                except OSError:
+                    continue
+                result = self._lookup(key)
+                if result is not None:
+                    with self._lock:
+                        self._file_hashes[rel_path] = (entry["size"], entry["mtime_ns"], key)
+            if result is not None:
+                results[rel_path] = result
+            else:
+                pending.append((entry, language))
+
+        errors = {}
+        if pending:
+            workers = max(1, min(workers or os.cpu_count() or 1, len(pending)))
+            # forkserver, not fork: the server process runs threads, and forking those can deadlock the workers
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("forkserver")) as pool:
+                futures = {pool.submit(_analyze_file, entry["path"], language): entry for entry, language in pending}
+                for future, entry in futures.items():
+                    try:
+                        _, key, result = future.result()
+                    except Exception as e:
+                        errors[entry["relative_path"]] = str(e)
+                        continue
+                    self._store(key, result)
+                    with self._lock:
+                        self.stats["misses"] += 1
+                        self._file_hashes[entry["relative_path"]] = (entry["size"], entry["mtime_ns"], key)
+                    results[entry["relative_path"]] = result
+
+        by_rule = Counter(issue["rule"] for result in results.values() for issue in result["issues"])
+        functions = [{**function, "file": rel_path} for rel_path, result in results.items() for function in result["functions"]]
+        functions.sort(key=lambda f: f["complexity"], reverse=True)
+        return {
+            "files": {
+                rel_path: {"language": result["language"], "lines": result["lines"], "balanced": result["structure"]["balanced"],
+                           "max_complexity": result["complexity"]["max"], "issues": result["summary"],
+                           "unused_symbols": len(result["unused_symbols"])}
+                for rel_path, result in sorted(results.items())
+            },
+            "issues_by_rule": dict(by_rule.most_common()),
+            "most_complex_functions": functions[:10],
+            "analyzed": len(pending) - len(errors),
+            "cached": len(results) - (len(pending) - len(errors)),
+            "errors": errors,
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+            return {**self.stats, "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                    "memory_entries": len(self._memory), "results_dir": self.results_dir}
+
+
+# Shared instance used by the server tools
+code_analyzer = CodeAnalyzer()
@@ -0,0 +1,226 @@
+import os
+import json
+import time
+import fnmatch
+import threading
+from typing import Any, Dict, List, Optional
+
+from wiki_cache import CACHE_DIR
+from warm_state import load_timed, warm_snapshot
+
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+CODE_BASE_DIR = os.environ.get("MCP_CODEBASE_DIR", os.path.join(PROJECT_ROOT, "CodeBase"))
+
+INDEX_VERSION = 1
+
+LANGUAGES = {
+    ".cs": "csharp", ".cshtml": "razor", ".razor": "razor", ".csproj": "xml", ".config": "xml", ".xml": "xml",
+    ".js": "javascript", ".ts": "typescript", ".css": "css", ".scss": "scss", ".html": "html", ".htm": "html",
+    ".json": "json", ".py": "python", ".sql": "sql", ".md": "markdown", ".svg": "svg", ".txt": "text",
+}
+
+# Vendored, generated or minified files that listings skip unless include_vendor=True.
+# Patterns are matched against the path relative to CodeBase, using forward slashes.
+IGNORE_PATTERNS = [
+    "*/wwwroot/lib/*", "wwwroot/lib/*", "*/node_modules/*", "node_modules/*",
+    "*/bin/*", "bin/*", "*/obj/*", "obj/*", "*.min.js", "*.min.css", "*-min.js", "*.map",
+]
+SKIP_DIRS = {".git", ".vs", ".vscode", "__pycache__"}
+
+
+def _count_lines(file_path: str) -> int:
+    lines = 0
+    last = b"\n"
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            lines += chunk.count(b"\n")
+            last = chunk[-1:]
+    return lines + (0 if last == b"\n" else 1)
+
+
+def is_ignored(rel_path: str) -> bool:
+    return any(fnmatch.fnmatch(rel_path, pattern) for pattern in IGNORE_PATTERNS)
+
+
+class CodeFileIndex:
+    """
+    Persistent metadata index (size, mtime, language, line count) of every file under CodeBase.
+
+    The index is saved to `<cache_dir>/code_index.json` and refreshed incrementally by mtime
+    scanning: unchanged files cost one stat, and only new or modified files are re-read to count
+    lines. Listings are answered from memory; once the index is older than `refresh_interval` a
+    listing triggers a background rescan instead of walking the tree itself.
+    """
+
+    def __init__(self, root: str = CODE_BASE_DIR, cache_dir: str = CACHE_DIR, refresh_interval: float = 5.0):
+        self.root = root
+        self.index_path = os.path.join(cache_dir, "code_index.json")
+        self.refresh_interval = refresh_interval
+        self.version = 0 # Bumped whenever a refresh finds a change
+        self._files: Dict[str, Dict[str, Any]] = {} # rel path -> metadata
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+        self._last_refresh = 0.0
+        self._loaded = False # The persisted index is read on first use, not at import
+
+    # --- persistence ---
+
+    def _load(self) -> None:
+        try:
+            data = warm_snapshot.take("code_file_index")
+            if data is None:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            if data.get("version") == INDEX_VERSION and data.get("root") == self.root:
+                self._files = data["files"]
+        except (OSError, ValueError, KeyError):
+            self._files = {}
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    load_timed("code_file_index", self._load)
+                    self._loaded = True
+
+    def _state(self) -> Dict[str, Any]:
+        return {"version": INDEX_VERSION, "root": self.root, "files": self._files}
+
+    def snapshot_state(self) -> Optional[Dict[str, Any]]:
+        """
+        The index as stored in the warm-state snapshot (None when it was never loaded in this process).
+        """
+        if not self._loaded:
+            return None
+        with self._lock:
+            return self._state()
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._state(), f)
+        os.replace(tmp_path, self.index_path)
+
+    # --- scanning ---
+
+    def _scan(self, directory: str, found: Dict[str, os.stat_result]) -> None:
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in SKIP_DIRS:
+                    self._scan(entry.path, found)
+            elif entry.is_file(follow_symlinks=False):
+                rel_path = os.path.relpath(entry.path, self.root).replace(os.sep, "/")
+                found[rel_path] = entry.stat(follow_symlinks=False)
+
+    def refresh(self) -> Dict[str, int]:
+        """
+        Rescans CodeBase and updates the entries of added, modified and removed files.
+
+        Returns:
+            Counts of added, updated and removed files.
+        """
+        self._ensure_loaded()
+        with self._refreshing:
+            found: Dict[str, os.stat_result] = {}
+            self._scan(self.root, found)
+
+            with self._lock:
+                current = dict(self._files)
+            changes = {"added": 0, "updated": 0, "removed": 0}
+            for rel_path, st in found.items():
+                known = current.get(rel_path)
+                if known and known["size"] == st.st_size and known["mtime_ns"] == st.st_mtime_ns:
+                    continue
+                try:
+                    lines = _count_lines(os.path.join(self.root, rel_path))
+                except OSError:
+                    continue
+                current[rel_path] = {
+                    "size": st.st_size,
+                    "mtime_ns": st.st_mtime_ns,
+                    "language": LANGUAGES.get(os.path.splitext(rel_path)[1].lower(), "other"),
+                    "lines": lines,
+                    "ignored": is_ignored(rel_path),
+                }
+                changes["updated" if known else "added"] += 1
+            for rel_path in [p for p in current if p not in found]:
+                del current[rel_path]
+                changes["removed"] += 1
+
+            with self._lock:
+                self._files = current
+                self._last_refresh = time.monotonic()
+                if any(changes.values()):
+                    self.version += 1
+            if any(changes.values()):
+                self._save()
+            return changes
+
+    def _refresh_in_background(self) -> None:
+        if self._refreshing.locked():
+            return
+        threading.Thread(target=self.refresh, name="code-index-refresh", daemon=True).start()
+
+    def ensure_fresh(self) -> None:
+        """
+        Builds the index synchronously on first use, and afterwards kicks off a background
+        rescan when the last one is older than refresh_interval.
+        """
+        if self._last_refresh == 0.0:
+            self.refresh()
+        elif time.monotonic() - self._last_refresh > self.refresh_interval:
+            self._refresh_in_background()
+
+    # --- querying ---
+
+    def files(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns a snapshot of the index (rel path -> metadata).
+        """
+        self.ensure_fresh()
+        with self._lock:
+            return self._files
+
+    def list_files(self, subfolder: str = "", extensions: Optional[List[str]] = None,
+                   patterns: Optional[List[str]] = None, include_vendor: bool = False) -> List[Dict[str, Any]]:
+        """
+        Lists indexed files under a subfolder of CodeBase.
+
+        Args:
+            subfolder: Folder relative to CodeBase ("" for everything).
+            extensions: Keep files ending with any of these extensions (e.g. [".cs", ".cshtml"]).
+            patterns: Keep files whose path relative to CodeBase matches any of these globs (e.g. ["Views/**/*.cshtml"]).
+            include_vendor: Also list vendored/minified files matched by IGNORE_PATTERNS.
+
+        Returns:
+            A list of metadata dictionaries with 'path' (absolute) and 'relative_path', sorted by path.
+        """
+        prefix = subfolder.strip("/\\").replace(os.sep, "/")
+        prefix = "" if prefix in ("", ".") else prefix + "/"
+        extensions = [e.lower() if e.startswith(".") else "." + e.lower() for e in (extensions or []) if e]
+        patterns = [p.replace("**/", "*") for p in (patterns or [])] # fnmatch's * already spans "/"
+
+        results = []
+        for rel_path, meta in self.files().items():
+            if prefix and not rel_path.startswith(prefix):
+                continue
+            if meta["ignored"] and not include_vendor:
+                continue
+            if extensions and not rel_path.lower().endswith(tuple(extensions)):
+                continue
+            if patterns and not any(fnmatch.fnmatch(rel_path, p) or fnmatch.fnmatch(rel_path[len(prefix):], p) for p in patterns):
+                continue
+            results.append({"path": os.path.join(self.root, *rel_path.split("/")), "relative_path": rel_path, **meta})
+        results.sort(key=lambda item: item["relative_path"])
+        return results
+
+
+# Shared instance used by the server tools
+code_file_index = CodeFileIndex()
+warm_snapshot.register("code_file_index", code_file_index.snapshot_state)
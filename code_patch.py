@@ -0,0 +1,211 @@
+import os
+import re
+import codecs
+import shutil
+from typing import Any, Dict, List, Optional, Tuple
+
+
+HUNK_HEADER_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+MAX_OFFSET = 50 # How far a hunk may have drifted from the line numbers in its header
+
+
+class PatchError(ValueError):
+    """
+    Raised when a patch is malformed or its context doesn't match the file.
+    """
+
+
+class SourceText:
+    """
+    A text file split into lines, remembering its BOM, newline style and final newline so
+    edits can be written back byte-for-byte compatible with the original.
+    """
+
+    def __init__(self, lines: List[str], newline: str = "\n", bom: bool = False, final_newline: bool = True):
+        self.lines = lines
+        self.newline = newline
+        self.bom = bom
+        self.final_newline = final_newline
+
+    @classmethod
+    def read(cls, file_path: str) -> "SourceText":
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        bom = data.startswith(codecs.BOM_UTF8)
+        text = data[len(codecs.BOM_UTF8):].decode("utf-8") if bom else data.decode("utf-8")
+        newline = "\r\n" if "\r\n" in text else "\n"
+        final_newline = text.endswith("\n") or not text
+        lines = text.replace("\r\n", "\n").split("\n")
+        if final_newline:
+            lines.pop()
+        return cls(lines, newline, bom, final_newline)
+
+    def render(self) -> str:
+        text = self.newline.join(self.lines)
+        return text + self.newline if self.final_newline and self.lines else text
+
+
+def _split_lines(text: str) -> List[str]:
+    lines = text.replace("\r\n", "\n").split("\n")
+    if lines and lines[-1] == "":
+        lines.pop()
+    return lines
+
+
+def parse_unified_diff(diff: str) -> List[Dict[str, Any]]:
+    """
+    Parses the hunks of a single-file unified diff. File headers (---/+++, diff, index) are skipped.
+
+    Returns:
+        A list of hunks: {"old_start", "old_lines": [...], "new_lines": [...], "no_final_newline": bool}.
+
+    Raises:
+        PatchError: If the diff has no hunks or a hunk body doesn't match its header counts.
+    """
+    hunks = []
+    current = None
+    for raw in diff.replace("\r\n", "\n").split("\n"):
+        header = HUNK_HEADER_RE.match(raw)
+        if header:
+            old_count = int(header.group(2)) if header.group(2) is not None else 1
+            new_count = int(header.group(4)) if header.group(4) is not None else 1
+            current = {"old_start": int(header.group(1)), "old_count": old_count, "new_count": new_count,
+                       "old_lines": [], "new_lines": [], "no_final_newline": False}
+            hunks.append(current)
+            continue
+        if current is None or raw.startswith(("--- ", "+++ ")) and len(current["old_lines"]) >= current["old_count"] \
+                and len(current["new_lines"]) >= current["new_count"]:
+            continue # Headers before (or between) hunks
+        if raw.startswith("\\"):
+            current["no_final_newline"] = True # "\ No newline at end of file"
+        elif raw.startswith("+"):
+            current["new_lines"].append(raw[1:])
+        elif raw.startswith("-"):
+            current["old_lines"].append(raw[1:])
+        elif raw.startswith(" ") or raw == "":
+            if raw == "" and len(current["old_lines"]) >= current["old_count"] and len(current["new_lines"]) >= current["new_count"]:
+                continue # Trailing blank line after the last hunk
+            current["old_lines"].append(raw[1:])
+            current["new_lines"].append(raw[1:])
+    if not hunks:
+        raise PatchError("No hunks found; expected a unified diff with '@@ -a,b +c,d @@' headers.")
+    for i, hunk in enumerate(hunks, start=1):
+        if len(hunk["old_lines"]) != hunk["old_count"] or len(hunk["new_lines"]) != hunk["new_count"]:
+            raise PatchError(f"Hunk {i} (@@ -{hunk['old_start']},{hunk['old_count']} ...) has {len(hunk['old_lines'])} old / "
+                             f"{len(hunk['new_lines'])} new lines, header says {hunk['old_count']} / {hunk['new_count']}.")
+    return hunks
+
+
+def _find_hunk(lines: List[str], old_lines: List[str], expected_at: int, not_before: int) -> Optional[int]:
+    # Exact position first, then search outwards for a drifted match
+    def matches(at: int) -> bool:
+        return at >= not_before and lines[at:at + len(old_lines)] == old_lines
+
+    if matches(expected_at):
+        return expected_at
+    for offset in range(1, MAX_OFFSET + 1):
+        for at in (expected_at - offset, expected_at + offset):
+            if 0 <= at <= len(lines) - len(old_lines) and matches(at):
+                return at
+    return None
+
+
+def apply_unified_diff(source: SourceText, diff: str) -> Dict[str, Any]:
+    """
+    Applies a unified diff to the source in place, verifying every context and removed line.
+
+    Returns:
+        The number of hunks applied and the line offsets at which drifted hunks were found.
+
+    Raises:
+        PatchError: If the diff is malformed or a hunk's context doesn't match the file.
+    """
+    hunks = parse_unified_diff(diff)
+    lines = source.lines
+    result: List[str] = []
+    position = 0 # Next unconsumed line of the original
+    offsets = {}
+    for i, hunk in enumerate(hunks, start=1):
+        expected_at = max(hunk["old_start"] - 1, 0) if hunk["old_lines"] else hunk["old_start"] # -a,0 means "after line a"
+        at = _find_hunk(lines, hunk["old_lines"], expected_at, position)
+        if at is None:
+            preview = "\n".join(hunk["old_lines"][:3])
+            raise PatchError(f"Hunk {i} does not apply: context at line {hunk['old_start']} doesn't match the file "
+                             f"(expected to find:\n{preview})")
+        if at != expected_at:
+            offsets[i] = at - expected_at
+        result.extend(lines[position:at])
+        result.extend(hunk["new_lines"])
+        position = at + len(hunk["old_lines"])
+        if hunk["no_final_newline"] and position == len(lines):
+            source.final_newline = False
+    result.extend(lines[position:])
+    source.lines = result
+    return {"hunks_applied": len(hunks), "offsets": offsets}
+
+
+def apply_line_edits(source: SourceText, edits: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Applies line-range replacements to the source in place.
+
+    Each edit is {"start_line", "end_line", "new_text", "expected_text" (optional)}: lines
+    start_line..end_line (1-based, inclusive) are replaced by new_text. Use end_line = start_line - 1
+    to insert before start_line without removing anything. When expected_text is given, the current
+    lines must equal it, which guards against editing a file that changed since it was read.
+
+    Raises:
+        PatchError: If an edit is out of range, edits overlap, or expected_text doesn't match.
+    """
+    lines = source.lines
+    ranges: List[Tuple[int, int, List[str]]] = []
+    for i, edit in enumerate(edits, start=1):
+        try:
+            start, end = int(edit["start_line"]), int(edit.get("end_line", edit["start_line"]))
+        except (KeyError, TypeError, ValueError):
+            raise PatchError(f"Edit {i} needs integer 'start_line' (and optionally 'end_line').")
+        if start < 1 or end < start - 1 or end > len(lines) or start > len(lines) + 1:
+            raise PatchError(f"Edit {i} range {start}-{end} is outside the file (1-{len(lines)}).")
+        expected = edit.get("expected_text")
+        if expected is not None and lines[start - 1:end] != _split_lines(expected):
+            raise PatchError(f"Edit {i}: lines {start}-{end} don't match expected_text; the file may have changed.")
+        ranges.append((start, end, _split_lines(edit.get("new_text") or "")))
+
+    ranges.sort(key=lambda r: (r[0], r[1]))
+    for (s1, e1, _), (s2, e2, _) in zip(ranges, ranges[1:]):
+        if s2 <= e1 or (s1 == s2 and e1 == s1 - 1 and e2 == s2 - 1): # Overlapping ranges, or two inserts at one spot
+            raise PatchError(f"Edits {s1}-{e1} and {s2}-{e2} overlap.")
+    for start, end, new_lines in reversed(ranges): # Bottom-up, so earlier line numbers stay valid
+        lines[start - 1:end] = new_lines
+    return {"edits_applied": len(ranges)}
+
+
+def atomic_write_text(file_path: str, text: str, bom: bool = False, like: Optional[str] = None) -> int:
+    """
+    Writes text to a temp file next to file_path, fsyncs it and renames it over file_path,
+    so readers never see a half-written file.
+
+    Args:
+        file_path: Destination path.
+        text: The content to write (UTF-8, newlines written as-is).
+        bom: Prefix the file with a UTF-8 BOM.
+        like: Copy the permission bits of this file (e.g. the original being fixed).
+
+    Returns:
+        The number of bytes written.
+    """
+    data = (codecs.BOM_UTF8 if bom else b"") + text.encode("utf-8")
+    directory, filename = os.path.split(file_path)
+    tmp_path = os.path.join(directory, f".{filename}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if like and os.path.exists(like):
+            shutil.copymode(like, tmp_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return len(data)
@@ -0,0 +1,217 @@
+import os
+import re
+import mmap
+import codecs
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from code_index import LANGUAGES
+
+
+NEWLINE_RE = re.compile(b"\n")
+BOMS = [(codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16-le"), (codecs.BOM_UTF16_BE, "utf-16-be")]
+SNIFF_BYTES = 64 * 1024
+
+
+def detect_encoding(head: bytes) -> str:
+    """
+    Guesses the encoding of a file from its first bytes: BOM first, then "binary" for NUL bytes,
+    then UTF-8 if it decodes, otherwise latin-1.
+    """
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    if b"\0" in head[:8192]:
+        return "binary"
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        if e.start < len(head) - 3: # A multi-byte character cut off at the end of the sample is fine
+            return "latin-1"
+    return "utf-8"
+
+
+class CodeFileReader:
+    """
+    Reads line ranges out of CodeBase files through mmap.
+
+    The byte offset of every line start is computed once per (path, size, mtime) and kept in a
+    small LRU, so slicing lines N..M out of a large file only touches those bytes instead of
+    decoding the whole file.
+    """
+
+    def __init__(self, max_cached_files: int = 64):
+        self.max_cached_files = max_cached_files
+        self._offsets: "OrderedDict[str, Tuple[int, int, array, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _line_index(self, file_path: str, st: os.stat_result, mm: Optional[mmap.mmap]) -> Tuple[array, str]:
+        """
+        Returns (line start offsets, encoding) for a file, from the cache when its size/mtime still match.
+        """
+        with self._lock:
+            cached = self._offsets.get(file_path)
+            if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+                self._offsets.move_to_end(file_path)
+                return cached[2], cached[3]
+
+        offsets = array('Q')
+        encoding = "utf-8"
+        if mm is not None:
+            encoding = detect_encoding(mm[:SNIFF_BYTES])
+            offsets.append(0)
+            offsets.extend(m.end() for m in NEWLINE_RE.finditer(mm))
+            if offsets[-1] == st.st_size: # Trailing newline doesn't start another line
+                offsets.pop()
+        with self._lock:
+            self._offsets[file_path] = (st.st_size, st.st_mtime_ns, offsets, encoding)
+            self._offsets.move_to_end(file_path)
+            while len(self._offsets) > self.max_cached_files:
+                self._offsets.popitem(last=False)
+        return offsets, encoding
+
+    def stat(self, file_path: str) -> Dict[str, Any]:
+        """
+        Size, line count and encoding of a file, without returning its content.
+        """
+        st = os.stat(file_path)
+        with open(file_path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if st.st_size else None
+            try:
+                offsets, encoding = self._line_index(file_path, st, mm)
+                line_endings = "crlf" if mm is not None and mm.find(b"\r\n", 0, SNIFF_BYTES) != -1 else "lf"
+            finally:
+                if mm is not None:
+                    mm.close()
+        return {
+            "file_path": file_path,
+            "size": st.st_size,
+            "lines": len(offsets),
+            "encoding": encoding,
+            "line_endings": line_endings,
+            "language": LANGUAGES.get(os.path.splitext(file_path)[1].lower(), "other"),
+            "mtime_ns": st.st_mtime_ns,
+        }
+
+    def read(self, file_path: str, start_line: int = 1, end_line: Optional[int] = None,
+             max_bytes: Optional[int] = None, start_offset: int = 0) -> Dict[str, Any]:
+        """
+        Reads lines start_line..end_line (1-based, inclusive) of a file.
+
+        Args:
+            file_path: The file to read.
+            start_line: First line to return.
+            end_line: Last line to return (default: the last line of the file).
+            max_bytes: Stop after this many bytes of content; the result is then marked truncated and
+                       'next_line' tells where to continue. A single line longer than max_bytes is split,
+                       and 'next_offset' then gives the byte offset within that line to continue from.
+            start_offset: Byte offset within start_line to start at (the 'next_offset' of a previous read).
+
+        Returns:
+            A dictionary with 'content', the returned line range, 'total_lines', 'encoding',
+            'truncated', 'next_line' (None when the end of the requested range was reached) and
+            'next_offset' (0 unless the read stopped inside a line).
+
+        Raises:
+            ValueError: If the line range is invalid or the file is binary.
+        """
+        if start_line < 1 or (end_line is not None and end_line < start_line):
+            raise ValueError(f"Invalid line range {start_line}-{end_line}.")
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError("max_bytes must be positive.")
+        if start_offset < 0:
+            raise ValueError("start_offset must not be negative.")
+
+        st = os.stat(file_path)
+        with open(file_path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if st.st_size else None
+            try:
+                offsets, encoding = self._line_index(file_path, st, mm)
+                if encoding == "binary":
+                    raise ValueError("File looks binary; use stat mode instead.")
+                total_lines = len(offsets)
+                if total_lines and start_line > total_lines:
+                    raise ValueError(f"start_line {start_line} is beyond the last line ({total_lines}).")
+                last = min(end_line or total_lines, total_lines)
+
+                line_start = offsets[start_line - 1] if total_lines else 0
+                line_end = offsets[start_line] if start_line < total_lines else st.st_size
+                if start_offset and line_start + start_offset >= line_end:
+                    raise ValueError(f"start_offset {start_offset} is beyond the end of line {start_line}.")
+                start = line_start + start_offset
+                end = offsets[last] if last < total_lines else st.st_size
+                truncated = False
+                next_line = None
+                next_offset = 0
+                if max_bytes is not None and end - start > max_bytes:
+                    truncated = True
+                    # Cut at the last line boundary that fits, or mid-line if even the first line is too long
+                    cut = start + max_bytes
+                    i = _bisect_right(offsets, cut, start_line, last) # Lines starting at or before cut
+                    if i > start_line:
+                        end = offsets[i - 1]
+                        last = i - 1
+                        next_line = i
+                    else:
+                        # Continue within the same line, without splitting a character or a CRLF pair
+                        end = _char_boundary(mm, start, cut, encoding)
+                        last = start_line
+                        next_line = start_line
+                        next_offset = end - line_start
+                data = mm[start:end] if mm is not None else b""
+            finally:
+                if mm is not None:
+                    mm.close()
+
+        if start == 0 and encoding == "utf-8-sig":
+            data = data[len(codecs.BOM_UTF8):]
+        content = data.decode("utf-8" if encoding == "utf-8-sig" else encoding, errors="replace")
+        content = content.replace("\r\n", "\n").replace("\r", "\n") # Same newlines as reading in text mode
+        return {
+            "file_path": file_path,
+            "content": content,
+            "start_line": start_line,
+            "end_line": last,
+            "total_lines": total_lines,
+            "encoding": encoding,
+            "truncated": truncated,
+            "next_line": next_line,
+            "next_offset": next_offset,
+        }
+
+
+def _char_boundary(mm: mmap.mmap, start: int, cut: int, encoding: str) -> int:
+    """
+    Moves a mid-line cut back so it doesn't split a multi-byte character or a CRLF pair.
+    Always keeps at least one character after start.
+    """
+    end = cut
+    if encoding in ("utf-16-le", "utf-16-be"):
+        end -= (end - start) % 2
+    else:
+        if encoding in ("utf-8", "utf-8-sig"):
+            while end > start + 1 and mm[end] & 0xC0 == 0x80: # Continuation byte: the character starts earlier
+                end -= 1
+        if end > start + 1 and mm[end - 1] == 0x0D:
+            end -= 1
+    return end if end > start else cut
+
+
+def _bisect_right(offsets: array, value: int, lo_line: int, hi_line: int) -> int:
+    """
+    Returns the largest line number in [lo_line, hi_line + 1] whose start offset is <= value.
+    """
+    lo, hi = lo_line, min(hi_line + 1, len(offsets))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if offsets[mid - 1] <= value:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+# Shared instance used by the server tools
+code_file_reader = CodeFileReader()
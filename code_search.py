@@ -0,0 +1,276 @@
+import os
+import re
+import json
+import threading
+from typing import Any, Dict, List, Optional, Set
+
+from wiki_cache import CACHE_DIR
+from code_index import CodeFileIndex, code_file_index
+from warm_state import load_timed, warm_snapshot
+
+
+INDEX_VERSION = 1
+MAX_INDEXED_FILE_SIZE = 2 * 1024 * 1024 # Bigger files are still searched, just without trigram filtering
+REGEX_META = set(".^$*+?{}[]\\|()")
+
+
+def _trigrams(text: str) -> Set[str]:
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _read_text(file_path: str) -> Optional[str]:
+    try:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    if b"\0" in data[:8192]: # Binary file (images, fonts, ...)
+        return None
+    return data.decode("utf-8", errors="replace")
+
+
+def required_literals(pattern: str) -> List[str]:
+    """
+    Conservatively extracts literal substrings that every match of a regex must contain.
+    Returns [] when nothing can be guaranteed (e.g. top-level alternation), which means "no filtering".
+    """
+    if "|" in pattern:
+        return []
+    runs, current = [], []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            escaped = pattern[i + 1:i + 2]
+            if escaped and not escaped.isalnum():
+                current.append(escaped) # Escaped punctuation is a literal character
+            else:
+                runs.append("".join(current)); current = [] # \d, \w, \b, ...
+            i += 2
+            continue
+        if c in "*?{":
+            if current:
+                current.pop() # The preceding character is optional
+            runs.append("".join(current)); current = []
+            if c == "{":
+                i = pattern.find("}", i) + 1 or len(pattern)
+                continue
+        elif c in "([":
+            # Skip groups and character classes entirely; they might be optional or varying
+            runs.append("".join(current)); current = []
+            close = ")" if c == "(" else "]"
+            depth = 0
+            while i < len(pattern):
+                if pattern[i] == "\\":
+                    i += 2
+                    continue
+                if pattern[i] == c:
+                    depth += 1
+                elif pattern[i] == close:
+                    depth -= 1
+                    if depth == 0:
+                        break
+                i += 1
+            i += 1 # A quantifier after the group only affects the skipped group
+            continue
+        elif c in REGEX_META:
+            runs.append("".join(current)); current = []
+        else:
+            current.append(c)
+        i += 1
+    runs.append("".join(current))
+    return [run for run in runs if len(run) >= 3]
+
+
+class TrigramCodeSearch:
+    """
+    On-disk trigram index over the text files in CodeBase.
+
+    For each file the set of lower-cased character trigrams is stored in
+    `<cache_dir>/code_trigrams.json`. A query is turned into the trigrams it must contain,
+    the posting lists are intersected to find candidate files, and only those candidates are
+    read and matched line by line. The index follows the CodeFileIndex, so only files whose
+    size/mtime changed are re-read.
+    """
+
+    def __init__(self, file_index: CodeFileIndex = code_file_index, cache_dir: str = CACHE_DIR):
+        self.file_index = file_index
+        self.index_path = os.path.join(cache_dir, "code_trigrams.json")
+        self._files: Dict[str, Dict[str, Any]] = {} # rel path -> {"mtime_ns", "size", "trigrams"}
+        self._postings: Dict[str, Set[str]] = {}
+        self._synced_version = -1
+        self._lock = threading.RLock()
+        self._loaded = False # The persisted index is read on first use, not at import
+
+    # --- persistence ---
+
+    def _load(self) -> None:
+        postings = None
+        try:
+            data = warm_snapshot.take("code_search_index")
+            if data is None:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            if data.get("version") == INDEX_VERSION and data.get("root") == self.file_index.root:
+                self._files = data["files"]
+                postings = data.get("postings") # Only snapshots carry the postings
+        except (OSError, ValueError, KeyError):
+            self._files = {}
+        if postings is not None:
+            self._postings = postings
+            return
+        for rel_path, entry in self._files.items():
+            self._add_postings(rel_path, entry["trigrams"])
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    load_timed("code_search_index", self._load)
+                    self._loaded = True
+
+    def snapshot_state(self) -> Optional[Dict[str, Any]]:
+        """
+        The index plus its postings, as stored in the warm-state snapshot (None when never loaded here).
+        Rebuilding the postings dominates loading the JSON index, so the snapshot skips that step.
+        """
+        if not self._loaded:
+            return None
+        with self._lock:
+            return {"version": INDEX_VERSION, "root": self.file_index.root, "files": self._files, "postings": self._postings}
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": INDEX_VERSION, "root": self.file_index.root, "files": self._files}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _add_postings(self, rel_path: str, trigrams: Optional[str]) -> None:
+        if trigrams is None:
+            return
+        for i in range(0, len(trigrams), 3):
+            self._postings.setdefault(trigrams[i:i + 3], set()).add(rel_path)
+
+    def _remove_postings(self, rel_path: str, trigrams: Optional[str]) -> None:
+        if trigrams is None:
+            return
+        for i in range(0, len(trigrams), 3):
+            posting = self._postings.get(trigrams[i:i + 3])
+            if posting is not None:
+                posting.discard(rel_path)
+                if not posting:
+                    del self._postings[trigrams[i:i + 3]]
+
+    # --- maintenance ---
+
+    def refresh(self) -> Dict[str, int]:
+        """
+        Re-indexes files that were added or changed since the last sync with the file index.
+
+        Returns:
+            Counts of added, updated and removed files.
+        """
+        changes = {"added": 0, "updated": 0, "removed": 0}
+        self._ensure_loaded()
+        files = self.file_index.files()
+        with self._lock:
+            if self.file_index.version == self._synced_version and len(files) == len(self._files):
+                return changes
+            for rel_path, meta in files.items():
+                known = self._files.get(rel_path)
+                if known and known["size"] == meta["size"] and known["mtime_ns"] == meta["mtime_ns"]:
+                    continue
+                trigrams = None
+                if meta["size"] <= MAX_INDEXED_FILE_SIZE:
+                    text = _read_text(os.path.join(self.file_index.root, rel_path))
+                    trigrams = "".join(sorted(_trigrams(text))) if text is not None else ""
+                if known:
+                    self._remove_postings(rel_path, known["trigrams"])
+                self._files[rel_path] = {"size": meta["size"], "mtime_ns": meta["mtime_ns"], "trigrams": trigrams}
+                self._add_postings(rel_path, trigrams)
+                changes["updated" if known else "added"] += 1
+            for rel_path in [p for p in self._files if p not in files]:
+                self._remove_postings(rel_path, self._files.pop(rel_path)["trigrams"])
+                changes["removed"] += 1
+            self._synced_version = self.file_index.version
+            if any(changes.values()):
+                self._save()
+        return changes
+
+    # --- querying ---
+
+    def _candidates(self, literals: List[str]) -> Optional[Set[str]]:
+        """
+        Files that contain every trigram of every literal, or None when the query can't be narrowed.
+        """
+        needed = set()
+        for literal in literals:
+            needed |= _trigrams(literal)
+        if not needed:
+            return None
+        # Intersect from the rarest trigram up, so the working set shrinks fastest
+        postings = sorted((self._postings.get(t, set()) for t in needed), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                break
+        # Files too large for the index are always candidates
+        candidates |= {p for p, e in self._files.items() if e["trigrams"] is None}
+        return candidates
+
+    def search(self, query: str, regex: bool = False, case_sensitive: bool = False, paths: Optional[List[str]] = None,
+               max_results: int = 50) -> Dict[str, Any]:
+        """
+        Finds lines matching a literal string or a regular expression.
+
+        Args:
+            query: The literal text or regex to look for.
+            regex: Treat the query as a Python regular expression.
+            case_sensitive: Match case exactly.
+            paths: Restrict the search to these paths relative to CodeBase (e.g. from CodeFileIndex.list_files).
+            max_results: The maximum number of matching lines to return.
+
+        Returns:
+            A dictionary with 'matches' (file, relative_path, line, snippet), 'files_scanned' and 'truncated'.
+
+        Raises:
+            re.error: If the regex is invalid.
+        """
+        self.refresh()
+        flags = 0 if case_sensitive else re.IGNORECASE
+        matcher = re.compile(query if regex else re.escape(query), flags)
+        literals = required_literals(query) if regex else ([query] if len(query) >= 3 else [])
+
+        with self._lock:
+            candidates = self._candidates(literals)
+            scope = set(paths) if paths is not None else set(self._files)
+            scope = scope & candidates if candidates is not None else scope & set(self._files)
+
+        matches = []
+        truncated = False
+        for rel_path in sorted(scope):
+            text = _read_text(os.path.join(self.file_index.root, rel_path))
+            if text is None:
+                continue
+            for line_no, line in enumerate(text.splitlines(), start=1):
+                if matcher.search(line):
+                    if len(matches) >= max_results:
+                        truncated = True
+                        break
+                    matches.append({
+                        "file": os.path.join(self.file_index.root, *rel_path.split("/")),
+                        "relative_path": rel_path,
+                        "line": line_no,
+                        "snippet": line.strip()[:200],
+                    })
+            if truncated:
+                break
+        return {"matches": matches, "files_scanned": len(scope), "truncated": truncated}
+
+
+# Shared instance used by the server tools
+code_search_index = TrigramCodeSearch()
+warm_snapshot.register("code_search_index", code_search_index.snapshot_state)
@@ -0,0 +1,448 @@
+import os
+import re
+import json
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from wiki_cache import CACHE_DIR
+from code_index import CodeFileIndex, code_file_index
+from warm_state import load_timed, warm_snapshot
+
+
+INDEX_VERSION = 1
+
+# Comments and string literals are recognised so identifiers inside them are ignored;
+# newlines are tracked everywhere so every token carries its line number.
+TOKEN_RE = re.compile(r"""
+    (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<string>\$?@"(?:[^"]|"")*"|@\$"(?:[^"]|"")*"|\$?"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])'|'\\u[0-9A-Fa-f]{4}')
+  | (?P<ident>@?[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<arrow>=>)
+  | (?P<newline>\n)
+  | (?P<punct>[{}();,<>\[\].:=?])
+  | (?P<other>\S)
+""", re.S | re.X)
+RAZOR_IDENT_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+TYPE_KEYWORDS = {"class", "interface", "struct", "enum", "record"}
+CONTROL_KEYWORDS = {"if", "for", "foreach", "while", "switch", "catch", "using", "lock", "fixed", "do", "else",
+                    "try", "finally", "return", "new", "get", "set", "init", "add", "remove", "unchecked", "checked"}
+CSHARP_KEYWORDS = {
+    "abstract", "as", "async", "await", "base", "bool", "break", "byte", "case", "catch", "char", "checked", "class",
+    "const", "continue", "decimal", "default", "delegate", "do", "double", "else", "enum", "event", "explicit",
+    "extern", "false", "finally", "fixed", "float", "for", "foreach", "get", "goto", "if", "implicit", "in", "int",
+    "interface", "internal", "is", "lock", "long", "namespace", "new", "null", "object", "operator", "out",
+    "override", "params", "partial", "private", "protected", "public", "readonly", "record", "ref", "return",
+    "sbyte", "sealed", "set", "short", "sizeof", "static", "string", "struct", "switch", "this", "throw", "true",
+    "try", "typeof", "uint", "ulong", "unchecked", "unsafe", "ushort", "using", "var", "virtual", "void",
+    "volatile", "while", "where", "yield",
+}
+ACTION_RESULT_TYPES = ("IActionResult", "ActionResult", "ViewResult", "PartialViewResult")
+CSHARP_MODIFIERS = {"public", "private", "protected", "internal", "static", "virtual", "override", "abstract",
+                    "sealed", "async", "extern", "unsafe", "new", "partial", "readonly"}
+
+
+def tokenize(source: str) -> List[Tuple[str, str, int]]:
+    """
+    Splits C# source into (kind, value, line) tokens, dropping comments and whitespace.
+    """
+    tokens = []
+    line = 1
+    for match in TOKEN_RE.finditer(source):
+        kind = match.lastgroup
+        value = match.group()
+        if kind == "newline":
+            line += 1
+            continue
+        if kind != "comment":
+            tokens.append((kind, value, line))
+        line += value.count("\n")
+    return tokens
+
+
+def _first(values: List[str], needle: str) -> int:
+    return values.index(needle) if needle in values else len(values)
+
+
+def _strip_attributes(buffer: List[Tuple[str, str, int]]) -> List[Tuple[str, str, int]]:
+    # Drop leading [Attribute(...)] groups so they don't confuse the declaration patterns
+    result, depth = [], 0
+    for token in buffer:
+        if token[1] == "[" and (depth or not result or result[-1][1] in ("]",)):
+            depth += 1
+            continue
+        if depth:
+            if token[1] == "]":
+                depth -= 1
+            continue
+        result.append(token)
+    return result
+
+
+def _paren_name(buffer: List[Tuple[str, str, int]]) -> Optional[Tuple[int, str]]:
+    """
+    Returns (index, name) of the identifier right before the first top-level '(' of a declaration.
+    """
+    angle = 0
+    for i, (kind, value, _) in enumerate(buffer):
+        if value == "<":
+            angle += 1
+        elif value == ">":
+            angle = max(0, angle - 1)
+        elif value == "(" and angle == 0:
+            j = i - 1
+            if j >= 0 and buffer[j][1] == ">": # Generic method: Name<T>(
+                depth = 0
+                while j >= 0:
+                    if buffer[j][1] == ">":
+                        depth += 1
+                    elif buffer[j][1] == "<":
+                        depth -= 1
+                        if depth == 0:
+                            break
+                    j -= 1
+                j -= 1
+            if j >= 0 and buffer[j][0] == "ident":
+                return j, buffer[j][1]
+            return None
+    return None
+
+
+class _Scope:
+    def __init__(self, kind: str, symbol: Optional[Dict[str, Any]] = None, name: Optional[str] = None):
+        self.kind = kind       # "namespace", "type", "member" or "block"
+        self.symbol = symbol
+        self.name = name
+        self.body_tokens: List[Tuple[str, str, int]] = []
+
+
+def parse_csharp(source: str) -> List[Dict[str, Any]]:
+    """
+    Extracts namespaces, types, methods, constructors and properties with their line ranges.
+
+    Returns:
+        A list of symbol dictionaries with 'name', 'kind', 'container', 'namespace', 'start_line',
+        'end_line' and, for methods, 'return_type'.
+    """
+    tokens = tokenize(source)
+    symbols: List[Dict[str, Any]] = []
+    scopes: List[_Scope] = []
+    file_namespace = None
+    buffer: List[Tuple[str, str, int]] = []
+
+    def current_namespace() -> Optional[str]:
+        names = [s.name for s in scopes if s.kind == "namespace"]
+        return ".".join(names) if names else file_namespace
+
+    def current_type() -> Optional[_Scope]:
+        for scope in reversed(scopes):
+            if scope.kind == "type":
+                return scope
+            if scope.kind in ("member", "block"):
+                return None
+        return None
+
+    def container_name() -> Optional[str]:
+        names = [s.name for s in scopes if s.kind == "type"]
+        return ".".join(names) if names else None
+
+    def make_symbol(name: str, kind: str, start_line: int, **extra) -> Dict[str, Any]:
+        symbol = {"name": name, "kind": kind, "container": container_name(), "namespace": current_namespace(),
+                  "start_line": start_line, "end_line": start_line, **extra}
+        symbols.append(symbol)
+        return symbol
+
+    def member_symbol(decl: List[Tuple[str, str, int]], expression_bodied: bool) -> Optional[Dict[str, Any]]:
+        type_scope = current_type()
+        if type_scope is None or not decl:
+            return None
+        values = [v for _, v, _ in decl]
+        if values[0] in CONTROL_KEYWORDS or "=" in values[:_first(values, "=>")]:
+            return None
+        arrow = _first(values, "=>")
+        found = _paren_name(decl[:arrow])
+        if found is not None:
+            index, name = found
+            if name in CONTROL_KEYWORDS or name in ("nameof", "typeof", "sizeof", "default"):
+                return None
+            if name == type_scope.name:
+                return make_symbol(name, "constructor", decl[0][2])
+            type_tokens = [t for t in decl[:index] if t[1] not in CSHARP_MODIFIERS]
+            return_type = "".join((" " if i and t[0] == "ident" and type_tokens[i - 1][0] == "ident" else "") + t[1]
+                                  for i, t in enumerate(type_tokens))
+            return make_symbol(name, "method", decl[0][2], return_type=return_type, public="public" in values[:index])
+        head = values[:arrow] if expression_bodied else values
+        if len(head) >= 2 and decl[len(head) - 1][0] == "ident" and decl[len(head) - 2][0] == "ident" or \
+                (len(head) >= 2 and head[-2] in (">", "?", "]") and decl[len(head) - 1][0] == "ident"):
+            return make_symbol(head[-1], "property", decl[0][2])
+        return None
+
+    for kind, value, line in tokens:
+        if scopes and scopes[-1].kind == "member":
+            scopes[-1].body_tokens.append((kind, value, line))
+
+        if value == "{":
+            decl = _strip_attributes(buffer)
+            values = [v for _, v, _ in decl]
+            scope = _Scope("block")
+            if "namespace" in values:
+                idx = values.index("namespace")
+                scope = _Scope("namespace", name="".join(values[idx + 1:]))
+                scope.symbol = make_symbol(scope.name, "namespace", decl[idx][2])
+            elif any(v in TYPE_KEYWORDS for v in values) and "=>" not in values and "new" not in values:
+                idx = next(i for i, v in enumerate(values) if v in TYPE_KEYWORDS)
+                if idx + 1 < len(values) and decl[idx + 1][0] == "ident":
+                    name = values[idx + 1]
+                    scope = _Scope("type", name=name)
+                    scope.symbol = make_symbol(name, values[idx], decl[0][2])
+            elif "=>" not in values:
+                symbol = member_symbol(decl, expression_bodied=False)
+                if symbol is not None:
+                    scope = _Scope("member", symbol=symbol, name=symbol["name"])
+            scopes.append(scope)
+            buffer = []
+        elif value == "}":
+            if scopes:
+                scope = scopes.pop()
+                if scope.symbol is not None:
+                    scope.symbol["end_line"] = line
+                    if scope.kind == "member":
+                        scope.symbol["_body"] = scope.body_tokens
+            buffer = []
+        elif value == ";":
+            decl = _strip_attributes(buffer)
+            values = [v for _, v, _ in decl]
+            if values[:1] == ["namespace"] and not scopes:
+                file_namespace = "".join(values[1:])
+                make_symbol(file_namespace, "namespace", decl[0][2])
+            elif "=>" in values:
+                symbol = member_symbol(decl, expression_bodied=True)
+                if symbol is not None:
+                    symbol["end_line"] = line
+                    symbol["_body"] = decl[_first(values, "=>"):]
+            buffer = []
+        else:
+            buffer.append((kind, value, line))
+
+    # Controller actions: remember which view each action renders
+    for symbol in symbols:
+        body = symbol.pop("_body", None)
+        if symbol["kind"] != "method" or not (symbol.get("container") or "").endswith("Controller"):
+            continue
+        if not symbol.get("public") or not any(t in symbol.get("return_type", "") for t in ACTION_RESULT_TYPES):
+            continue
+        view_name = None # Actions that only redirect don't render a view
+        for i, (kind, value, _) in enumerate(body or []):
+            if kind == "ident" and value in ("View", "PartialView") and i + 2 < len(body) and body[i + 1][1] == "(":
+                view_name = symbol["name"]
+                if body[i + 2][0] == "string" and body[i + 2][1].startswith('"'):
+                    view_name = body[i + 2][1].strip('"')
+                break
+        symbol["kind"] = "action"
+        symbol["view"] = view_name
+    for symbol in symbols:
+        symbol.pop("_body", None)
+        symbol.pop("public", None)
+    return symbols
+
+
+def _identifier_lines(source: str, razor: bool) -> Dict[str, List[int]]:
+    refs: Dict[str, List[int]] = {}
+    if razor:
+        for line_no, line in enumerate(source.splitlines(), start=1):
+            for name in set(RAZOR_IDENT_RE.findall(line)):
+                refs.setdefault(name, []).append(line_no)
+        return refs
+    for kind, value, line in tokenize(source):
+        if kind == "ident":
+            name = value.lstrip("@")
+            if name in CSHARP_KEYWORDS:
+                continue
+            lines = refs.setdefault(name, [])
+            if not lines or lines[-1] != line:
+                lines.append(line)
+    return refs
+
+
+def _ends_with_qualified(qualified: str, name: str) -> bool:
+    # Whole dotted segments only: "Controller.Index" must not match "HomeController.Index"
+    return qualified == name or qualified.endswith("." + name)
+
+
+class CSharpSymbolIndex:
+    """
+    Persistent symbol table for the C# and Razor files of CodeBase.
+
+    Per file it stores the declared symbols (with line ranges) and the lines on which every
+    identifier occurs, in `<cache_dir>/csharp_symbols.json`. It follows the CodeFileIndex, so
+    only files whose size/mtime changed are re-parsed.
+    """
+
+    def __init__(self, file_index: CodeFileIndex = code_file_index, cache_dir: str = CACHE_DIR):
+        self.file_index = file_index
+        self.index_path = os.path.join(cache_dir, "csharp_symbols.json")
+        self._files: Dict[str, Dict[str, Any]] = {}
+        self._synced_version = -1
+        self._lock = threading.RLock()
+        self._loaded = False # The persisted index is read on first use, not at import
+
+    def _load(self) -> None:
+        try:
+            data = warm_snapshot.take("csharp_symbol_index")
+            if data is None:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            if data.get("version") == INDEX_VERSION and data.get("root") == self.file_index.root:
+                self._files = data["files"]
+        except (OSError, ValueError, KeyError):
+            self._files = {}
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    load_timed("csharp_symbol_index", self._load)
+                    self._loaded = True
+
+    def _state(self) -> Dict[str, Any]:
+        return {"version": INDEX_VERSION, "root": self.file_index.root, "files": self._files}
+
+    def snapshot_state(self) -> Optional[Dict[str, Any]]:
+        """
+        The index as stored in the warm-state snapshot (None when it was never loaded in this process).
+        """
+        if not self._loaded:
+            return None
+        with self._lock:
+            return self._state()
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._state(), f)
+        os.replace(tmp_path, self.index_path)
+
+    def refresh(self) -> Dict[str, int]:
+        """
+        Re-parses C#/Razor files that were added or changed since the last sync with the file index.
+
+        Returns:
+            Counts of added, updated and removed files.
+        """
+        changes = {"added": 0, "updated": 0, "removed": 0}
+        self._ensure_loaded()
+        files = {p: m for p, m in self.file_index.files().items()
+                 if m["language"] in ("csharp", "razor") and not m["ignored"]}
+        with self._lock:
+            if self.file_index.version == self._synced_version and len(files) == len(self._files):
+                return changes
+            for rel_path, meta in files.items():
+                known = self._files.get(rel_path)
+                if known and known["size"] == meta["size"] and known["mtime_ns"] == meta["mtime_ns"]:
+                    continue
+                try:
+                    with open(os.path.join(self.file_index.root, rel_path), 'r', encoding='utf-8', errors='replace') as f:
+                        source = f.read()
+                except OSError:
+                    continue
+                razor = meta["language"] == "razor"
+                self._files[rel_path] = {
+                    "size": meta["size"],
+                    "mtime_ns": meta["mtime_ns"],
+                    "symbols": [] if razor else parse_csharp(source),
+                    "refs": _identifier_lines(source, razor),
+                }
+                changes["updated" if known else "added"] += 1
+            for rel_path in [p for p in self._files if p not in files]:
+                del self._files[rel_path]
+                changes["removed"] += 1
+            self._synced_version = self.file_index.version
+            if any(changes.values()):
+                self._save()
+        return changes
+
+    def _view_path(self, controller_rel_path: str, controller: str, view: str) -> Optional[str]:
+        # Views live next to the Controllers folder of the same project
+        project = controller_rel_path.split("Controllers/")[0] if "Controllers/" in controller_rel_path else ""
+        folder = controller[:-len("Controller")] if controller.endswith("Controller") else controller
+        for candidate in (f"{project}Views/{folder}/{view}.cshtml", f"{project}Views/Shared/{view}.cshtml"):
+            if candidate in self._files:
+                return candidate
+        return None
+
+    def find_symbol(self, name: str, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Finds declarations by name ("Index"), or qualified by their container ("HomeController.Index").
+
+        Args:
+            name: Symbol name, optionally prefixed by its containing type(s) with dots.
+            kind: Optional filter: namespace, class, interface, struct, enum, record, method, constructor, property, action.
+
+        Returns:
+            A list of symbols with file path and 1-based start/end lines; actions also carry their view.
+        """
+        self.refresh()
+        parts = name.split(".")
+        results = []
+        with self._lock:
+            for exact in (True, False):
+                for rel_path, entry in sorted(self._files.items()):
+                    for symbol in entry["symbols"]:
+                        qualified = ".".join(filter(None, [symbol.get("container"), symbol["name"]]))
+                        if exact:
+                            matched = symbol["name"] == parts[-1] and (len(parts) == 1 or _ends_with_qualified(qualified, name))
+                        else:
+                            matched = symbol["name"].lower() == parts[-1].lower() and \
+                                (len(parts) == 1 or _ends_with_qualified(qualified.lower(), name.lower()))
+                        if not matched or (kind and symbol["kind"] != kind and not (kind == "method" and symbol["kind"] == "action")):
+                            continue
+                        result = {**symbol, "qualified_name": ".".join(filter(None, [symbol.get("namespace"), qualified])),
+                                  "file": os.path.join(self.file_index.root, *rel_path.split("/")), "relative_path": rel_path}
+                        if symbol.get("view"):
+                            view_path = self._view_path(rel_path, symbol.get("container") or "", symbol["view"])
+                            result["view_file"] = os.path.join(self.file_index.root, *view_path.split("/")) if view_path else None
+                        results.append(result)
+                if results:
+                    break # Only fall back to case-insensitive matching when nothing matched exactly
+        return results
+
+    def find_references(self, name: str, max_results: int = 200) -> Dict[str, Any]:
+        """
+        Lists every line (outside comments and strings in C#) where an identifier occurs.
+
+        Args:
+            name: The identifier to look for (e.g. "ErrorViewModel").
+            max_results: The maximum number of lines to return.
+
+        Returns:
+            A dictionary with 'references' (file, line, snippet, is_definition) and 'truncated'.
+        """
+        self.refresh()
+        references = []
+        truncated = False
+        with self._lock:
+            hits = [(rel_path, entry) for rel_path, entry in sorted(self._files.items()) if name in entry["refs"]]
+        for rel_path, entry in hits:
+            definitions = {s["start_line"] for s in entry["symbols"] if s["name"] == name}
+            file_path = os.path.join(self.file_index.root, *rel_path.split("/"))
+            try:
+                with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+                    lines = f.read().splitlines()
+            except OSError:
+                lines = []
+            for line_no in entry["refs"][name]:
+                if len(references) >= max_results:
+                    truncated = True
+                    break
+                snippet = lines[line_no - 1].strip()[:200] if line_no <= len(lines) else ""
+                references.append({"file": file_path, "relative_path": rel_path, "line": line_no,
+                                   "snippet": snippet, "is_definition": line_no in definitions})
+            if truncated:
+                break
+        return {"references": references, "truncated": truncated}
+
+
+# Shared instance used by the server tools
+csharp_symbol_index = CSharpSymbolIndex()
+warm_snapshot.register("csharp_symbol_index", csharp_symbol_index.snapshot_state)
@@ -1,50 +1,188 @@
-# Python
+import sys
+import time
+import random
+import bisect
+import itertools
 import sqlite3
-import os
+import argparse
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
 
-# Define the database path
-db_path = os.path.join(os.getcwd(), "ticket_topics.db")
+import ticket_search
+from utils import DB_PATH
 
-# Connect to the SQLite database (it will be created if it doesn't exist)
-conn = sqlite3.connect(db_path)
-cursor = conn.cursor()
+# The original sample topics; tickets 1-20 keep exactly these, larger databases draw from the same list
+SAMPLE_TOPICS = [
+    "Data Analysis", "Machine Learning", "Web Development", "Data Visualization", "Natural Language Processing",
+    "Cybersecurity", "Cloud Computing", "Mobile App Development", "Game Development", "Artificial Intelligence",
+    "DevOps", "Database Management", "E-commerce Solutions", "Blockchain Technology", "Internet of Things",
+    "Software Testing", "UI/UX Design", "Big Data", "Digital Marketing", "IT Support",
+]
+STATUSES = ["open", "in_progress", "waiting_on_customer", "resolved", "closed"]
+STATUS_WEIGHTS = [10, 15, 10, 35, 30]
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+CREATED_SPAN_DAYS = 730
 
-# Create a table to store ticket ID and related topics
-cursor.execute("""
+SCHEMA = """
 CREATE TABLE IF NOT EXISTS ticket_topics (
     ticket_id INTEGER PRIMARY KEY,
-    topic TEXT NOT NULL
+    topic TEXT NOT NULL,
+    customer_id TEXT,
+    campaign_id TEXT,
+    ad_id TEXT,
+    created_at TEXT,
+    status TEXT
 )
-""")
-
-# Insert sample data
-sample_data = [
-    (1, "Data Analysis"),
-    (2, "Machine Learning"),
-    (3, "Web Development"),
-    (4, "Data Visualization"),
-    (5, "Natural Language Processing"),
-    (6, "Cybersecurity"),
-    (7, "Cloud Computing"),
-    (8, "Mobile App Development"),
-    (9, "Game Development"),
-    (10, "Artificial Intelligence"),
-    (11, "DevOps"),
-    (12, "Database Management"),
-    (13, "E-commerce Solutions"),
-    (14, "Blockchain Technology"),
-    (15, "Internet of Things"),
-    (16, "Software Testing"),
-    (17, "UI/UX Design"),
-    (18, "Big Data"),
-    (19, "Digital Marketing"),
-    (20, "IT Support")
-]
+"""
+# Columns added after the original (ticket_id, topic) schema; older databases are migrated in place
+EXTRA_COLUMNS = [("customer_id", "TEXT"), ("campaign_id", "TEXT"), ("ad_id", "TEXT"), ("created_at", "TEXT"), ("status", "TEXT")]
+INDEXES = {
+    # Tickets of one topic, newest first (topic listings and topic-based searches)
+    "idx_ticket_topics_topic_created": "topic, created_at",
+    "idx_ticket_topics_customer": "customer_id",
+    "idx_ticket_topics_campaign": "campaign_id, ad_id",
+    "idx_ticket_topics_status_created": "status, created_at",
+}
+
+
+def ensure_schema(conn: sqlite3.Connection) -> None:
+    """
+    Creates the ticket table, or adds the newer columns to a database created with the original schema.
+    """
+    conn.execute(SCHEMA)
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(ticket_topics)")}
+    for column, column_type in EXTRA_COLUMNS:
+        if column not in existing:
+            conn.execute(f"ALTER TABLE ticket_topics ADD COLUMN {column} {column_type}")
+
+
+def iter_tickets(count: int, seed: int = 42, topics: Sequence[str] = SAMPLE_TOPICS, customers: int = None,
+                 campaigns_per_customer: int = 20, ads_per_campaign: int = 10) -> Iterator[Tuple]:
+    """
+    Yields `count` ticket rows (ticket_id, topic, customer_id, campaign_id, ad_id, created_at, status).
+
+    Rows only depend on the seed and their position, so the same arguments always produce the same
+    database. Topic and customer popularity are skewed (a few topics/customers get most tickets),
+    and created_at grows with the ticket ID like a real ticket queue.
+    """
+    rng = random.Random(seed)
+    customers = customers or max(1, count // 50)
+    # Zipf-like weights: topic k is ~1/k as frequent as the most common one.
+    # Cumulative weights + bisect instead of rng.choices(), which rebuilds them on every call.
+    topic_cumulative = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(topics))))
+    status_cumulative = list(itertools.accumulate(STATUS_WEIGHTS))
+    customer_ids = [f"C{customer:07d}" for customer in range(customers + 1)]
+    epoch = int(EPOCH.timestamp())
+    span = CREATED_SPAN_DAYS * 86400
+    days: Dict[int, str] = {} # Day number -> "YYYY-MM-DD"; strftime per row would dominate the generation time
+    for ticket_id in range(1, count + 1):
+        if topics is SAMPLE_TOPICS and ticket_id <= len(SAMPLE_TOPICS):
+            topic = SAMPLE_TOPICS[ticket_id - 1]
+        else:
+            topic = topics[bisect.bisect(topic_cumulative, rng.random() * topic_cumulative[-1])]
+        customer = min(customers, int(customers * rng.random() ** 2) + 1)
+        campaign = f"CMP{customer:07d}{int(rng.random() * campaigns_per_customer):03d}"
+        day, second = divmod(epoch + int(span * (ticket_id - rng.random()) / count), 86400)
+        date = days.get(day)
+        if date is None:
+            date = days[day] = time.strftime("%Y-%m-%d", time.gmtime(day * 86400))
+        yield (
+            ticket_id,
+            topic,
+            customer_ids[customer],
+            campaign,
+            f"AD{campaign[3:]}{int(rng.random() * ads_per_campaign):02d}",
+            f"{date}T{second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d}Z",
+            STATUSES[bisect.bisect(status_cumulative, rng.random() * status_cumulative[-1])],
+        )
+
+
+def _batches(rows: Iterator[Tuple], batch_size: int) -> Iterator[List[Tuple]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def generate_tickets(db_path: str = DB_PATH, count: int = len(SAMPLE_TOPICS), seed: int = 42,
+                     topics: Sequence[str] = SAMPLE_TOPICS, reset: bool = False, overwrite: bool = False,
+                     batch_size: int = 50000, verbose: bool = False) -> Dict[str, Any]:
+    """
+    Bulk-loads `count` deterministic tickets into the ticket database.
+
+    Rows are written in one transaction per batch, with synchronous writes off during the load.
+    Tickets that already exist are kept as they are (INSERT OR IGNORE), so running the generator
+    against a live database never rewrites real tickets; pass reset or overwrite to replace them. The secondary indexes are (re)created after the load, which is much
+    faster than maintaining them row by row, and ANALYZE refreshes the planner statistics.
+    The topic search tables (see ticket_search.py) are likewise rebuilt once at the end.
+
+    Args:
+        db_path: The SQLite database to write.
+        count: Number of tickets (IDs 1..count).
+        seed: Seed of the generated data.
+        topics: The topic vocabulary.
+        reset: Drop the existing ticket table first.
+        overwrite: Replace existing tickets with the same IDs (INSERT OR REPLACE).
+        batch_size: Rows per transaction.
+        verbose: Print progress to stderr.
+
+    Returns:
+        A summary with the row count, the number of tickets actually inserted, elapsed time and rows per second.
+    """
+    started = time.perf_counter()
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("PRAGMA cache_size=-65536") # 64 MiB page cache for the index builds
+        if reset:
+            conn.execute("DROP TABLE IF EXISTS ticket_topics")
+        ensure_schema(conn)
+        for name in INDEXES: # Dropped for the load, rebuilt below
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+        conn.commit()
+        ticket_search.drop_triggers(conn) # The topic search tables are rebuilt in one pass below
+
+        verb = "INSERT OR REPLACE" if reset or overwrite else "INSERT OR IGNORE"
+        changes_before = conn.total_changes
+        written = 0
+        for batch in _batches(iter_tickets(count, seed, topics), batch_size):
+            with conn: # One transaction per batch
+                conn.executemany(f"{verb} INTO ticket_topics (ticket_id, topic, customer_id, campaign_id, "
+                                 "ad_id, created_at, status) VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+            written += len(batch)
+            if verbose:
+                elapsed = time.perf_counter() - started
+                print(f"  {written:,}/{count:,} tickets ({written / elapsed:,.0f} rows/sec)", file=sys.stderr)
+
+        inserted = conn.total_changes - changes_before
+        with conn:
+            for name, columns in INDEXES.items():
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON ticket_topics ({columns})")
+            conn.execute("ANALYZE ticket_topics")
+        ticket_search.install(conn, rebuild=True)
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - started
+    return {"db_path": db_path, "tickets": count, "inserted": inserted, "seed": seed, "elapsed_seconds": round(elapsed, 2),
+            "rows_per_sec": round(count / elapsed) if elapsed else 0}
 
-cursor.executemany("INSERT OR IGNORE INTO ticket_topics (ticket_id, topic) VALUES (?, ?)", sample_data)
 
-# Commit changes and close the connection
-conn.commit()
-conn.close()
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic ticket database.")
+    parser.add_argument("--db-path", default=DB_PATH, help="Database file (default: TICKET_DB_PATH or ticket_topics.db next to the server).")
+    parser.add_argument("--tickets", type=int, default=len(SAMPLE_TOPICS), help="Number of tickets to generate.")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the generated data.")
+    parser.add_argument("--batch-size", type=int, default=50000, help="Rows per transaction.")
+    parser.add_argument("--reset", action="store_true", help="Drop the existing tickets first.")
+    parser.add_argument("--overwrite", action="store_true", help="Replace existing tickets with the same IDs (default: keep them).")
+    args = parser.parse_args()
 
-print(f"Database created at: {db_path}")
\ No newline at end of file
+    report = generate_tickets(args.db_path, args.tickets, seed=args.seed, reset=args.reset,
+                              overwrite=args.overwrite, batch_size=args.batch_size, verbose=args.tickets > args.batch_size)
+    print(f"Wrote {report['inserted']:,} of {report['tickets']:,} tickets to {report['db_path']} in {report['elapsed_seconds']}s "
+          f"({report['rows_per_sec']:,} rows/sec).")
@@ -0,0 +1,246 @@
+import os
+import json
+import random
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, Optional, Set, Tuple
+
+import httpx # Async HTTP client with keep-alive connection pools
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+
+
+class BackendError(Exception):
+    """
+    Raised when a backend request fails after all retries.
+    """
+
+
+class BackendClient:
+    """
+    Shared async client for one internal backend (Ads API, ticketing system, log service, ...).
+
+    - Keep-alive connection pool per backend (httpx.AsyncClient).
+    - Bounded concurrency: at most `max_concurrency` requests in flight to the backend.
+    - Per-request timeout and retries with exponential backoff plus full jitter.
+    - Single-flight coalescing: identical GETs that are already in flight share one request.
+    """
+
+    def __init__(self, name: str, base_url: str, headers: Optional[Dict[str, str]] = None,
+                 max_concurrency: int = 8, max_keepalive: int = 8, timeout: float = 10.0,
+                 retries: int = 3, backoff: float = 0.2, max_backoff: float = 5.0):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.headers = headers or {}
+        self.max_concurrency = max_concurrency
+        self.max_keepalive = max_keepalive
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stats = {"requests": 0, "retries": 0, "coalesced": 0, "failures": 0}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._in_flight: Dict[Tuple, asyncio.Future] = {}
+        self._closing: Set[asyncio.Future] = set()
+
+    def _ensure_client(self) -> httpx.AsyncClient:
+        # The pool and semaphore belong to the running event loop; rebuild them if the loop changed
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            if self._client is not None:
+                self._close_stale_client(self._client, self._loop)
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_keepalive),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._in_flight = {}
+            self._loop = loop
+        return self._client
+
+    def _close_stale_client(self, client: httpx.AsyncClient, old_loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Closes the pool of a previous event loop instead of leaking its keep-alive connections: on that loop
+        if it still runs (another thread), otherwise best-effort on the current one.
+        """
+        if old_loop is not None and old_loop.is_running() and not old_loop.is_closed():
+            asyncio.run_coroutine_threadsafe(client.aclose(), old_loop)
+            return
+
+        async def close() -> None:
+            try:
+                await client.aclose()
+            except Exception as e: # Its sockets may belong to the closed loop; they are dropped either way
+                logger.debug("%s: closing the previous connection pool failed: %s", self.name, e)
+
+        task = asyncio.ensure_future(close())
+        self._closing.add(task) # Keep a reference until it is done
+        task.add_done_callback(self._closing.discard)
+
+    def _delay(self, attempt: int) -> float:
+        # Full jitter: uniform in [0, min(max_backoff, backoff * 2^attempt)]
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    async def request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                      headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """
+        Sends one request with the retry policy applied (no coalescing).
+
+        Args:
+            method: HTTP method.
+            path: Path relative to the backend's base URL.
+            params: Query parameters.
+            headers: Extra request headers (e.g. Range).
+
+        Returns:
+            The successful httpx.Response.
+
+        Raises:
+            BackendError: If the request still fails after all retries.
+        """
+        client = self._ensure_client()
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.stats["retries"] += 1
+                await asyncio.sleep(self._delay(attempt - 1))
+            try:
+                async with self._semaphore:
+                    self.stats["requests"] += 1
+                    response = await client.request(method, path, params=params, headers=headers)
+                if response.status_code in RETRYABLE_STATUS_CODES:
+                    last_error = BackendError(f"{self.name} returned HTTP {response.status_code} for {path}")
+                    continue
+                response.raise_for_status()
+                return response
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                last_error = e
+                logger.debug("%s request %s %s failed (attempt %d): %s", self.name, method, path, attempt + 1, e)
+            except httpx.HTTPStatusError as e:
+                # Client errors won't get better by retrying
+                self.stats["failures"] += 1
+                raise BackendError(f"{self.name} returned HTTP {e.response.status_code} for {path}") from e
+        self.stats["failures"] += 1
+        raise BackendError(f"{self.name} request to {path} failed after {self.retries + 1} attempts: {last_error}")
+
+    async def get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        GETs a JSON document from the backend.
+
+        Args:
+            path: Path relative to the backend's base URL.
+            params: Query parameters; entries whose value is None are dropped.
+
+        Returns:
+            The decoded JSON body.
+
+        Raises:
+            BackendError: If the request still fails after all retries.
+        """
+        self._ensure_client()
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        key = ("GET", path, json.dumps(params, sort_keys=True, default=str))
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(in_flight)
+
+        async def fetch_json() -> Any:
+            return (await self.request("GET", path, params=params)).json()
+
+        task = asyncio.ensure_future(fetch_json())
+        self._in_flight[key] = task
+        task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def stream_lines(self, path: str, params: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """
+        Streams a line-oriented response (e.g. NDJSON) without buffering the whole body.
+        Connection failures are retried only until the first line has been received.
+
+        Args:
+            path: Path relative to the backend's base URL.
+            params: Query parameters; entries whose value is None are dropped.
+
+        Yields:
+            The response body one line at a time.
+
+        Raises:
+            BackendError: If the stream cannot be opened after all retries.
+        """
+        client = self._ensure_client()
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.stats["retries"] += 1
+                await asyncio.sleep(self._delay(attempt - 1))
+            started = False
+            try:
+                async with self._semaphore:
+                    self.stats["requests"] += 1
+                    async with client.stream("GET", path, params=params) as response:
+                        if response.status_code in RETRYABLE_STATUS_CODES:
+                            last_error = BackendError(f"{self.name} returned HTTP {response.status_code} for {path}")
+                            continue
+                        if response.is_error:
+                            self.stats["failures"] += 1
+                            raise BackendError(f"{self.name} returned HTTP {response.status_code} for {path}")
+                        async for line in response.aiter_lines():
+                            started = True
+                            yield line
+                return
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                if started:
+                    self.stats["failures"] += 1
+                    raise BackendError(f"{self.name} stream from {path} broke off: {e}") from e
+                last_error = e
+        self.stats["failures"] += 1
+        raise BackendError(f"{self.name} stream from {path} failed after {self.retries + 1} attempts: {last_error}")
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# --- Backend registry ---
+
+# Base URLs of the internal APIs. A backend without a URL is treated as not configured.
+BACKEND_URLS = {
+    "ads": os.environ.get("ADS_API_URL"),
+    "tickets": os.environ.get("TICKETS_API_URL"),
+    "logs": os.environ.get("LOGS_API_URL"),
+    "cloud_logs": os.environ.get("CLOUD_LOGS_URL"),
+}
+API_TOKEN = os.environ.get("INTERNAL_API_TOKEN")
+
+_clients: Dict[str, BackendClient] = {}
+
+
+def get_backend(name: str) -> Optional[BackendClient]:
+    """
+    Returns the shared client for a backend, or None if its base URL is not configured.
+    """
+    base_url = BACKEND_URLS.get(name)
+    if not base_url:
+        return None
+    client = _clients.get(name)
+    if client is None or client.base_url != base_url.rstrip("/"):
+        headers = {"Authorization": f"Bearer {API_TOKEN}"} if API_TOKEN else {}
+        client = BackendClient(name, base_url, headers=headers)
+        _clients[name] = client
+    return client
+
+
+def backend_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Returns request/retry/coalescing counters for every backend client created so far.
+    """
+    return {name: dict(client.stats) for name, client in _clients.items()}
@@ -0,0 +1,120 @@
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Any, Tuple
+
+from wiki_cache import open_pdf, wiki_text_cache
+from wiki_index import WIKI_DIR, wiki_index
+
+
+def _extract_page_batch(file_path: str, page_numbers: List[int]) -> Tuple[str, Dict[int, str]]:
+    """
+    Worker entry point: extracts a batch of pages from one PDF.
+
+    Args:
+        file_path: The full path to the PDF file.
+        page_numbers: The 1-based page numbers to extract.
+
+    Returns:
+        The file path and a mapping of page number to extracted text.
+    """
+    with open(file_path, 'rb') as f:
+        reader = open_pdf(f)
+        return file_path, {page_no: reader.pages[page_no - 1].extract_text() or "" for page_no in page_numbers}
+
+
+def ingest_wikis(wiki_dir: str = WIKI_DIR, workers: int = None, batch_size: int = 4, force: bool = False,
+                 verbose: bool = True) -> Dict[str, Any]:
+    """
+    Extracts every uncached page of the wiki PDFs across a process pool, merges the text into
+    the wiki text cache and refreshes the BM25 index. Each PDF's cache entry is written once,
+    when the last of its batches has come back.
+
+    Args:
+        wiki_dir: Directory holding the wiki PDFs.
+        workers: Number of worker processes (default: number of CPUs).
+        batch_size: Number of pages handed to a worker at a time.
+        force: Re-extract every page even if it is already cached.
+        verbose: Print progress lines to stderr while ingesting.
+
+    Returns:
+        A dictionary with the files/pages processed, elapsed time and pages/sec throughput.
+    """
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+
+    # Plan the work: only pages that are not cached yet (or every page when forced)
+    tasks = []
+    errors = {}
+    pdf_files = sorted(f for f in os.listdir(wiki_dir) if f.lower().endswith(".pdf") and os.path.isfile(os.path.join(wiki_dir, f)))
+    for filename in pdf_files:
+        file_path = os.path.join(wiki_dir, filename)
+        try:
+            if force:
+                page_numbers = list(range(1, wiki_text_cache.num_pages(file_path) + 1))
+            else:
+                page_numbers = wiki_text_cache.missing_pages(file_path)
+        except Exception as e:
+            errors[filename] = str(e)
+            continue
+        for i in range(0, len(page_numbers), batch_size):
+            tasks.append((file_path, page_numbers[i:i + batch_size]))
+
+    total_pages = sum(len(pages) for _, pages in tasks)
+    done_pages = 0
+    batches_left: Dict[str, int] = {}
+    for file_path, _ in tasks:
+        batches_left[file_path] = batches_left.get(file_path, 0) + 1
+    extracted: Dict[str, Dict[int, str]] = {} # file path -> pages extracted so far
+    if tasks:
+        # forkserver, not fork: the server process runs threads, and forking those can deadlock the workers
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("forkserver")) as pool:
+            futures = {pool.submit(_extract_page_batch, file_path, pages): file_path for file_path, pages in tasks}
+            for future in as_completed(futures):
+                file_path = futures[future]
+                batches_left[file_path] -= 1
+                try:
+                    _, pages = future.result()
+                except Exception as e:
+                    errors[os.path.basename(file_path)] = str(e)
+                    pages = {}
+                extracted.setdefault(file_path, {}).update(pages)
+                if not batches_left[file_path] and extracted[file_path]:
+                    wiki_text_cache.store_pages(file_path, extracted.pop(file_path)) # One cache write per PDF
+                done_pages += len(pages)
+                if verbose:
+                    elapsed = time.perf_counter() - started
+                    print(f"[{done_pages}/{total_pages} pages] {done_pages / elapsed:.1f} pages/sec", file=sys.stderr)
+
+    # Pages are all cached now, so the index refresh only tokenizes
+    index_changes = None
+    if os.path.abspath(wiki_dir) == os.path.abspath(wiki_index.wiki_dir):
+        index_changes = wiki_index.refresh(force=True)
+    elapsed = time.perf_counter() - started
+    return {
+        "files": len(pdf_files),
+        "pages_extracted": done_pages,
+        "workers": workers,
+        "elapsed_seconds": round(elapsed, 3),
+        "pages_per_sec": round(done_pages / elapsed, 2) if elapsed > 0 else 0.0,
+        "index_changes": index_changes,
+        "errors": errors,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-extract and index the wiki PDFs across a process pool.")
+    parser.add_argument("--wiki-dir", default=WIKI_DIR, help="Directory holding the wiki PDFs.")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: CPU count).")
+    parser.add_argument("--batch-size", type=int, default=4, help="Pages handed to a worker at a time.")
+    parser.add_argument("--force", action="store_true", help="Re-extract pages that are already cached.")
+    args = parser.parse_args()
+
+    report = ingest_wikis(wiki_dir=args.wiki_dir, workers=args.workers, batch_size=args.batch_size, force=args.force)
+    print(f"Ingested {report['pages_extracted']} pages from {report['files']} PDFs "
+          f"in {report['elapsed_seconds']}s ({report['pages_per_sec']} pages/sec, {report['workers']} workers).")
+    for filename, error in report["errors"].items():
+        print(f"  Failed: {filename}: {error}")
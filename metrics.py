@@ -0,0 +1,235 @@
+import os
+import time
+import bisect
+import inspect
+import functools
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+# Latency histogram bucket upper bounds, in seconds (Prometheus-style, +Inf implied)
+LATENCY_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+RESERVOIR_SIZE = 2048 # Most recent latencies kept per tool for exact percentiles
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+class ToolMetrics:
+    """
+    Counters for one tool: calls, errors, a latency histogram plus a reservoir of recent
+    latencies, and request/response payload sizes.
+    """
+
+    __slots__ = ("calls", "errors", "exceptions", "latency_sum", "buckets", "recent", "payload_calls", "request_bytes", "response_bytes")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0      # Calls that raised or returned an {"error": ...} dictionary
+        self.exceptions = 0  # The subset that raised
+        self.latency_sum = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.recent = deque(maxlen=RESERVOIR_SIZE)
+        self.payload_calls = 0 # Calls that came in over the protocol (direct in-process calls have no payload)
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        recent = sorted(self.recent)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "exceptions": self.exceptions,
+            "error_rate": round(self.errors / self.calls, 4) if self.calls else 0.0,
+            "latency_ms": {
+                "mean": round(self.latency_sum / self.calls * 1000, 3) if self.calls else 0.0,
+                "p50": round(_percentile(recent, 0.50) * 1000, 3),
+                "p95": round(_percentile(recent, 0.95) * 1000, 3),
+                "p99": round(_percentile(recent, 0.99) * 1000, 3),
+                "max_recent": round(recent[-1] * 1000, 3) if recent else 0.0,
+            },
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+            "avg_response_bytes": round(self.response_bytes / self.payload_calls) if self.payload_calls else 0,
+        }
+
+
+class MetricsRegistry:
+    """
+    Per-tool call metrics plus pluggable cache statistics, for the metrics://server resource
+    and the Prometheus /metrics endpoint.
+
+    Recording a call costs two perf_counter reads, a bisect and a few integer updates under a lock.
+    Metrics are per process; with several HTTP workers each worker reports its own (labelled by pid).
+    """
+
+    def __init__(self):
+        self.tools: Dict[str, ToolMetrics] = {}
+        self.caches: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self.started_at = time.time()
+        self.on_first_call: Optional[Callable[[str], None]] = None # Called once, after the first recorded call
+        self._lock = threading.Lock()
+
+    def _tool(self, name: str) -> ToolMetrics:
+        metrics = self.tools.get(name)
+        if metrics is None:
+            with self._lock:
+                metrics = self.tools.setdefault(name, ToolMetrics())
+        return metrics
+
+    def record(self, name: str, seconds: float, error: bool, exception: bool = False) -> None:
+        metrics = self._tool(name)
+        with self._lock:
+            metrics.calls += 1
+            metrics.errors += error
+            metrics.exceptions += exception
+            metrics.latency_sum += seconds
+            metrics.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            metrics.recent.append(seconds)
+        if self.on_first_call is not None:
+            hook, self.on_first_call = self.on_first_call, None
+            hook(name)
+
+    def record_payload(self, name: str, request_bytes: int, response_bytes: int) -> None:
+        metrics = self._tool(name)
+        with self._lock:
+            metrics.payload_calls += 1
+            metrics.request_bytes += request_bytes
+            metrics.response_bytes += response_bytes
+
+    def register_cache(self, name: str, stats: Callable[[], Dict[str, Any]]) -> None:
+        self.caches[name] = stats
+
+    # --- instrumentation ---
+
+    def instrument(self, func: Callable, name: str = None) -> Callable:
+        """
+        Wraps a tool function (sync or async) so every call is timed and counted. The wrapper keeps
+        the function's name, docstring and signature, so FastMCP derives the same tool schema.
+        """
+        name = name or func.__name__
+
+        def finished(started: float, result: Any) -> Any:
+            self.record(name, time.perf_counter() - started, error=isinstance(result, dict) and "error" in result)
+            return result
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException:
+                    self.record(name, time.perf_counter() - started, error=True, exception=True)
+                    raise
+                return finished(started, result)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                self.record(name, time.perf_counter() - started, error=True, exception=True)
+                raise
+            return finished(started, result)
+        return wrapper
+
+    def instrument_server(self, server: Any) -> None:
+        """
+        Makes every tool registered on a FastMCP server afterwards go through instrument(), and
+        measures the serialized request/response size of each tools/call at the protocol layer.
+        Call it right after creating the server, before the @mcp.tool() definitions.
+        """
+        import mcp.types as types
+
+        original_tool = server.tool
+
+        def tool(name: str = None, description: str = None, annotations: Any = None):
+            register = original_tool(name=name, description=description, annotations=annotations)
+
+            def decorator(fn: Callable) -> Callable:
+                wrapped = self.instrument(fn, name=name)
+                register(wrapped)
+                return wrapped
+            return decorator
+
+        server.tool = tool
+
+        handlers = server._mcp_server.request_handlers # No public hook for wrapping request handlers
+        call_tool_handler = handlers[types.CallToolRequest]
+
+        async def measured_call_tool(request: types.CallToolRequest):
+            result = await call_tool_handler(request)
+            try:
+                request_bytes = len(types.CallToolRequestParams.model_dump_json(request.params))
+                response_bytes = sum(len(getattr(c, "text", "") or getattr(c, "data", "") or "") for c in result.root.content)
+                self.record_payload(request.params.name, request_bytes, response_bytes)
+            except Exception:
+                pass # Metrics must never break a tool call
+            return result
+
+        handlers[types.CallToolRequest] = measured_call_tool
+
+    # --- reporting ---
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            tools = {name: metrics.to_dict() for name, metrics in sorted(self.tools.items())}
+        caches = {}
+        for name, stats in self.caches.items():
+            try:
+                caches[name] = stats()
+            except Exception as e:
+                caches[name] = {"error": str(e)}
+        return {
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "tools": tools,
+            "caches": caches,
+        }
+
+    def prometheus(self) -> str:
+        """
+        Renders the metrics in the Prometheus text exposition format.
+        """
+        pid = os.getpid()
+        lines = [
+            "# HELP mcp_tool_calls_total Tool calls.", "# TYPE mcp_tool_calls_total counter",
+        ]
+        with self._lock:
+            tools = [(name, m.calls, m.errors, m.exceptions, m.latency_sum, list(m.buckets), m.request_bytes, m.response_bytes)
+                     for name, m in sorted(self.tools.items())]
+        for name, calls, *_ in tools:
+            lines.append(f'mcp_tool_calls_total{{tool="{name}",pid="{pid}"}} {calls}')
+        lines += ["# HELP mcp_tool_errors_total Tool calls that raised or returned an error.", "# TYPE mcp_tool_errors_total counter"]
+        for name, _, errors, *_ in tools:
+            lines.append(f'mcp_tool_errors_total{{tool="{name}",pid="{pid}"}} {errors}')
+        lines += ["# HELP mcp_tool_latency_seconds Tool latency.", "# TYPE mcp_tool_latency_seconds histogram"]
+        for name, calls, _, _, latency_sum, buckets, _, _ in tools:
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + [float("inf")], buckets):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'mcp_tool_latency_seconds_bucket{{tool="{name}",pid="{pid}",le="{le}"}} {cumulative}')
+            lines.append(f'mcp_tool_latency_seconds_sum{{tool="{name}",pid="{pid}"}} {latency_sum:.6f}')
+            lines.append(f'mcp_tool_latency_seconds_count{{tool="{name}",pid="{pid}"}} {calls}')
+        lines += ["# HELP mcp_tool_payload_bytes_total Serialized tool call payload sizes.", "# TYPE mcp_tool_payload_bytes_total counter"]
+        for name, *_, request_bytes, response_bytes in tools:
+            lines.append(f'mcp_tool_payload_bytes_total{{tool="{name}",pid="{pid}",direction="request"}} {request_bytes}')
+            lines.append(f'mcp_tool_payload_bytes_total{{tool="{name}",pid="{pid}",direction="response"}} {response_bytes}')
+        lines += ["# HELP mcp_cache_stat Cache counters (hits, misses, ...) reported by the server caches.", "# TYPE mcp_cache_stat gauge"]
+        for cache, stats in self.snapshot()["caches"].items():
+            for key, value in stats.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f'mcp_cache_stat{{cache="{cache}",stat="{key}",pid="{pid}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+# Shared instance used by the server
+metrics_registry = MetricsRegistry()
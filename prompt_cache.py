@@ -0,0 +1,70 @@
+import os
+import json
+import inspect
+import functools
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+
+PROMPT_CACHE_SIZE = int(os.environ.get("PROMPT_CACHE_SIZE", "512"))
+
+
+class PromptCache:
+    """
+    Bounded LRU of rendered prompts.
+
+    Entries are keyed by prompt name, the bound arguments and a data version (e.g. the ticket
+    topic table version), so a changed database makes old renders unreachable; they then age out
+    of the LRU instead of being invalidated one by one.
+    """
+
+    def __init__(self, max_entries: int = PROMPT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def memoize(self, version: Callable[[], Any]) -> Callable:
+        """
+        Decorator caching a prompt builder's output. `version` is called on every render and becomes part of the key.
+        The wrapper keeps the builder's signature, so it can sit under @mcp.prompt().
+        """
+        def decorator(func: Callable[..., str]) -> Callable[..., str]:
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs) -> str:
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                key = json.dumps([func.__name__, bound.arguments, version()], sort_keys=True, default=str)
+                with self._lock:
+                    rendered = self._entries.get(key)
+                    if rendered is not None:
+                        self._entries.move_to_end(key)
+                        self.stats["hits"] += 1
+                        return rendered
+                    self.stats["misses"] += 1
+                rendered = func(*args, **kwargs)
+                with self._lock:
+                    self._entries[key] = rendered
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                        self.stats["evictions"] += 1
+                return rendered
+            return wrapper
+        return decorator
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {**self.stats, "entries": len(self._entries), "max_entries": self.max_entries,
+                    "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0}
+
+
+# Shared instance used by the server prompts
+prompt_cache = PromptCache()
@@ -0,0 +1,192 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Any, Callable, Dict, List, Optional
+
+from pydantic import AnyUrl
+
+logger = logging.getLogger(__name__)
+
+WATCH_INTERVAL = float(os.environ.get("RESOURCE_WATCH_INTERVAL", "1.0"))
+
+
+def _normalize_uri(uri: Any) -> str:
+    # Clients send back the URI as parsed by pydantic (e.g. "wikis://available"), so compare in that form
+    return str(AnyUrl(str(uri)))
+
+
+class WatchedResource:
+    """
+    A rendered resource cached in memory and tied to the directory it lists.
+
+    Reads return the cached text; the watcher re-renders it only after the directory's mtime
+    changes (i.e. an entry was added, removed or renamed).
+    """
+
+    def __init__(self, uri: str, directory: str, render: Callable[[], str]):
+        self.uri = uri
+        self.directory = directory
+        self.render = render
+        self._text: Optional[str] = None
+        self._signature: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _directory_signature(self) -> Optional[int]:
+        try:
+            return os.stat(self.directory).st_mtime_ns
+        except OSError:
+            return None
+
+    def read(self) -> str:
+        with self._lock:
+            if self._text is None:
+                self._signature = self._directory_signature()
+                self._text = self.render()
+            return self._text
+
+    def check(self) -> bool:
+        """
+        Re-renders the resource if its directory changed. Returns True when the text changed.
+        """
+        signature = self._directory_signature()
+        with self._lock:
+            if self._text is None or signature == self._signature:
+                return False
+            self._signature = signature
+            text = self.render()
+            changed = text != self._text
+            self._text = text
+            return changed
+
+
+class ResourceWatcher:
+    """
+    Polls the directories behind watched resources and pushes MCP notifications when they change.
+
+    Sessions are remembered when they read or subscribe to a watched resource. On a change,
+    subscribers of that URI get notifications/resources/updated (the set of resources itself never
+    changes, so no list_changed is sent). Notifications are sent on the session's own event loop.
+    """
+
+    def __init__(self, interval: float = WATCH_INTERVAL):
+        self.interval = interval
+        self.resources: Dict[str, WatchedResource] = {}
+        self._sessions: "weakref.WeakKeyDictionary[Any, asyncio.AbstractEventLoop]" = weakref.WeakKeyDictionary()
+        self._subscriptions: Dict[str, "weakref.WeakSet[Any]"] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"reads": 0, "renders_after_change": 0, "notifications_sent": 0}
+
+    def watch(self, uri: str, directory: str, render: Callable[[], str]) -> WatchedResource:
+        resource = WatchedResource(uri, directory, render)
+        self.resources[_normalize_uri(uri)] = resource
+        return resource
+
+    def read(self, resource: WatchedResource, session: Any = None) -> str:
+        self.stats["reads"] += 1
+        if session is not None:
+            self.remember(session)
+        self.ensure_started()
+        return resource.read()
+
+    # --- sessions ---
+
+    def remember(self, session: Any) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        with self._lock:
+            self._sessions[session] = loop
+
+    def subscribe(self, session: Any, uri: Any) -> None:
+        self.remember(session)
+        with self._lock:
+            self._subscriptions.setdefault(_normalize_uri(uri), weakref.WeakSet()).add(session)
+        self.ensure_started()
+
+    def unsubscribe(self, session: Any, uri: Any) -> None:
+        with self._lock:
+            subscribers = self._subscriptions.get(_normalize_uri(uri))
+            if subscribers is not None:
+                subscribers.discard(session)
+
+    def _send(self, session: Any, coroutine_factory: Callable[[Any], Any]) -> None:
+        with self._lock:
+            loop = self._sessions.get(session)
+        if loop is None or loop.is_closed():
+            return
+        future = asyncio.run_coroutine_threadsafe(coroutine_factory(session), loop)
+        future.add_done_callback(lambda f: f.exception() and logger.debug("Resource notification failed: %s", f.exception()))
+        self.stats["notifications_sent"] += 1
+
+    def notify_changed(self, uri: str) -> None:
+        with self._lock:
+            subscribers = list(self._subscriptions.get(uri, ()))
+        for session in subscribers:
+            self._send(session, lambda s: s.send_resource_updated(AnyUrl(uri)))
+
+    # --- polling ---
+
+    def poll(self) -> List[str]:
+        """
+        Checks every watched directory once and notifies about the resources that changed.
+        """
+        changed = []
+        for uri, resource in list(self.resources.items()):
+            try:
+                if resource.check():
+                    changed.append(uri)
+            except Exception as e:
+                logger.warning("Re-rendering %s failed: %s", uri, e)
+        for uri in changed:
+            self.stats["renders_after_change"] += 1
+            self.notify_changed(uri)
+        return changed
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            self.poll()
+
+    def ensure_started(self) -> None:
+        # Started lazily, so importing the server (e.g. from the CLIs) doesn't spawn a thread
+        if self._thread is None and self.interval > 0:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="resource-watcher", daemon=True)
+                    self._thread.start()
+
+    # --- MCP wiring ---
+
+    def enable_notifications(self, server: Any) -> None:
+        """
+        Registers resources/subscribe and resources/unsubscribe on a FastMCP server and advertises
+        the subscribe resource capability during initialization.
+        """
+        lowlevel = server._mcp_server # FastMCP has no public hook for these handlers yet
+
+        @lowlevel.subscribe_resource()
+        async def _subscribe(uri: AnyUrl) -> None:
+            self.subscribe(lowlevel.request_context.session, uri)
+
+        @lowlevel.unsubscribe_resource()
+        async def _unsubscribe(uri: AnyUrl) -> None:
+            self.unsubscribe(lowlevel.request_context.session, uri)
+
+        create_initialization_options = lowlevel.create_initialization_options
+
+        def create_options_with_notifications(notification_options=None, experimental_capabilities=None):
+            options = create_initialization_options(notification_options, experimental_capabilities)
+            if options.capabilities.resources is not None:
+                options.capabilities.resources.subscribe = True
+            return options
+
+        lowlevel.create_initialization_options = create_options_with_notifications
+
+
+# Shared instance used by the server resources
+resource_watcher = ResourceWatcher()
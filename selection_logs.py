@@ -0,0 +1,172 @@
+import re
+import json
+import base64
+import hashlib
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+# Pipeline for paging through selection logs streamed by the log service as NDJSON
+# (one JSON record per line). Each stage is an async generator, so at most one page of
+# matching records is ever held in memory, however long the underlying stream is.
+
+SEVERITY_LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "WARN": 30, "ERROR": 40, "CRITICAL": 50, "FATAL": 50}
+MAX_PAGE_SIZE = 1000
+PREDICATE_RE = re.compile(r"^\s*([A-Za-z_][\w.]*)\s*(!=|>=|<=|=|~|>|<)\s*(.*?)\s*$")
+
+
+def _parse_time(value: str) -> Optional[datetime]:
+    # Timestamps without an offset are taken as UTC, so every parsed value can be compared with every other
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+
+
+def _field(record: Dict[str, Any], path: str) -> Any:
+    # Dotted paths reach into nested objects, e.g. "ad.id"
+    value = record
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def parse_predicate(expression: str) -> Callable[[Dict[str, Any]], bool]:
+    """
+    Compiles a field predicate such as "ad_id=123", "message~timeout" or "latency_ms>=500".
+    Supported operators: = != ~ (substring) > >= < <= (numeric when both sides are numbers).
+
+    Raises:
+        ValueError: If the expression can't be parsed.
+    """
+    match = PREDICATE_RE.match(expression)
+    if not match:
+        raise ValueError(f"Invalid log filter '{expression}'. Use e.g. 'ad_id=123' or 'message~timeout'.")
+    field, op, expected = match.groups()
+
+    def predicate(record: Dict[str, Any]) -> bool:
+        actual = _field(record, field)
+        if op == "~":
+            return actual is not None and expected.lower() in str(actual).lower()
+        if op in ("=", "!="):
+            return (str(actual) == expected) == (op == "=")
+        if actual is None:
+            return False
+        try:
+            left, right = float(actual), float(expected)
+        except (TypeError, ValueError):
+            left, right = str(actual), expected
+        return {">": left > right, ">=": left >= right, "<": left < right, "<=": left <= right}[op]
+    return predicate
+
+
+def build_filter(since: Optional[str] = None, until: Optional[str] = None, min_severity: Optional[str] = None,
+                 where: Optional[List[str]] = None) -> Callable[[Dict[str, Any]], bool]:
+    """
+    Combines the time window, severity floor and field predicates into one record filter.
+
+    Raises:
+        ValueError: If a timestamp, severity or predicate is invalid.
+    """
+    checks = []
+    for label, bound in (("since", since), ("until", until)):
+        if bound is not None:
+            parsed = _parse_time(bound)
+            if parsed is None:
+                raise ValueError(f"Invalid '{label}' timestamp '{bound}'. Use ISO 8601, e.g. 2025-05-20T10:00:00Z (UTC when no offset is given).")
+            if label == "since":
+                checks.append(lambda r, t=parsed: (ts := _parse_time(r.get("timestamp"))) is not None and ts >= t)
+            else:
+                checks.append(lambda r, t=parsed: (ts := _parse_time(r.get("timestamp"))) is not None and ts < t)
+    if min_severity is not None:
+        floor = SEVERITY_LEVELS.get(min_severity.upper())
+        if floor is None:
+            raise ValueError(f"Unknown severity '{min_severity}'. Use one of {sorted(set(SEVERITY_LEVELS))}.")
+        checks.append(lambda r: SEVERITY_LEVELS.get(str(r.get("severity", "")).upper(), 0) >= floor)
+    checks.extend(parse_predicate(expression) for expression in (where or []))
+    return lambda record: all(check(record) for check in checks)
+
+
+# --- cursors ---
+
+def filter_fingerprint(query: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(query, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(line_offset: int, fingerprint: str) -> str:
+    payload = json.dumps({"o": line_offset, "q": fingerprint}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+
+def decode_cursor(cursor: str, fingerprint: str) -> int:
+    """
+    Returns the stream line offset stored in a cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed or was issued for a different query.
+    """
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        offset = int(state["o"])
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {str(e)}")
+    if state.get("q") != fingerprint:
+        raise ValueError("This cursor was issued for a different set of identifiers or filters.")
+    return offset
+
+
+# --- pipeline stages ---
+
+async def parse_records(lines: AsyncIterator[str], first_line: int = 0) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Decodes NDJSON lines into (line_number, record) pairs, skipping blank or malformed lines.
+    """
+    line_no = first_line
+    async for line in lines:
+        current = line_no
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict):
+            yield current, record
+
+
+async def filter_records(records: AsyncIterator[Tuple[int, Dict[str, Any]]],
+                         keep: Callable[[Dict[str, Any]], bool]) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    async for line_no, record in records:
+        if keep(record):
+            yield line_no, record
+
+
+def to_columnar(records: List[Dict[str, Any]], fields: Optional[List[str]] = None) -> Dict[str, List[Any]]:
+    """
+    Turns a list of records into {column: [values...]}, so field names are sent once per page.
+    """
+    columns = list(fields) if fields else list(dict.fromkeys(key for record in records for key in record))
+    return {column: [_field(record, column) for record in records] for column in columns}
+
+
+async def read_page(records: AsyncIterator[Tuple[int, Dict[str, Any]]], page_size: int,
+                    fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Pulls one page of records off the pipeline and packs it as a columnar chunk.
+
+    Returns:
+        A dictionary with 'rows', 'columns' (column -> values) and 'next_offset'
+        (stream line to resume from, or None when the stream is exhausted).
+    """
+    page = []
+    next_offset = None
+    async for line_no, record in records:
+        if len(page) == page_size:
+            # One record of look-ahead tells us whether another page exists
+            next_offset = line_no
+            break
+        page.append(record)
+    return {"rows": len(page), "columns": to_columnar(page, fields), "next_offset": next_offset}
@@ -0,0 +1,125 @@
+import os
+import sys
+import time
+import logging
+import threading
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+# Long-lived HTTP deployment of the AdsDiagnosticsServer.
+# Every uvicorn worker imports this module and calls create_app(); the workers share one listening
+# socket and the on-disk caches under MCP_CACHE_DIR (wiki text, BM25 index, code indexes, analysis
+# results), all of which are written atomically so concurrent workers can't corrupt them.
+
+_warm_state: Dict[str, Any] = {"status": "cold"}
+
+
+def warm_caches() -> Dict[str, Any]:
+    """
+    Loads the shared on-disk indexes into this worker's memory so the first request doesn't pay for it.
+    """
+    from wiki_index import wiki_index
+    from code_index import code_file_index
+    from code_search import code_search_index
+    from csharp_symbols import csharp_symbol_index
+    from topic_wiki_map import topic_wiki_map
+    from utils import get_topic_table_version
+
+    started = time.perf_counter()
+    _warm_state["status"] = "warming"
+    timings = {}
+    for name, warm in [("wiki_index", lambda: wiki_index.refresh(force=True)),
+                       ("code_file_index", code_file_index.refresh),
+                       ("code_search_index", code_search_index.refresh),
+                       ("csharp_symbol_index", csharp_symbol_index.refresh),
+                       ("topic_table", get_topic_table_version),
+                       ("topic_wiki_map", topic_wiki_map.refresh)]:
+        step = time.perf_counter()
+        try:
+            warm()
+        except Exception as e:
+            logger.warning("Warming %s failed: %s", name, e)
+        timings[name] = round(time.perf_counter() - step, 3)
+    _warm_state.update({"status": "warm", "seconds": round(time.perf_counter() - started, 3), "steps": timings})
+    return _warm_state
+
+
+def create_app():
+    """
+    ASGI factory used by uvicorn (one call per worker process).
+
+    Returns:
+        The streamable-HTTP Starlette app of the shared FastMCP server, with a /healthz route.
+    """
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse
+    from server import mcp
+
+    @mcp.custom_route("/healthz", methods=["GET"])
+    async def healthz(request: Request) -> JSONResponse:
+        return JSONResponse({"status": "ok", "pid": os.getpid(), "caches": _warm_state,
+                             "stateless_http": mcp.settings.stateless_http})
+
+    threading.Thread(target=warm_caches, name="cache-warmup", daemon=True).start()
+    return mcp.streamable_http_app()
+
+
+def run_http(host: str = "127.0.0.1", port: int = 8000, workers: int = 1, stateless: bool = None,
+             json_response: bool = False) -> None:
+    """
+    Serves the MCP server over streamable HTTP, optionally with several worker processes on one port.
+
+    Args:
+        host: Interface to bind.
+        port: Port to bind.
+        workers: Number of uvicorn worker processes.
+        stateless: Handle every request without a server-side MCP session. Must be True (the default)
+                   when workers > 1: sessions live in one worker's memory and uvicorn's workers share
+                   the port without session affinity, so a session's next request can reach a worker
+                   that doesn't know it. Stateless mode has no resource subscriptions or notifications.
+        json_response: Answer with plain JSON instead of an SSE stream when possible.
+
+    Raises:
+        ValueError: If stateful sessions are requested with more than one worker.
+    """
+    import uvicorn
+
+    if stateless is None:
+        stateless = workers > 1
+    elif not stateless and workers > 1:
+        raise ValueError(f"Stateful sessions need a single worker (got {workers}); sessions and resource "
+                         "subscriptions are not shared between worker processes.")
+
+    # FastMCP reads FASTMCP_* settings when the server module is imported, which happens in each worker
+    os.environ["FASTMCP_STATELESS_HTTP"] = "true" if stateless else "false"
+    os.environ["FASTMCP_JSON_RESPONSE"] = "true" if json_response else "false"
+    os.environ["FASTMCP_HOST"] = host
+    os.environ["FASTMCP_PORT"] = str(port)
+    server = sys.modules.get("server")
+    if server is not None: # Already imported in this process (single worker): apply the settings directly
+        server.mcp.settings.stateless_http = stateless
+        server.mcp.settings.json_response = json_response
+
+    print(f"Serving MCP over streamable HTTP on http://{host}:{port}/mcp with {workers} worker(s)"
+          f"{' (stateless)' if stateless else ''}", file=sys.stderr)
+    uvicorn.run("serve_http:create_app", factory=True, host=host, port=port, workers=workers,
+                log_level=os.environ.get("FASTMCP_LOG_LEVEL", "info").lower())
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the AdsDiagnosticsServer over streamable HTTP.")
+    parser.add_argument("--host", default=os.environ.get("MCP_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("MCP_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("MCP_WORKERS", "1")))
+    parser.add_argument("--stateless", action=argparse.BooleanOptionalAction, default=None,
+                        help="Stateless request handling (default: on when --workers > 1; "
+                             "--no-stateless requires a single worker).")
+    parser.add_argument("--json-response", action="store_true", help="Prefer plain JSON responses over SSE.")
+    args = parser.parse_args()
+    try:
+        run_http(args.host, args.port, args.workers, args.stateless, args.json_response)
+    except ValueError as e:
+        parser.error(str(e))
@@ -0,0 +1,153 @@
+import os
+import json
+import time
+import tempfile
+import random
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Local stand-in for the internal Ads / ticketing / log APIs.
+# Point the server at it with e.g. ADS_API_URL=http://127.0.0.1:8765 TICKETS_API_URL=... LOGS_API_URL=... CLOUD_LOGS_URL=...
+
+
+class StubBackendHandler(BaseHTTPRequestHandler):
+    delay = 0.0       # Seconds to sleep before answering (simulates a slow backend)
+    fail_rate = 0.0   # Fraction of requests answered with HTTP 503 (exercises retries)
+    log_lines = 200_000 # Length of the streamed selection log
+    cloud_log_dir = os.path.join(tempfile.gettempdir(), "stub_cloud_logs") # Files served under /cloud-logs/<id>
+    cloud_log_size = 64 * 1024 * 1024 # Size of synthesized cloud log files
+    hits = 0
+
+    def log_message(self, format, *args):
+        pass # Keep the console quiet
+
+    def _send_json(self, status: int, payload) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream_logs(self, offset: int) -> None:
+        # NDJSON, generated lazily line by line starting at `offset`; the connection closes at the end
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        severities = ["DEBUG", "INFO", "INFO", "INFO", "WARNING", "ERROR"]
+        try:
+            for i in range(offset, self.log_lines):
+                record = {
+                    "timestamp": f"2025-05-20T{(i // 3600) % 24:02d}:{(i // 60) % 60:02d}:{i % 60:02d}Z",
+                    "severity": severities[i % len(severities)],
+                    "ad_id": f"ad-{i % 50}",
+                    "latency_ms": (i * 37) % 900,
+                    "message": "selection timeout" if i % 97 == 0 else f"selection round {i}",
+                }
+                self.wfile.write((json.dumps(record) + "\n").encode("utf-8"))
+        except (BrokenPipeError, ConnectionResetError):
+            pass # The client stopped reading once its page was full
+
+    def _cloud_log_path(self, customer_request_id: str) -> str:
+        # Serve real files from cloud_log_dir; synthesize a deterministic one the first time an ID is asked for
+        safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in customer_request_id)
+        file_path = os.path.join(self.cloud_log_dir, f"{safe_name}.log")
+        if not os.path.exists(file_path):
+            os.makedirs(self.cloud_log_dir, exist_ok=True)
+            with open(file_path, 'w', encoding='utf-8') as f:
+                i = 0
+                while f.tell() < self.cloud_log_size:
+                    f.write(f"2025-05-20T10:00:00Z INFO request={customer_request_id} seq={i} stage=selection ok\n")
+                    i += 1
+        return file_path
+
+    def _serve_cloud_log(self, customer_request_id: str, head_only: bool) -> None:
+        file_path = self._cloud_log_path(customer_request_id)
+        size = os.path.getsize(file_path)
+        start, end = 0, size - 1
+        range_header = self.headers.get("Range")
+        if range_header and range_header.startswith("bytes="):
+            first, _, last = range_header[len("bytes="):].partition("-")
+            start = int(first) if first else 0
+            end = min(int(last), size - 1) if last else size - 1
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", f'"{size}-{int(os.path.getmtime(file_path))}"')
+        self.send_header("Content-Length", str(end - start + 1 if not head_only else size))
+        self.end_headers()
+        if head_only:
+            return
+        with open(file_path, 'rb') as f:
+            f.seek(start)
+            self.wfile.write(f.read(end - start + 1))
+
+    def do_HEAD(self):
+        parts = [p for p in urlparse(self.path).path.split("/") if p]
+        if len(parts) == 2 and parts[0] == "cloud-logs":
+            return self._serve_cloud_log(parts[1], head_only=True)
+        self.send_response(404)
+        self.end_headers()
+
+    def do_GET(self):
+        type(self).hits += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail_rate and random.random() < self.fail_rate:
+            return self._send_json(503, {"error": "stub backend unavailable"})
+
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        parts = [p for p in url.path.split("/") if p]
+
+        if parts == ["ads"]:
+            return self._send_json(200, {
+                "campaign_id": params.get("campaign_id"),
+                "ad_group_id": params.get("ad_group_id"),
+                "ad_id": params.get("ad_id"),
+                "status": "ACTIVE",
+                "daily_budget": 100.0,
+                "impressions_24h": 0,
+            })
+        if len(parts) == 2 and parts[0] == "tickets":
+            return self._send_json(200, {
+                "ticket_id": parts[1],
+                "customer_id": "cust-001",
+                "description": "Ads stopped serving after the campaign budget was updated.",
+                "campaign_id": "cmp-42",
+            })
+        if len(parts) == 2 and parts[0] == "cloud-logs":
+            return self._serve_cloud_log(parts[1], head_only=False)
+        if parts == ["selection-logs", "stream"]:
+            return self._stream_logs(int(params.get("offset", 0)))
+        return self._send_json(404, {"error": f"Unknown path: {url.path}"})
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8765, delay: float = 0.0, fail_rate: float = 0.0,
+                cloud_log_dir: str = None) -> ThreadingHTTPServer:
+    """
+    Builds (but doesn't start) a stub backend server. Use port=0 to pick a free port.
+    """
+    attrs = {"delay": delay, "fail_rate": fail_rate}
+    if cloud_log_dir:
+        attrs["cloud_log_dir"] = cloud_log_dir
+    handler = type("ConfiguredStubBackendHandler", (StubBackendHandler,), attrs)
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local stub of the internal Ads/ticket/log APIs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before each response.")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 503.")
+    parser.add_argument("--cloud-log-dir", default=None, help="Directory of files served under /cloud-logs/<id>.")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.delay, args.fail_rate, args.cloud_log_dir)
+    print(f"Stub backend listening on http://{args.host}:{server.server_port}")
+    server.serve_forever()
@@ -0,0 +1,322 @@
+import re
+import json
+import base64
+import difflib
+import hashlib
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+
+import utils
+
+# Topic search over the ticket database.
+#
+# Tickets only carry a handful of distinct topics, so instead of indexing every ticket row the
+# full-text index covers the distinct topics: `ticket_search_topics` holds one row per topic with
+# its ticket count, and `ticket_search_fts` is an FTS5 index over it. Triggers on ticket_topics keep
+# both in sync with every insert, update and delete. A search ranks the matching topics (bm25) and
+# then pages through each topic's tickets, newest first, with a keyset cursor on the
+# (topic, created_at) index, so a page costs the same at 20 tickets or 20 million.
+#
+# The tables, triggers and index are created explicitly (generate_db.py, or `python ticket_search.py`
+# for an existing database); the lookups only read and report a missing setup.
+
+MAX_PAGE_SIZE = 500
+MAX_MATCHED_TOPICS = 50
+FUZZY_CUTOFF = 0.6 # difflib ratio a topic needs to match a misspelled query
+
+TICKET_COLUMNS = ["ticket_id", "topic", "customer_id", "campaign_id", "ad_id", "created_at", "status"]
+TRIGGERS = {
+    "ticket_search_ai": """
+        CREATE TRIGGER IF NOT EXISTS ticket_search_ai AFTER INSERT ON ticket_topics BEGIN
+            INSERT INTO ticket_search_topics (topic, tickets) VALUES (new.topic, 1)
+                ON CONFLICT (topic) DO UPDATE SET tickets = tickets + 1;
+        END""",
+    "ticket_search_ad": """
+        CREATE TRIGGER IF NOT EXISTS ticket_search_ad AFTER DELETE ON ticket_topics BEGIN
+            UPDATE ticket_search_topics SET tickets = tickets - 1 WHERE topic = old.topic;
+        END""",
+    "ticket_search_au": """
+        CREATE TRIGGER IF NOT EXISTS ticket_search_au AFTER UPDATE OF topic ON ticket_topics
+        WHEN old.topic IS NOT new.topic BEGIN
+            UPDATE ticket_search_topics SET tickets = tickets - 1 WHERE topic = old.topic;
+            INSERT INTO ticket_search_topics (topic, tickets) VALUES (new.topic, 1)
+                ON CONFLICT (topic) DO UPDATE SET tickets = tickets + 1;
+        END""",
+    # Topics are never deleted from ticket_search_topics (their count just drops to 0), so the
+    # full-text index only has to follow inserts
+    "ticket_search_topics_ai": """
+        CREATE TRIGGER IF NOT EXISTS ticket_search_topics_ai AFTER INSERT ON ticket_search_topics BEGIN
+            INSERT INTO ticket_search_fts (rowid, topic) VALUES (new.topic_id, new.topic);
+        END""",
+}
+
+
+REQUIRED_OBJECTS = {"ticket_search_topics", "ticket_search_fts", "idx_ticket_topics_topic_created", *TRIGGERS}
+
+
+class TicketSearchNotInstalled(RuntimeError):
+    """
+    The ticket database doesn't have the topic search tables (yet).
+    """
+
+
+def install(conn: sqlite3.Connection, rebuild: bool = False) -> None:
+    """
+    Creates the topic table, its FTS5 index and the sync triggers (and the columns/index the ticket
+    pages rely on), and switches the database to WAL mode. When the triggers are new, or `rebuild` is set, the topic table is recomputed
+    from ticket_topics, since rows written without the triggers aren't counted.
+    """
+    from generate_db import INDEXES, ensure_schema # generate_db owns the ticket table's schema
+
+    conn.execute("PRAGMA journal_mode=WAL") # Persistent: the server's readers then don't block each other
+    with conn:
+        ensure_schema(conn)
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_ticket_topics_topic_created ON ticket_topics "
+                     f"({INDEXES['idx_ticket_topics_topic_created']})")
+        conn.execute("CREATE TABLE IF NOT EXISTS ticket_search_topics ("
+                     "topic_id INTEGER PRIMARY KEY, topic TEXT NOT NULL UNIQUE, tickets INTEGER NOT NULL)")
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS ticket_search_fts USING fts5(topic, content='ticket_search_topics', "
+                     "content_rowid='topic_id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')")
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+        for name, sql in TRIGGERS.items():
+            conn.execute(sql)
+        if rebuild or not set(TRIGGERS) <= existing:
+            _rebuild(conn)
+
+
+def _rebuild(conn: sqlite3.Connection) -> None:
+    conn.execute("DELETE FROM ticket_search_topics")
+    conn.execute("INSERT INTO ticket_search_topics (topic, tickets) SELECT topic, COUNT(*) FROM ticket_topics GROUP BY topic")
+    conn.execute("INSERT INTO ticket_search_fts (ticket_search_fts) VALUES ('rebuild')")
+
+
+def drop_triggers(conn: sqlite3.Connection) -> None:
+    """
+    Removes the ticket_topics sync triggers, e.g. for a bulk load that calls install(rebuild=True) afterwards.
+    """
+    with conn:
+        for name in TRIGGERS:
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+# --- cursors ---
+
+def _query_fingerprint(query: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(query, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(topic: str, after: List[Any], fingerprint: str) -> str:
+    payload = json.dumps({"t": topic, "a": after, "q": fingerprint}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+
+def decode_cursor(cursor: str, fingerprint: str) -> Tuple[str, List[Any]]:
+    """
+    Returns the topic and the (created_at, ticket_id) position stored in a cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed or was issued for a different query.
+    """
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        topic, after = state["t"], state["a"]
+        if not isinstance(topic, str) or not isinstance(after, list) or len(after) != 2:
+            raise ValueError("missing fields")
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {str(e)}")
+    if state.get("q") != fingerprint:
+        raise ValueError("This cursor was issued for a different query.")
+    return topic, after
+
+
+class TicketSearch:
+    """
+    Ranked, paginated ticket lookups by topic: fuzzy full-text search over the topics
+    (search_tickets) and an exact topic -> tickets listing (tickets_for_topic).
+    """
+
+    def __init__(self):
+        self._ready_for = None # (db path, topic table version) the setup was last verified for
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        The ticket database connection, once the search tables are known to exist (a read-only check).
+
+        Raises:
+            TicketSearchNotInstalled: If the database was never set up for topic search.
+        """
+        conn = utils.get_connection()
+        ready_key = (utils.DB_PATH, utils.get_topic_table_version())
+        if self._ready_for != ready_key:
+            present = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+            missing = REQUIRED_OBJECTS - present
+            if missing:
+                raise TicketSearchNotInstalled(
+                    f"Ticket topic search is not set up for {utils.DB_PATH} (missing: {', '.join(sorted(missing))}). "
+                    f"Run `python ticket_search.py` (or generate the database with generate_db.py) to create it.")
+            self._ready_for = ready_key
+        return conn
+
+    # --- topics ---
+
+    def _all_topics(self, conn: sqlite3.Connection) -> List[Tuple[str, int]]:
+        return conn.execute("SELECT topic, tickets FROM ticket_search_topics WHERE tickets > 0").fetchall()
+
+    def topics(self) -> List[Tuple[str, int]]:
+        """
+        Every distinct topic that currently has tickets, with its ticket count. Without the search
+        tables the topics are counted from ticket_topics directly (a full scan).
+        """
+        try:
+            return self._all_topics(self._connection())
+        except TicketSearchNotInstalled:
+            return utils.get_connection().execute("SELECT topic, COUNT(*) FROM ticket_topics GROUP BY topic").fetchall()
+
+    def match_topics(self, query: str, max_topics: int = MAX_MATCHED_TOPICS) -> List[Dict[str, Any]]:
+        """
+        Ranks the ticket topics against a free-text query.
+
+        Every query word is matched as a prefix ("cloud comp" finds "Cloud Computing"); when no topic
+        contains all of them, topics matching any word are returned, and as a last resort topics
+        spelled similarly to the query (difflib), so small typos still find their topic.
+
+        Returns:
+            Topics as dictionaries with 'topic', 'tickets' and 'score' (higher is better), best first.
+        """
+        conn = self._connection()
+        words = re.findall(r"\w+", query.lower())
+        if not words:
+            return []
+        terms = [f'"{word}"*' for word in words]
+        for expression in (" AND ".join(terms), " OR ".join(terms)):
+            rows = conn.execute(
+                "SELECT t.topic, t.tickets, bm25(ticket_search_fts) AS rank FROM ticket_search_fts "
+                "JOIN ticket_search_topics t ON t.topic_id = ticket_search_fts.rowid "
+                "WHERE ticket_search_fts MATCH ? AND t.tickets > 0 ORDER BY rank, t.tickets DESC, t.topic LIMIT ?",
+                (expression, max_topics)).fetchall()
+            if rows:
+                return [{"topic": topic, "tickets": tickets, "score": round(-rank, 4)} for topic, tickets, rank in rows]
+            if len(terms) == 1:
+                break
+
+        normalized = " ".join(words)
+        scored = []
+        for topic, tickets in self._all_topics(conn):
+            ratio = difflib.SequenceMatcher(None, normalized, " ".join(re.findall(r"\w+", topic.lower()))).ratio()
+            if ratio >= FUZZY_CUTOFF:
+                scored.append({"topic": topic, "tickets": tickets, "score": round(ratio, 4)})
+        scored.sort(key=lambda item: (-item["score"], -item["tickets"]))
+        return scored[:max_topics]
+
+    def resolve_topic(self, topic: str) -> Optional[Tuple[str, int]]:
+        """
+        Returns the stored spelling and ticket count of a topic (matched case-insensitively), or None.
+        """
+        conn = self._connection()
+        row = conn.execute("SELECT topic, tickets FROM ticket_search_topics WHERE topic = ? AND tickets > 0", (topic,)).fetchone()
+        if row is None:
+            row = conn.execute("SELECT topic, tickets FROM ticket_search_topics WHERE topic = ? COLLATE NOCASE "
+                               "AND tickets > 0 ORDER BY tickets DESC LIMIT 1", (topic,)).fetchone()
+        return tuple(row) if row else None
+
+    # --- tickets ---
+
+    def _topic_page(self, conn: sqlite3.Connection, topic: str, after: Optional[List[Any]], limit: int) -> List[Tuple]:
+        """
+        Up to `limit` tickets of one topic, newest first, strictly after the (created_at, ticket_id) position.
+        Tickets without created_at (databases from the original schema) come last, by descending ticket ID.
+        """
+        columns = ", ".join(TICKET_COLUMNS)
+        rows = []
+        if after is None or after[0] is not None:
+            if after is None:
+                rows = conn.execute(f"SELECT {columns} FROM ticket_topics WHERE topic = ? AND created_at IS NOT NULL "
+                                    f"ORDER BY created_at DESC, ticket_id DESC LIMIT ?", (topic, limit)).fetchall()
+            else:
+                rows = conn.execute(f"SELECT {columns} FROM ticket_topics WHERE topic = ? AND created_at IS NOT NULL "
+                                    f"AND (created_at, ticket_id) < (?, ?) ORDER BY created_at DESC, ticket_id DESC LIMIT ?",
+                                    (topic, after[0], after[1], limit)).fetchall()
+        if len(rows) < limit:
+            before_id = after[1] if after is not None and after[0] is None else None
+            if before_id is None:
+                rows += conn.execute(f"SELECT {columns} FROM ticket_topics WHERE topic = ? AND created_at IS NULL "
+                                     f"ORDER BY ticket_id DESC LIMIT ?", (topic, limit - len(rows))).fetchall()
+            else:
+                rows += conn.execute(f"SELECT {columns} FROM ticket_topics WHERE topic = ? AND created_at IS NULL "
+                                     f"AND ticket_id < ? ORDER BY ticket_id DESC LIMIT ?",
+                                     (topic, before_id, limit - len(rows))).fetchall()
+        return rows
+
+    def _page(self, topics: List[Dict[str, Any]], page_size: int, cursor: Optional[str], fingerprint: str) -> Dict[str, Any]:
+        conn = self._connection()
+        start, after = 0, None
+        if cursor:
+            topic, after = decode_cursor(cursor, fingerprint)
+            names = [item["topic"] for item in topics]
+            if topic not in names:
+                raise ValueError(f"The topic '{topic}' of this cursor no longer has tickets; start a new search.")
+            start = names.index(topic)
+
+        tickets, next_cursor = [], None
+        for position in range(start, len(topics)):
+            item, needed = topics[position], page_size - len(tickets)
+            rows = self._topic_page(conn, item["topic"], after, needed + 1) # One extra row tells whether more remain
+            after = None
+            tickets.extend({**dict(zip(TICKET_COLUMNS, row)), "score": item["score"]} for row in rows[:needed])
+            if len(tickets) == page_size:
+                if len(rows) > needed or position + 1 < len(topics):
+                    last = tickets[-1]
+                    next_cursor = encode_cursor(last["topic"], [last["created_at"], last["ticket_id"]], fingerprint)
+                break
+        return {"tickets": tickets, "next_cursor": next_cursor}
+
+    def search_tickets(self, query: str, page_size: int = 50, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Tickets whose topic matches a free-text query: the best-ranked topic's tickets first, each topic newest first.
+
+        Raises:
+            ValueError: If the cursor is invalid or was issued for another query.
+        """
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        topics = self.match_topics(query)
+        page = self._page(topics, page_size, cursor, _query_fingerprint({"search": query}))
+        return {"query": query, "matched_topics": topics, "total_tickets": sum(item["tickets"] for item in topics), **page}
+
+    def tickets_for_topic(self, topic: str, page_size: int = 50, cursor: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        All tickets of one topic (matched case-insensitively), newest first. Returns None for an unknown topic.
+
+        Raises:
+            ValueError: If the cursor is invalid or was issued for another topic.
+        """
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        resolved = self.resolve_topic(topic)
+        if resolved is None:
+            return None
+        name, count = resolved
+        page = self._page([{"topic": name, "tickets": count, "score": 1.0}], page_size, cursor,
+                          _query_fingerprint({"topic": name}))
+        for ticket in page["tickets"]:
+            del ticket["score"]
+        return {"topic": name, "total_tickets": count, **page}
+
+
+# Shared instance used by the server tools
+ticket_search = TicketSearch()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Create (or rebuild) the ticket topic search tables and triggers.")
+    parser.add_argument("--db-path", default=utils.DB_PATH, help="Database file (default: TICKET_DB_PATH or ticket_topics.db next to the server).")
+    parser.add_argument("--rebuild", action="store_true", help="Recount the topics even when the triggers already exist.")
+    args = parser.parse_args()
+
+    connection = sqlite3.connect(args.db_path)
+    try:
+        install(connection, rebuild=args.rebuild)
+        topic_count = connection.execute("SELECT COUNT(*) FROM ticket_search_topics WHERE tickets > 0").fetchone()[0]
+    finally:
+        connection.close()
+    print(f"Ticket topic search is set up for {args.db_path} ({topic_count:,} topics).")
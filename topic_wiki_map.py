@@ -0,0 +1,185 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from wiki_cache import CACHE_DIR
+from wiki_index import wiki_index
+from ticket_search import ticket_search
+
+logger = logging.getLogger(__name__)
+
+MAP_VERSION = 1
+PAGES_PER_TOPIC = int(os.environ.get("TOPIC_WIKI_PAGES", "5"))
+EXCERPT_CHARS = int(os.environ.get("TOPIC_WIKI_EXCERPT_CHARS", "1200"))
+
+SCHEMA = [
+    # One row per (topic, rank): the topic's best wiki pages with their BM25 score and an excerpt
+    """CREATE TABLE IF NOT EXISTS topic_wiki_pages (
+        topic TEXT NOT NULL,
+        rank INTEGER NOT NULL,
+        filename TEXT NOT NULL,
+        page INTEGER NOT NULL,
+        score REAL NOT NULL,
+        excerpt TEXT NOT NULL,
+        PRIMARY KEY (topic, rank)
+    ) WITHOUT ROWID""",
+    # The wiki state each topic's rows were computed from (topics without matching pages have no rows above)
+    """CREATE TABLE IF NOT EXISTS topic_wiki_topics (
+        topic TEXT PRIMARY KEY,
+        source_key TEXT NOT NULL,
+        computed_at REAL NOT NULL
+    ) WITHOUT ROWID""",
+]
+
+
+class TopicWikiMap:
+    """
+    Materialized topic -> top wiki pages table, so a ticket's relevant wiki excerpts come from one
+    primary-key read instead of a search_wikis call plus PDF extraction.
+
+    The table lives in `<cache_dir>/topic_wiki_map.db`. Every topic records the wiki index
+    fingerprint (and map settings) it was ranked against. A refresh only ranks topics that are new
+    or whose key is out of date, and drops topics that no longer have tickets. A lookup of a
+    missing or stale topic ranks just that topic and leaves the rest to a background refresh.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, index=wiki_index, tickets=ticket_search,
+                 pages_per_topic: int = PAGES_PER_TOPIC, excerpt_chars: int = EXCERPT_CHARS, refresh_interval: float = 5.0):
+        self.db_path = os.path.join(cache_dir, "topic_wiki_map.db")
+        self.index = index
+        self.tickets = tickets
+        self.pages_per_topic = pages_per_topic
+        self.excerpt_chars = excerpt_chars
+        self.refresh_interval = refresh_interval
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock() # Guards the shared connection
+        self._refreshing = threading.Lock()
+        self._refreshed_for = None # (source key, topic table version) of the last full refresh
+        self._last_refresh = 0.0
+        self.stats = {"lookups": 0, "topics_ranked": 0, "background_refreshes": 0}
+
+    # --- storage ---
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                for statement in SCHEMA:
+                    conn.execute(statement)
+            self._conn = conn
+        return self._conn
+
+    def source_key(self) -> str:
+        """
+        Identifies what the rankings depend on: the indexed wikis and the map settings.
+        """
+        return f"{MAP_VERSION}:{self.pages_per_topic}:{self.excerpt_chars}:{self.index.fingerprint()}"
+
+    def _rank(self, topics: List[str], source_key: str) -> None:
+        ranked = [(topic, self.index.search(topic, max_results=self.pages_per_topic, snippet_chars=self.excerpt_chars))
+                  for topic in topics]
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                for topic, hits in ranked:
+                    conn.execute("DELETE FROM topic_wiki_pages WHERE topic = ?", (topic,))
+                    conn.executemany(
+                        "INSERT INTO topic_wiki_pages (topic, rank, filename, page, score, excerpt) VALUES (?, ?, ?, ?, ?, ?)",
+                        [(topic, rank, hit["filename"], hit["page"], hit["score"], hit["snippet"])
+                         for rank, hit in enumerate(hits, start=1)])
+                    conn.execute("INSERT OR REPLACE INTO topic_wiki_topics (topic, source_key, computed_at) VALUES (?, ?, ?)",
+                                 (topic, source_key, now))
+        self.stats["topics_ranked"] += len(ranked)
+        if self._refreshed_for is not None and self._refreshed_for[0] != source_key:
+            self._refreshed_for = None # Rows now exist for another wiki state than the last full refresh saw
+
+    # --- maintenance ---
+
+    def refresh(self, force: bool = False) -> Dict[str, int]:
+        """
+        Ranks the wiki pages of every ticket topic that is new or was ranked against older wikis,
+        and drops topics that no longer have tickets.
+
+        Args:
+            force: Re-check even when neither the wikis nor the ticket table changed since the last refresh.
+
+        Returns:
+            Counts of the topics ranked, removed and mapped in total.
+        """
+        from utils import get_topic_table_version
+
+        with self._refreshing:
+            source_key = self.source_key()
+            refresh_key = (source_key, get_topic_table_version())
+            self._last_refresh = time.monotonic()
+            if not force and refresh_key == self._refreshed_for:
+                return {"ranked": 0, "removed": 0, "topics": None}
+
+            topics = [topic for topic, _ in self.tickets.topics()]
+            with self._lock:
+                stored = dict(self._connection().execute("SELECT topic, source_key FROM topic_wiki_topics").fetchall())
+            stale = [topic for topic in topics if stored.get(topic) != source_key]
+            current = set(topics)
+            removed = [topic for topic in stored if topic not in current]
+
+            if stale:
+                self._rank(stale, source_key)
+            if removed:
+                with self._lock:
+                    conn = self._connection()
+                    with conn:
+                        conn.executemany("DELETE FROM topic_wiki_pages WHERE topic = ?", ((t,) for t in removed))
+                        conn.executemany("DELETE FROM topic_wiki_topics WHERE topic = ?", ((t,) for t in removed))
+            self._refreshed_for = refresh_key
+            return {"ranked": len(stale), "removed": len(removed), "topics": len(topics)}
+
+    def _refresh_in_background(self) -> None:
+        if self._refreshing.locked():
+            return
+        self.stats["background_refreshes"] += 1
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning("Refreshing the topic -> wiki map failed: %s", e)
+        threading.Thread(target=run, name="topic-wiki-map-refresh", daemon=True).start()
+
+    # --- querying ---
+
+    def pages_for_topic(self, topic: str) -> List[Dict[str, Any]]:
+        """
+        Returns the topic's top wiki pages ('rank', 'filename', 'page', 'score', 'excerpt'), best first.
+        """
+        self.stats["lookups"] += 1
+        source_key = self.source_key()
+        with self._lock:
+            row = self._connection().execute("SELECT source_key FROM topic_wiki_topics WHERE topic = ?", (topic,)).fetchone()
+        if row is None or row[0] != source_key:
+            self._rank([topic], source_key)
+        refreshed_for = self._refreshed_for
+        if refreshed_for is None or refreshed_for[0] != source_key or time.monotonic() - self._last_refresh > self.refresh_interval:
+            self._refresh_in_background() # Re-ranks the other topics after a wiki changed, and picks up new topics
+
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT rank, filename, page, score, excerpt FROM topic_wiki_pages WHERE topic = ? ORDER BY rank", (topic,)
+            ).fetchall()
+        return [dict(zip(("rank", "filename", "page", "score", "excerpt"), row)) for row in rows]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            conn = self._connection()
+            topics = conn.execute("SELECT COUNT(*) FROM topic_wiki_topics").fetchone()[0]
+            pages = conn.execute("SELECT COUNT(*) FROM topic_wiki_pages").fetchone()[0]
+        return {**self.stats, "topics": topics, "pages": pages, "pages_per_topic": self.pages_per_topic}
+
+
+# Shared instance used by the server tools
+topic_wiki_map = TopicWikiMap()
@@ -0,0 +1,113 @@
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Bounded async response cache with per-entry TTL, LRU eviction and stale-while-revalidate.
+
+    - A fresh entry (younger than `ttl`) is returned straight from memory.
+    - A stale entry (younger than `ttl + stale_ttl`) is returned immediately while a single
+      background task reloads it.
+    - Anything older, or missing, is loaded inline; concurrent loads of the same key share one call.
+    Failed loads are never cached.
+    """
+
+    def __init__(self, name: str, ttl: float, stale_ttl: float = 0.0, max_entries: int = 1024):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict() # key -> (stored_at, value)
+        self._loading: Dict[Hashable, asyncio.Future] = {}
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "evictions": 0, "invalidations": 0}
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        loading = self._loading.get(key)
+        if loading is None:
+            async def run():
+                try:
+                    value = await loader()
+                    self._store(key, value)
+                    return value
+                finally:
+                    self._loading.pop(key, None)
+            loading = asyncio.ensure_future(run())
+            self._loading[key] = loading
+        return loading
+
+    def _refresh_in_background(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> None:
+        if key in self._loading:
+            return
+        self.stats["refreshes"] += 1
+        task = self._load(key, loader)
+
+        def log_failure(t: asyncio.Future) -> None:
+            # Background failures just leave the stale entry in place until it expires
+            if not t.cancelled() and t.exception() is not None:
+                logger.debug("%s background refresh of %r failed: %s", self.name, key, t.exception())
+        task.add_done_callback(log_failure)
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Returns the cached value for `key`, calling `loader()` when it is missing or expired.
+
+        Args:
+            key: Hashable cache key.
+            loader: Zero-argument coroutine function producing the value.
+
+        Returns:
+            The cached or freshly loaded value.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry[0]
+            if age < self.ttl:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1]
+            if age < self.ttl + self.stale_ttl:
+                self._entries.move_to_end(key)
+                self.stats["stale_hits"] += 1
+                self._refresh_in_background(key, loader)
+                return entry[1]
+            del self._entries[key]
+
+        self.stats["misses"] += 1
+        return await asyncio.shield(self._load(key, loader))
+
+    def invalidate(self, key: Optional[Hashable] = None, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """
+        Drops one key, every key matching `predicate`, or (with no arguments) everything.
+
+        Returns:
+            The number of entries removed.
+        """
+        if key is not None:
+            keys = [key] if key in self._entries else []
+        elif predicate is not None:
+            keys = [k for k in self._entries if predicate(k)]
+        else:
+            keys = list(self._entries)
+        for k in keys:
+            del self._entries[k]
+        self.stats["invalidations"] += len(keys)
+        return len(keys)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["stale_hits"] + self.stats["misses"]
+        hits = self.stats["hits"] + self.stats["stale_hits"]
+        return {**self.stats, "hit_rate": round(hits / lookups, 4) if lookups else 0.0, "entries": len(self._entries), "max_entries": self.max_entries,
+                "ttl": self.ttl, "stale_ttl": self.stale_ttl}
@@ -1,27 +1,256 @@
+import os
 import sqlite3
-# import os
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from warm_state import load_timed, warm_snapshot
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Override with the TICKET_DB_PATH environment variable or set_db_path()
+DB_PATH = os.environ.get("TICKET_DB_PATH", os.path.join(PROJECT_ROOT, "ticket_topics.db"))
+TOPIC_CACHE_SIZE = int(os.environ.get("TOPIC_CACHE_SIZE", "4096"))
+UNKNOWN_TOPIC = "Unknown Topic"
+IN_QUERY_LIMIT = 500 # Larger batches are resolved through a temp-table join instead of IN (...)
+
+_local = threading.local() # One cached connection per thread
+_MISSING = object()
+_topic_cache: "OrderedDict[int, str]" = OrderedDict() # ticket_id -> topic (tickets that exist only)
+_topic_cache_lock = threading.Lock()
+_topic_cache_stats = {"hits": 0, "misses": 0}
+_topic_cache_restored = False # Whether the warm-state snapshot has been consulted yet
+_topic_cache_fingerprint = None # DB file fingerprint taken before the first topic was cached
+_version_lock = threading.Lock()
+_version_state = {"db_path": None, "conn": None, "data_version": None, "version": 0}
+
+
+def set_db_path(db_path: str) -> None:
+    """
+    Points the topic lookups at a different database file and drops the cached topics.
+    Per-thread connections to the old file are replaced on their next use.
+    """
+    global DB_PATH
+    DB_PATH = db_path
+    clear_topic_cache()
+
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Returns this thread's cached connection to the ticket database, opening it on first use.
+
+    The connection is kept open, so sqlite3's per-connection statement cache means the lookup
+    queries are only prepared once. Opening it never writes to the database: the journal mode is
+    left as the file has it (generate_db.py and `python ticket_search.py` switch it to WAL, so
+    readers don't block each other).
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.db_path == DB_PATH:
+        return conn
+    if conn is not None:
+        conn.close()
+
+    conn = sqlite3.connect(DB_PATH, cached_statements=256)
+    conn.execute("PRAGMA recursive_triggers=ON") # So INSERT OR REPLACE fires the ticket search delete trigger
+    logger.debug("Opened ticket database connection: %s", DB_PATH)
+    _local.conn = conn
+    _local.db_path = DB_PATH
+    return conn
+
+
+def get_topic_table_version() -> int:
+    """
+    Returns a counter that changes whenever the ticket database has been modified since the last call.
+
+    A dedicated connection polls `PRAGMA data_version`, which moves whenever any other connection
+    (in this process or another one, e.g. generate_db.py) commits. It is a header read, so it costs
+    microseconds and can be used as a cache key. A detected change, and taking the first baseline,
+    also clears the topic cache, so nothing cached under an older version survives into a newer one.
+    """
+    with _version_lock:
+        state = _version_state
+        if state["conn"] is None or state["db_path"] != DB_PATH:
+            if state["conn"] is not None:
+                state["conn"].close()
+            state["conn"] = sqlite3.connect(DB_PATH, check_same_thread=False)
+            state["db_path"] = DB_PATH
+            state["data_version"] = None
+        data_version = state["conn"].execute("PRAGMA data_version").fetchone()[0]
+        if data_version != state["data_version"]:
+            # The DB changed (or was swapped) since the version was last handed out. On the first call
+            # there is no baseline to compare against, so topics cached before it are dropped as well.
+            clear_topic_cache()
+            state["data_version"] = data_version
+            state["version"] += 1
+        return state["version"]
+
+
+def clear_topic_cache() -> None:
+    """
+    Empties the in-memory ticket topic cache (e.g. after the ticket table was modified).
+    """
+    global _topic_cache_fingerprint
+    with _topic_cache_lock:
+        _topic_cache.clear()
+        _topic_cache_fingerprint = None
+
+
+def get_topic_cache_stats() -> Dict[str, object]:
+    """
+    Returns the hit/miss counters and occupancy of the in-memory ticket topic cache.
+    """
+    with _topic_cache_lock:
+        lookups = _topic_cache_stats["hits"] + _topic_cache_stats["misses"]
+        return {**_topic_cache_stats, "entries": len(_topic_cache), "max_entries": TOPIC_CACHE_SIZE,
+                "hit_rate": round(_topic_cache_stats["hits"] / lookups, 4) if lookups else 0.0}
+
+
+def _db_fingerprint(db_path: str) -> List[Any]:
+    # An empty or missing -wal file means every committed change is in the main file
+    fingerprint = []
+    for path in (db_path, db_path + "-wal"):
+        try:
+            st = os.stat(path)
+            fingerprint.append((st.st_size, st.st_mtime_ns) if st.st_size else None)
+        except OSError:
+            fingerprint.append(None)
+    return fingerprint
+
+
+def _note_fingerprint() -> None:
+    # Taken before querying, so a change racing with the query makes the snapshot look stale, never fresh
+    global _topic_cache_fingerprint
+    if _topic_cache_fingerprint is None:
+        _topic_cache_fingerprint = _db_fingerprint(DB_PATH)
+
+
+def _restore_topic_cache() -> None:
+    global _topic_cache_fingerprint
+    state = warm_snapshot.take("topic_cache")
+    if state is None or state["db_path"] != DB_PATH or state["fingerprint"] != _db_fingerprint(DB_PATH):
+        return # Snapshot of another database, or the database changed since
+    with _topic_cache_lock:
+        _topic_cache_fingerprint = state["fingerprint"]
+        for ticket_id, topic in state["topics"]:
+            if topic is not None: # Older snapshots also cached missing tickets
+                _topic_cache.setdefault(ticket_id, topic)
+        while len(_topic_cache) > TOPIC_CACHE_SIZE:
+            _topic_cache.popitem(last=False)
+
+
+def _ensure_topic_cache_restored() -> None:
+    global _topic_cache_restored
+    if not _topic_cache_restored:
+        _topic_cache_restored = True
+        load_timed("topic_cache", _restore_topic_cache)
+
+
+def topic_cache_snapshot_state() -> Optional[Dict[str, Any]]:
+    """
+    The cached topics, as stored in the warm-state snapshot (None when nothing was looked up in this process).
+    """
+    with _topic_cache_lock:
+        if not _topic_cache or _topic_cache_fingerprint is None:
+            return None
+        return {"db_path": DB_PATH, "fingerprint": _topic_cache_fingerprint, "topics": list(_topic_cache.items())}
+
+
+warm_snapshot.register("topic_cache", topic_cache_snapshot_state)
+
+
+def _cache_get(ticket_id: int):
+    with _topic_cache_lock:
+        topic = _topic_cache.get(ticket_id, _MISSING)
+        if topic is not _MISSING:
+            _topic_cache.move_to_end(ticket_id)
+            _topic_cache_stats["hits"] += 1
+        else:
+            _topic_cache_stats["misses"] += 1
+        return topic
+
+
+def _cache_put(ticket_id: int, topic) -> None:
+    with _topic_cache_lock:
+        _topic_cache[ticket_id] = topic
+        _topic_cache.move_to_end(ticket_id)
+        while len(_topic_cache) > TOPIC_CACHE_SIZE:
+            _topic_cache.popitem(last=False)
+
 
 def get_topic_from_db(ticket_id: int) -> str:
     """
     Get the topic from the ticket ID.
-    
+
     This function retrieves the topic associated with a specific ticket ID.
+    Results are served from an in-memory LRU in front of a per-thread SQLite connection. Every lookup
+    first checks the database's data_version, so a write drops the cached topics; tickets that
+    don't exist are not cached, so a ticket inserted later is found on the next lookup.
     """
-    # Define the database path
-    
-    db_path = "/Users/chaeeunryu/Desktop/MCP Study/ToyProject/MCP-Project/ticket_topics.db"
-    print(f"Database accessed: {db_path}")
-    
-    # Connect to the database
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Query the database for the topic
-    cursor.execute("SELECT topic FROM ticket_topics WHERE ticket_id = ?", (ticket_id,))
-    result = cursor.fetchone()
-    
-    # Close the connection
-    conn.close()
-    
+    get_topic_table_version() # Clears the topic cache if the database changed since the last lookup
+    _ensure_topic_cache_restored()
+    topic = _cache_get(ticket_id)
+    if topic is _MISSING:
+        _note_fingerprint()
+        row = get_connection().execute("SELECT topic FROM ticket_topics WHERE ticket_id = ?", (ticket_id,)).fetchone()
+        topic = row[0] if row else None
+        if topic is not None:
+            _cache_put(ticket_id, topic)
+
     # Return the topic if found, otherwise return "Unknown Topic"
-    return result[0] if result else "Unknown Topic"
+    return topic if topic is not None else UNKNOWN_TOPIC
+
+
+def get_topics_from_db(ticket_ids: List[int]) -> Dict[int, Optional[str]]:
+    """
+    Resolves the topics of many tickets at once.
+
+    Cached topics are answered from memory; the rest are fetched in a single
+    `WHERE ticket_id IN (...)` query, or through a temp-table join for very large lists.
+    Found topics are written back to the topic cache shared with get_topic_from_db (missing tickets are not cached).
+
+    Args:
+        ticket_ids: The ticket IDs to resolve. Duplicates are ignored.
+
+    Returns:
+        A dictionary mapping each ticket ID to its topic, or None when the ticket doesn't exist.
+    """
+    get_topic_table_version() # Clears the topic cache if the database changed since the last lookup
+    _ensure_topic_cache_restored()
+    requested = list(dict.fromkeys(ticket_ids))
+    results: Dict[int, Optional[str]] = {}
+    pending = []
+    for ticket_id in requested:
+        topic = _cache_get(ticket_id)
+        if topic is _MISSING:
+            pending.append(ticket_id)
+        else:
+            results[ticket_id] = topic
+    if not pending:
+        return results
+
+    _note_fingerprint()
+    conn = get_connection()
+    if len(pending) <= IN_QUERY_LIMIT:
+        placeholders = ",".join("?" * len(pending))
+        rows = conn.execute(f"SELECT ticket_id, topic FROM ticket_topics WHERE ticket_id IN ({placeholders})", pending).fetchall()
+    else:
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS _ticket_lookup (ticket_id INTEGER PRIMARY KEY)")
+        try:
+            conn.executemany("INSERT OR IGNORE INTO _ticket_lookup (ticket_id) VALUES (?)", ((t,) for t in pending))
+            rows = conn.execute(
+                "SELECT t.ticket_id, t.topic FROM _ticket_lookup l JOIN ticket_topics t ON t.ticket_id = l.ticket_id"
+            ).fetchall()
+        finally:
+            conn.execute("DELETE FROM _ticket_lookup")
+            conn.commit()
+
+    found = dict(rows)
+    for ticket_id in pending:
+        topic = found.get(ticket_id)
+        if topic is not None:
+            _cache_put(ticket_id, topic)
+        results[ticket_id] = topic
+    return {ticket_id: results[ticket_id] for ticket_id in requested}
@@ -0,0 +1,274 @@
+import os
+import time
+import mmap
+import pickle
+import struct
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"MCPWARM1"
+SNAPSHOT_VERSION = 1
+# "1"/"true" for <cache dir>/warm_state.snapshot, a path for a custom location; unset or "0" disables snapshots
+SNAPSHOT_SETTING = os.environ.get("MCP_WARM_SNAPSHOT", "")
+
+
+def _process_age() -> Optional[float]:
+    """
+    Seconds since this process was started (Linux only), i.e. including interpreter startup.
+    """
+    try:
+        with open("/proc/self/stat", "rb") as f:
+            start_ticks = int(f.read().rsplit(b")", 1)[1].split()[19])
+        with open("/proc/uptime", "rb") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupProfile:
+    """
+    Startup-time breakdown of the server process: interpreter start, import/registration phases,
+    lazy loads of the persisted indexes, and the time until the first tool response.
+    """
+
+    def __init__(self):
+        self.began = time.perf_counter()
+        age = _process_age()
+        self.process_started = self.began - age if age is not None else None
+        self.phases: Dict[str, float] = {}
+        self.lazy_loads: Dict[str, float] = {}
+        self.first_response: Optional[Dict[str, Any]] = None
+        self._last_mark = self.began
+
+    def mark(self, phase: str) -> None:
+        """
+        Records the time since the previous mark (or since this module was imported) as `phase`.
+        """
+        now = time.perf_counter()
+        self.phases[phase] = now - self._last_mark
+        self._last_mark = now
+
+    def record_load(self, component: str, seconds: float) -> None:
+        self.lazy_loads[component] = seconds
+
+    def record_first_response(self, tool: str) -> None:
+        if self.first_response is None:
+            self.first_response = {"tool": tool, "at": time.perf_counter()}
+
+    def report(self) -> Dict[str, Any]:
+        origin = self.process_started if self.process_started is not None else self.began
+        report = {
+            "interpreter_ms": round((self.began - origin) * 1000, 1) if self.process_started is not None else None,
+            "phases_ms": {phase: round(seconds * 1000, 1) for phase, seconds in self.phases.items()},
+            "lazy_loads_ms": {name: round(seconds * 1000, 1) for name, seconds in self.lazy_loads.items()},
+            "ready_ms": round((self._last_mark - origin) * 1000, 1),
+            "first_tool_response_ms": None,
+            "measured_from": "process start" if self.process_started is not None else "server import",
+        }
+        if self.first_response is not None:
+            report["first_tool_response_ms"] = round((self.first_response["at"] - origin) * 1000, 1)
+            report["first_tool"] = self.first_response["tool"]
+        return report
+
+
+class WarmSnapshot:
+    """
+    A single on-disk snapshot of the in-memory caches (wiki text, indexes, ticket topics) that a new
+    server process maps instead of rebuilding them.
+
+    Layout: magic, an 8-byte header length, a pickled header {section: (offset, length)}, then one
+    pickle per section. The file is mmap'ed when the server starts and each section is only
+    unpickled when its component first needs it. Components validate what they get (index version,
+    root, file fingerprints) exactly like their own JSON files, so a stale snapshot is just ignored.
+    The snapshot is written by the server at exit and by `python warm_state.py`; it is a local cache
+    file in the cache directory and is trusted like the code itself.
+    """
+
+    def __init__(self, setting: str = SNAPSHOT_SETTING):
+        self.setting = setting
+        self._providers: Dict[str, Callable[[], Any]] = {}
+        self._sections: Dict[str, tuple] = {}
+        self._mmap: Optional[mmap.mmap] = None
+        self._opened = False
+        self._lock = threading.Lock()
+        self.stats = {"sections_loaded": 0, "sections_saved": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.setting.lower() not in ("", "0", "false", "no")
+
+    @property
+    def path(self) -> str:
+        if self.setting.lower() in ("1", "true", "yes"):
+            from wiki_cache import CACHE_DIR
+            return os.path.join(CACHE_DIR, "warm_state.snapshot")
+        return self.setting
+
+    def register(self, section: str, provider: Callable[[], Any]) -> None:
+        """
+        Adds a section to future snapshots. `provider` returns the section's state, or None when the
+        component hasn't loaded anything in this process (the previous snapshot's copy is kept then).
+        """
+        self._providers[section] = provider
+
+    # --- reading ---
+
+    def open(self) -> bool:
+        """
+        Maps the snapshot file and reads its section table. Cheap: no section is unpickled here.
+        """
+        with self._lock:
+            if self._opened:
+                return self._mmap is not None
+            self._opened = True
+            if not self.enabled:
+                return False
+            try:
+                with open(self.path, "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                return False
+            try:
+                if mapped[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+                    raise ValueError("not a warm-state snapshot")
+                start = len(SNAPSHOT_MAGIC) + 8
+                (header_length,) = struct.unpack("<Q", mapped[len(SNAPSHOT_MAGIC):start])
+                header = pickle.loads(mapped[start:start + header_length])
+                if header.get("version") != SNAPSHOT_VERSION:
+                    raise ValueError("unsupported snapshot version")
+            except (ValueError, struct.error, pickle.UnpicklingError, EOFError) as e:
+                logger.warning("Ignoring warm-state snapshot %s: %s", self.path, e)
+                mapped.close()
+                return False
+            self._mmap = mapped
+            self._sections = header["sections"]
+            return True
+
+    def take(self, section: str) -> Any:
+        """
+        Returns the state stored for a section (unpickled straight from the mapped file), or None.
+        """
+        if not self.open():
+            return None
+        location = self._sections.get(section)
+        if location is None:
+            return None
+        offset, length = location
+        try:
+            with memoryview(self._mmap)[offset:offset + length] as view:
+                state = pickle.loads(view)
+        except Exception as e:
+            logger.warning("Ignoring warm-state section %s: %s", section, e)
+            return None
+        self.stats["sections_loaded"] += 1
+        return state
+
+    # --- writing ---
+
+    def save(self) -> Dict[str, Any]:
+        """
+        Writes a new snapshot from the registered providers (atomically, via a temp file).
+
+        Returns:
+            The path and the size of every section written.
+        """
+        self.open()
+        blobs: Dict[str, bytes] = {}
+        for section, provider in self._providers.items():
+            try:
+                state = provider()
+            except Exception as e:
+                logger.warning("Could not snapshot %s: %s", section, e)
+                state = None
+            if state is not None:
+                blobs[section] = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+            elif section in self._sections and self._mmap is not None: # Not loaded here: keep the old copy
+                offset, length = self._sections[section]
+                blobs[section] = self._mmap[offset:offset + length]
+
+        # Section offsets depend on the header's own length, so size the header first
+        sections, offset = {}, 0
+        for section, blob in blobs.items():
+            sections[section] = (offset, len(blob))
+            offset += len(blob)
+        header_length = len(pickle.dumps({"version": SNAPSHOT_VERSION, "sections": sections}))
+        base = len(SNAPSHOT_MAGIC) + 8 + header_length + 64 # Slack for the offsets growing a few digits
+        sections = {section: (base + start, length) for section, (start, length) in sections.items()}
+        header = pickle.dumps({"version": SNAPSHOT_VERSION, "sections": sections})
+        padding = base - len(SNAPSHOT_MAGIC) - 8 - len(header)
+        if padding < 0:
+            raise ValueError("snapshot header outgrew its reserved space")
+
+        path = self.path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(SNAPSHOT_MAGIC + struct.pack("<Q", len(header)) + header + b"\0" * padding)
+            for blob in blobs.values():
+                f.write(blob)
+        os.replace(tmp_path, path)
+        self.stats["sections_saved"] += len(blobs)
+        return {"path": path, "sections": {section: length for section, (_, length) in sections.items()}}
+
+    def save_at_exit(self) -> None:
+        """
+        Saves the snapshot when the process exits, so the next session starts from this one's caches.
+        """
+        if not self.enabled:
+            return
+        import atexit
+
+        def save_quietly():
+            try:
+                self.save()
+            except Exception as e:
+                logger.warning("Could not save the warm-state snapshot: %s", e)
+        atexit.register(save_quietly)
+
+
+def load_timed(component: str, load: Callable[[], Any]) -> Any:
+    """
+    Runs a component's deferred load and records how long it took in the startup profile.
+    """
+    started = time.perf_counter()
+    try:
+        return load()
+    finally:
+        startup_profile.record_load(component, time.perf_counter() - started)
+
+
+# Shared instances used by the server and the cached components
+startup_profile = StartupProfile()
+warm_snapshot = WarmSnapshot()
+
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the warm-state snapshot new server processes start from.")
+    parser.add_argument("--path", help="Snapshot file (default: MCP_WARM_SNAPSHOT, or warm_state.snapshot in the cache directory).")
+    parser.add_argument("--topics", type=int, default=None,
+                        help="Also cache the topics of the newest N tickets (default: the topic cache size).")
+    args = parser.parse_args()
+
+    import warm_state # The components register with the importable module, not with this __main__ copy
+    snapshot = warm_state.warm_snapshot
+    snapshot.setting = args.path or (SNAPSHOT_SETTING if snapshot.enabled else "1")
+    import server # Registers the snapshot sections
+    from serve_http import warm_caches
+    from utils import TOPIC_CACHE_SIZE, get_connection, get_topics_from_db
+
+    warm_caches()
+    newest = args.topics if args.topics is not None else TOPIC_CACHE_SIZE
+    if newest:
+        rows = get_connection().execute("SELECT ticket_id FROM ticket_topics ORDER BY ticket_id DESC LIMIT ?", (newest,)).fetchall()
+        get_topics_from_db([row[0] for row in reversed(rows)])
+    report = snapshot.save()
+    print(f"Saved {report['path']}:", file=sys.stderr)
+    for section, size in report["sections"].items():
+        print(f"  {section}: {size:,} bytes", file=sys.stderr)
@@ -0,0 +1,311 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+from warm_state import load_timed, warm_snapshot
+
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get("MCP_CACHE_DIR", os.path.join(PROJECT_ROOT, ".cache"))
+
+
+def _file_sha256(file_path: str) -> str:
+    """
+    Returns the SHA-256 hex digest of a file's bytes.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def open_pdf(f) -> Any:
+    """
+    Returns a PyPDF2 reader for an open PDF file. PyPDF2 is imported on first use: it is one of
+    the slowest imports of the server and many sessions never open a PDF.
+    """
+    import PyPDF2 # For reading PDF wikis
+    return PyPDF2.PdfReader(f)
+
+
+def extract_pdf_pages(file_path: str) -> List[str]:
+    """
+    Runs PyPDF2 over every page of a PDF.
+
+    Args:
+        file_path: The full path to the PDF file.
+
+    Returns:
+        A list with the extracted text of each page ("" for pages without text).
+    """
+    with open(file_path, 'rb') as f:
+        reader = open_pdf(f)
+        return [page.extract_text() or "" for page in reader.pages]
+
+
+class WikiTextCache:
+    """
+    Content-addressed cache of the per-page text extracted from wiki PDFs.
+
+    Entries live on disk as `<sha256>.json` under `<cache_dir>/wiki_text` and the most
+    recently used ones are kept in an in-memory LRU in front of that. A small manifest
+    remembers the (size, mtime) fingerprint each file had when it was hashed, so an
+    unchanged PDF is never re-hashed and a changed one is re-extracted automatically.
+    Pages are filled in lazily, so an entry may hold only the pages that were requested so far.
+
+    The hit/miss counters count text reads (iter_pages, get_pages, cached_page) once per call: a miss
+    when any requested page had to be extracted, otherwise where the entry was found. Page counts and
+    the bulk ingest's bookkeeping (num_pages, missing_pages, store_pages) are not counted.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_memory_entries: int = 32):
+        self.cache_dir = os.path.join(cache_dir, "wiki_text")
+        self.manifest_path = os.path.join(self.cache_dir, "manifest.json")
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._manifest: Dict[str, Dict[str, Any]] = {}
+        self._loaded = False # The manifest is read on first use, not at import
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "invalidations": 0, "pages_extracted": 0}
+
+    # --- manifest helpers ---
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _load(self) -> None:
+        state = warm_snapshot.take("wiki_text_cache")
+        if state is not None and state.get("cache_dir") == self.cache_dir:
+            # Manifest fingerprints are re-checked by content_key(), and entries are keyed by content hash
+            self._manifest = state["manifest"]
+            for key, entry in state["entries"].items():
+                self._remember(key, entry)
+        else:
+            self._manifest = self._load_manifest()
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    load_timed("wiki_text_cache", self._load)
+                    self._loaded = True
+
+    def snapshot_state(self) -> Optional[Dict[str, Any]]:
+        """
+        The manifest and the in-memory entries, as stored in the warm-state snapshot (None when never loaded here).
+        """
+        if not self._loaded:
+            return None
+        with self._lock:
+            return {"cache_dir": self.cache_dir, "manifest": self._manifest, "entries": dict(self._memory)}
+
+    def _write_json(self, path: str, data: Any) -> None:
+        # Write to a temp file first so a crash never leaves a half-written entry behind
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _entry_path(self, sha256: str) -> str:
+        return os.path.join(self.cache_dir, f"{sha256}.json")
+
+    def content_key(self, file_path: str) -> str:
+        """
+        Resolves the content hash for a file, re-hashing only when its size or mtime moved.
+        """
+        self._ensure_loaded()
+        abs_path = os.path.abspath(file_path)
+        st = os.stat(abs_path)
+        with self._lock:
+            known = self._manifest.get(abs_path)
+            if known and known["size"] == st.st_size and known["mtime_ns"] == st.st_mtime_ns:
+                return known["sha256"]
+
+            sha256 = _file_sha256(abs_path)
+            if known and known["sha256"] != sha256:
+                # The PDF changed on disk: drop the stale entry unless another file shares it
+                self.stats["invalidations"] += 1
+                self._memory.pop(known["sha256"], None)
+                if not any(v["sha256"] == known["sha256"] for k, v in self._manifest.items() if k != abs_path):
+                    try:
+                        os.remove(self._entry_path(known["sha256"]))
+                    except OSError:
+                        pass
+            self._manifest[abs_path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha256}
+            self._write_json(self.manifest_path, self._manifest)
+            return sha256
+
+    def _lookup(self, key: str) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        Finds a cached entry in memory or on disk. Must be called with the lock held.
+
+        Returns:
+            The entry (None when not cached) and the stats counter the caller should record for it.
+        """
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            return entry, "memory_hits"
+        try:
+            with open(self._entry_path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            entry.setdefault("num_pages", len(entry["pages"]))
+        except (OSError, ValueError, KeyError):
+            return None, "misses"
+        self._remember(key, entry)
+        return entry, "disk_hits"
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    # --- public API ---
+
+    def iter_pages(self, file_path: str, start_page: int = 1, end_page: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+        """
+        Lazily yields the text of a page range. Only pages missing from the cache are parsed,
+        and the PDF is not opened at all when every requested page is already cached.
+
+        Args:
+            file_path: The full path to the PDF file.
+            start_page: First page to yield (1-based).
+            end_page: Last page to yield (inclusive); defaults to the last page of the document.
+
+        Yields:
+            (page_number, page_text) tuples in page order.
+        """
+        key = self.content_key(file_path)
+        with self._lock:
+            entry, outcome = self._lookup(key)
+
+        f = None
+        reader = None
+        dirty = False
+        try:
+            if entry is None:
+                f = open(file_path, 'rb')
+                reader = open_pdf(f)
+                entry = {"sha256": key, "num_pages": len(reader.pages), "pages": [None] * len(reader.pages)}
+                with self._lock:
+                    self._remember(key, entry)
+                dirty = True
+
+            last_page = entry["num_pages"] if end_page is None else min(end_page, entry["num_pages"])
+            for page_no in range(max(start_page, 1), last_page + 1):
+                page_text = entry["pages"][page_no - 1]
+                if page_text is None:
+                    if reader is None:
+                        f = open(file_path, 'rb')
+                        reader = open_pdf(f)
+                    page_text = reader.pages[page_no - 1].extract_text() or ""
+                    entry["pages"][page_no - 1] = page_text
+                    self.stats["pages_extracted"] += 1
+                    dirty = True
+                yield page_no, page_text
+        finally:
+            if f is not None:
+                f.close()
+            with self._lock:
+                self.stats["misses" if dirty else outcome] += 1 # Once per call, however many pages it read
+                if dirty:
+                    self._write_json(self._entry_path(key), entry)
+
+    def get_pages(self, file_path: str) -> List[str]:
+        """
+        Returns the per-page text of a whole PDF, extracting only pages that are not cached yet.
+
+        Args:
+            file_path: The full path to the PDF file.
+
+        Returns:
+            A list with the extracted text of each page.
+        """
+        return [page_text for _, page_text in self.iter_pages(file_path)]
+
+    def cached_page(self, sha256: str, page_no: int) -> Optional[str]:
+        """
+        Returns the cached text of one page of the PDF with this content hash, or None when it isn't cached.
+        Never opens the PDF.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            entry, outcome = self._lookup(sha256)
+            text = entry["pages"][page_no - 1] if entry is not None and 1 <= page_no <= len(entry["pages"]) else None
+            self.stats[outcome if text is not None else "misses"] += 1
+        return text
+
+    def _entry_for(self, file_path: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Returns the (key, entry) for a PDF, creating an empty entry sized to its page count if needed.
+        """
+        key = self.content_key(file_path)
+        with self._lock:
+            entry, _ = self._lookup(key)
+        if entry is None:
+            with open(file_path, 'rb') as f:
+                page_count = len(open_pdf(f).pages)
+            entry = {"sha256": key, "num_pages": page_count, "pages": [None] * page_count}
+            with self._lock:
+                self._remember(key, entry)
+                self._write_json(self._entry_path(key), entry)
+        return key, entry
+
+    def num_pages(self, file_path: str) -> int:
+        """
+        Returns the page count of a PDF, reading it from the cache when possible.
+        """
+        return self._entry_for(file_path)[1]["num_pages"]
+
+    def missing_pages(self, file_path: str) -> List[int]:
+        """
+        Lists the (1-based) page numbers of a PDF whose text is not cached yet.
+        """
+        entry = self._entry_for(file_path)[1]
+        return [page_no for page_no, page_text in enumerate(entry["pages"], start=1) if page_text is None]
+
+    def store_pages(self, file_path: str, pages: Dict[int, str]) -> None:
+        """
+        Merges text extracted elsewhere (e.g. by the bulk ingest workers) into the cache.
+
+        Args:
+            file_path: The full path to the PDF file the pages belong to.
+            pages: Mapping of 1-based page number to extracted text.
+        """
+        key, entry = self._entry_for(file_path)
+        with self._lock:
+            for page_no, page_text in pages.items():
+                entry["pages"][page_no - 1] = page_text
+            self.stats["pages_extracted"] += len(pages)
+            self._write_json(self._entry_path(key), entry)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns the hit/miss counters plus the current cache occupancy.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            lookups = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+            return {
+                **self.stats,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "tracked_files": len(self._manifest),
+                "cache_dir": self.cache_dir,
+            }
+
+
+# Shared instance used by the server tools
+wiki_text_cache = WikiTextCache()
+warm_snapshot.register("wiki_text_cache", wiki_text_cache.snapshot_state)
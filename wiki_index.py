@@ -0,0 +1,273 @@
+import os
+import re
+import json
+import math
+import hashlib
+import heapq
+import threading
+import time
+from collections import Counter
+from typing import List, Dict, Any, Optional
+
+from wiki_cache import CACHE_DIR, wiki_text_cache
+from warm_state import load_timed, warm_snapshot
+
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+WIKI_DIR = os.environ.get("MCP_WIKI_DIR", os.path.join(PROJECT_ROOT, "Wikis"))
+
+INDEX_VERSION = 2
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lower-cases text and splits it into alphanumeric terms, dropping common stopwords.
+    """
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class WikiIndex:
+    """
+    BM25-ranked inverted index over the extracted page text of every wiki PDF.
+
+    Each page is one document. The per-file term frequencies are persisted to
+    `<cache_dir>/wiki_index.json` together with the content hash they were built from,
+    so a refresh only re-tokenizes PDFs that were added or changed. The index holds no page
+    text: snippets are read from the wiki text cache by content hash, so queries never parse a PDF.
+
+    Queries don't rescan the Wikis directory each time. At most every refresh_interval seconds they
+    stat the directory, and only a changed directory mtime (a PDF added, removed or renamed into
+    place), or rescan_interval seconds without a scan, re-checks the files themselves.
+    """
+
+    def __init__(self, wiki_dir: str = WIKI_DIR, cache_dir: str = CACHE_DIR, text_cache=wiki_text_cache,
+                 k1: float = 1.5, b: float = 0.75, refresh_interval: float = 2.0, rescan_interval: float = 60.0):
+        self.wiki_dir = wiki_dir
+        self.index_path = os.path.join(cache_dir, "wiki_index.json")
+        self.text_cache = text_cache
+        self.k1 = k1
+        self.b = b
+        self.refresh_interval = refresh_interval
+        self.rescan_interval = rescan_interval
+        self._lock = threading.RLock()
+        self._files: Dict[str, Dict[str, Any]] = {} # filename -> {"sha256", "pages": [{"tf"}]}
+        self._last_refresh = 0.0
+        self._last_scan = 0.0
+        self._dir_signature = None # Wikis directory mtime at the last full scan
+        self._fingerprint: Optional[str] = None
+        self._postings: Dict[str, List[tuple]] = {}
+        self._docs: List[tuple] = []
+        self._avg_len = 0.0
+        self._loaded = False # The persisted index is read on first use, not at import
+
+    # --- persistence ---
+
+    def _load(self) -> None:
+        derived = None
+        try:
+            data = warm_snapshot.take("wiki_index")
+            if data is None:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self._files = data["files"]
+                derived = data.get("derived") # Only snapshots carry the postings
+        except (OSError, ValueError, KeyError):
+            self._files = {}
+        if derived is not None:
+            self._postings, self._docs, self._avg_len = derived
+        else:
+            self._rebuild_postings()
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    load_timed("wiki_index", self._load)
+                    self._loaded = True
+
+    def snapshot_state(self) -> Optional[Dict[str, Any]]:
+        """
+        The index plus its derived postings, as stored in the warm-state snapshot (None when never loaded here).
+        """
+        if not self._loaded:
+            return None
+        with self._lock:
+            return {"version": INDEX_VERSION, "files": self._files, "derived": (self._postings, self._docs, self._avg_len)}
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": INDEX_VERSION, "files": self._files}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _rebuild_postings(self) -> None:
+        """
+        Derives the in-memory postings lists and length statistics from the per-file data.
+        """
+        postings: Dict[str, List[tuple]] = {}
+        docs = []
+        for filename in sorted(self._files):
+            for page_no, page in enumerate(self._files[filename]["pages"], start=1):
+                doc_id = len(docs)
+                docs.append((filename, page_no, sum(page["tf"].values())))
+                for term, tf in page["tf"].items():
+                    postings.setdefault(term, []).append((doc_id, tf))
+        self._postings = postings
+        self._docs = docs
+        self._avg_len = (sum(d[2] for d in docs) / len(docs)) if docs else 0.0
+        self._fingerprint = None
+
+    # --- maintenance ---
+
+    @staticmethod
+    def _file_entry(sha256: str, pages: List[str]) -> Dict[str, Any]:
+        return {"sha256": sha256, "pages": [{"tf": dict(Counter(tokenize(text)))} for text in pages]}
+
+    def add_file(self, filename: str, sha256: str, pages: List[str]) -> None:
+        """
+        Indexes (or re-indexes) the pages of one wiki file and persists the index.
+        """
+        self._ensure_loaded()
+        with self._lock:
+            self._files[filename] = self._file_entry(sha256, pages)
+            self._rebuild_postings()
+            self._save()
+
+    def refresh(self, force: bool = False) -> Dict[str, List[str]]:
+        """
+        Brings the index in line with the Wikis directory, re-indexing only added or changed PDFs.
+
+        Args:
+            force: Skip the refresh_interval throttle and the directory mtime check, and re-check every file now.
+
+        Returns:
+            A dictionary listing the filenames that were added, updated and removed.
+        """
+        changes = {"added": [], "updated": [], "removed": []}
+        self._ensure_loaded()
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_refresh < self.refresh_interval:
+                return changes
+            self._last_refresh = now
+            signature = self._directory_signature() # Taken before the scan, so a change during it is seen next time
+            if not force and signature == self._dir_signature and now - self._last_scan < self.rescan_interval:
+                return changes
+            self._dir_signature = signature
+            self._last_scan = now
+
+            on_disk = set()
+            if os.path.isdir(self.wiki_dir):
+                for filename in os.listdir(self.wiki_dir):
+                    file_path = os.path.join(self.wiki_dir, filename)
+                    if filename.lower().endswith(".pdf") and os.path.isfile(file_path):
+                        on_disk.add(filename)
+                        sha256 = self.text_cache.content_key(file_path)
+                        known = self._files.get(filename)
+                        if known and known["sha256"] == sha256:
+                            continue
+                        pages = self.text_cache.get_pages(file_path)
+                        self._files[filename] = self._file_entry(sha256, pages)
+                        changes["updated" if known else "added"].append(filename)
+
+            for filename in list(self._files):
+                if filename not in on_disk:
+                    del self._files[filename]
+                    changes["removed"].append(filename)
+
+            if any(changes.values()):
+                self._rebuild_postings()
+                self._save()
+        return changes
+
+    def _directory_signature(self) -> Optional[int]:
+        try:
+            return os.stat(self.wiki_dir).st_mtime_ns
+        except OSError:
+            return None
+
+    def fingerprint(self) -> str:
+        """
+        Hash of the indexed files and their content hashes; it changes whenever a refresh re-indexes something.
+        """
+        self.refresh()
+        with self._lock:
+            if self._fingerprint is None:
+                files = sorted((filename, entry["sha256"]) for filename, entry in self._files.items())
+                self._fingerprint = hashlib.sha256(json.dumps(files).encode("utf-8")).hexdigest()[:16]
+            return self._fingerprint
+
+    # --- querying ---
+
+    def _page_text(self, filename: str, page_no: int) -> str:
+        """
+        Text of an indexed page, from the wiki text cache entry of the content hash it was indexed from.
+        """
+        sha256 = self._files[filename]["sha256"]
+        text = self.text_cache.cached_page(sha256, page_no)
+        if text is None: # Cache entry removed since indexing; re-extract if the PDF still has that content
+            file_path = os.path.join(self.wiki_dir, filename)
+            try:
+                if self.text_cache.content_key(file_path) == sha256:
+                    text = next(self.text_cache.iter_pages(file_path, page_no, page_no), (page_no, ""))[1]
+            except OSError:
+                pass
+        return text or ""
+
+    def _snippet(self, text: str, terms: List[str], width: int = 240) -> str:
+        lowered = text.lower()
+        positions = [pos for pos in (lowered.find(term) for term in terms) if pos >= 0]
+        start = max(0, min(positions) - width // 4) if positions else 0
+        snippet = " ".join(text[start:start + width].split())
+        return ("..." if start > 0 else "") + snippet + ("..." if start + width < len(text) else "")
+
+    def search(self, query: str, max_results: int = 5, snippet_chars: int = 240) -> List[Dict[str, Any]]:
+        """
+        Ranks wiki pages against a query with BM25.
+
+        Args:
+            query: Free-text query (e.g. a ticket topic).
+            max_results: The maximum number of page hits to return.
+            snippet_chars: Length of the page text returned around the first matching term.
+
+        Returns:
+            A list of hits with 'filename', 'path', 'page' (1-based), 'score' and 'snippet'.
+        """
+        self.refresh()
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            n_docs = len(self._docs)
+            if not terms or not n_docs:
+                return []
+            scores: Dict[int, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings:
+                    norm = self.k1 * (1 - self.b + self.b * self._docs[doc_id][2] / self._avg_len)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+            hits = []
+            for doc_id, score in heapq.nlargest(max_results, scores.items(), key=lambda item: item[1]):
+                filename, page_no, _ = self._docs[doc_id]
+                hits.append({
+                    "filename": filename,
+                    "path": os.path.join(self.wiki_dir, filename),
+                    "page": page_no,
+                    "score": round(score, 4),
+                    "snippet": self._snippet(self._page_text(filename, page_no), terms, snippet_chars),
+                })
+            return hits
+
+
+# Shared instance used by the server tools
+wiki_index = WikiIndex()
+warm_snapshot.register("wiki_index", wiki_index.snapshot_state)